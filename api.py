@@ -1,12 +1,13 @@
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_pagination import add_pagination
 from api.dependencies import telegram_auth, admin_auth
 from api.routers import filters, subscriptions, tariffs, contacts, payhistory, references
-from api.admin import car, contacts as admin_contacts, filters as admin_filters, payhistory as admin_payhistory, settings, subscription, tariffs as admin_tariffs, users
+from api.admin import car, contacts as admin_contacts, filters as admin_filters, payhistory as admin_payhistory, settings, subscription, tariffs as admin_tariffs, users, crawl_run, metrics, car_archive
 from database.db_session import global_init
+from database.instrumentation import track_queries
 from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 
 # Lifespan для инициализации и завершения
@@ -54,6 +55,9 @@ app.include_router(settings.router)
 app.include_router(subscription.router)
 app.include_router(admin_tariffs.router)
 app.include_router(users.router)
+app.include_router(crawl_run.router)
+app.include_router(metrics.router)
+app.include_router(car_archive.router)
 
 # Настройка CORS
 app.add_middleware(
@@ -64,6 +68,21 @@ app.add_middleware(
     allow_headers=["*"],  # Разрешить все заголовки
 )
 
+# Счётчики запросов к БД на каждый HTTP-запрос: в заголовках ответа и в /admin/metrics/queries
+@app.middleware("http")
+async def count_db_queries(request: Request, call_next):
+    with track_queries(f"{request.method} {request.url.path}") as stats:
+        response = await call_next(request)
+        # Шаблон маршрута вместо пути, чтобы /filters/1 и /filters/2 считались вместе
+        route = request.scope.get("route")
+        if route is not None:
+            stats.name = f"{request.method} {route.path}"
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.1f}"
+    if stats.repeated:
+        print(stats.summary())
+    return response
+
 # Тестовый эндпоинт для проверки работоспособности
 @app.get("/")
 async def root():
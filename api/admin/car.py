@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from api.dependencies import admin_auth
 from pydantic import BaseModel
 from typing import Optional
@@ -6,6 +6,8 @@ from datetime import datetime
 from database import DBApi
 from fastapi_pagination import Page  # Импортируем Page для пагинации
 from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.utils.keyset import KeysetPage, keyset_paginate
+from database.car import Car
 
 router = APIRouter(prefix="/admin/car", tags=["Admin - Car"])
 
@@ -102,11 +104,22 @@ async def create_car(car: CarCreate, is_admin: bool = Depends(admin_auth)):
 # Получение всех автомобилей с пагинацией
 @router.get("/", response_model=Page[CarResponse])
 async def get_all_cars(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Предполагаем, что get_all_cars теперь возвращает SQLAlchemy-запрос
         query = await db.get_all_cars_query()
         return await paginate(db._sess, query)
 
+# Получение автомобилей по курсору (keyset), для глубокого листания без OFFSET
+@router.get("/cursor", response_model=KeysetPage[CarResponse])
+async def get_all_cars_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_cars_query()
+        return await keyset_paginate(db, query, Car, [Car.create_dttm, Car.id], cursor, size)
+
 # Получение автомобиля по ID
 @router.get("/{car_id}", response_model=CarResponse)
 async def get_car(car_id: int, is_admin: bool = Depends(admin_auth)):
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from api.dependencies import admin_auth
+from typing import Optional
+from datetime import datetime
+from database import DBApi
+from database.car_archive import CarArchive
+from fastapi_pagination import Page  # Импортируем Page для пагинации
+from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.admin.car import CarResponse
+from api.utils.keyset import KeysetPage, keyset_paginate
+
+router = APIRouter(prefix="/admin/car_archive", tags=["Admin - CarArchive"])
+
+# Модель для ответа
+class CarArchiveResponse(CarResponse):
+    archive_dttm: datetime
+
+# Получение архивных автомобилей с пагинацией
+@router.get("/", response_model=Page[CarArchiveResponse])
+async def get_all_archived_cars(series_id: Optional[int] = None, is_admin: bool = Depends(admin_auth)):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_archived_cars_query(series_id)
+        return await paginate(db._sess, query)
+
+# Получение архивных автомобилей по курсору, от недавно архивированных
+@router.get("/cursor", response_model=KeysetPage[CarArchiveResponse])
+async def get_all_archived_cars_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_archived_cars_query()
+        return await keyset_paginate(db, query, CarArchive, [CarArchive.archive_dttm, CarArchive.id], cursor, size)
+
+# Получение архивного автомобиля по ID
+@router.get("/{car_id}", response_model=CarArchiveResponse)
+async def get_archived_car(car_id: int, is_admin: bool = Depends(admin_auth)):
+    async with DBApi() as db:
+        car = await db.get_archived_car_by_id(car_id)
+        if not car:
+            raise HTTPException(status_code=404, detail="Автомобиль в архиве не найден")
+        return car
@@ -46,7 +46,7 @@ async def create_contact(contact: ContactCreate, is_admin: bool = Depends(admin_
 # Получение всех контактов с пагинацией
 @router.get("/", response_model=Page[ContactResponse])
 async def get_all_contacts(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_contacts_query для получения SQLAlchemy-запроса
         query = await db.get_all_contacts_query()
         return await paginate(db._sess, query)
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, HTTPException, Depends
+from api.dependencies import admin_auth
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+from datetime import datetime, timedelta
+from database import DBApi
+from fastapi_pagination import Page  # Импортируем Page для пагинации
+from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+
+router = APIRouter(prefix="/admin/crawl_run", tags=["Admin - CrawlRun"])
+
+# Модель для ответа
+class CrawlRunResponse(BaseModel):
+    id: int
+    source: Optional[str] = None
+    start_dttm: datetime
+    end_dttm: Optional[datetime] = None
+    pages_fetched: int = 0
+    listings_seen: int = 0
+    new_count: int = 0
+    updated_count: int = 0
+    skipped_count: int = 0
+    failures: Optional[Dict[str, int]] = None
+    bytes_transferred: int = 0
+    fetch_time: float = 0
+    translate_time: float = 0
+    resolve_time: float = 0
+    db_write_time: float = 0
+    translation_cache_hits: int = 0
+    translation_api_calls: int = 0
+
+# Модель для сравнения скорости запусков
+class CrawlRunThroughput(BaseModel):
+    id: int
+    source: Optional[str] = None
+    start_dttm: datetime
+    duration: float
+    listings_per_sec: float
+    new_per_min: float
+    sec_per_new_car: Optional[float] = None
+    baseline_sec_per_new_car: Optional[float] = None
+    change_percent: Optional[float] = None  # > 0 — запуск медленнее предыдущих
+
+# Получение всех запусков с пагинацией
+@router.get("/", response_model=Page[CrawlRunResponse])
+async def get_all_crawl_runs(source: Optional[str] = None, is_admin: bool = Depends(admin_auth)):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_crawl_runs_query(source)
+        return await paginate(db._sess, query)
+
+# Сравнение пропускной способности запусков за период
+@router.get("/throughput", response_model=List[CrawlRunThroughput])
+async def get_crawl_runs_throughput(
+    days: int = 7,
+    window: int = 10,
+    source: Optional[str] = None,
+    is_admin: bool = Depends(admin_auth)
+):
+    """
+    Для каждого завершённого запуска считает скорость обработки и сравнивает
+    время на одну новую машину со средним по предыдущим window запускам того же парсера.
+    """
+    async with DBApi() as db:
+        runs = await db.get_finished_crawl_runs(datetime.now() - timedelta(days=days), source)
+
+    history = {}
+    data = []
+    for run in runs:
+        duration = max((run.end_dttm - run.start_dttm).total_seconds(), 1e-6)
+        new_count = run.new_count or 0
+        sec_per_new_car = duration / new_count if new_count else None
+
+        previous = history.setdefault(run.source, [])
+        baseline = sum(previous) / len(previous) if previous else None
+        change_percent = None
+        if sec_per_new_car is not None and baseline:
+            change_percent = round((sec_per_new_car - baseline) / baseline * 100, 1)
+
+        data.append(CrawlRunThroughput(
+            id=run.id,
+            source=run.source,
+            start_dttm=run.start_dttm,
+            duration=round(duration, 1),
+            listings_per_sec=round((run.listings_seen or 0) / duration, 3),
+            new_per_min=round(new_count / duration * 60, 3),
+            sec_per_new_car=round(sec_per_new_car, 3) if sec_per_new_car is not None else None,
+            baseline_sec_per_new_car=round(baseline, 3) if baseline else None,
+            change_percent=change_percent,
+        ))
+        if sec_per_new_car is not None:
+            previous.append(sec_per_new_car)
+            del previous[:-window]
+    return data
+
+# Получение запуска по ID
+@router.get("/{run_id}", response_model=CrawlRunResponse)
+async def get_crawl_run(run_id: int, is_admin: bool = Depends(admin_auth)):
+    async with DBApi() as db:
+        crawl_run = await db.get_crawl_run_by_id(run_id)
+        if not crawl_run:
+            raise HTTPException(status_code=404, detail="Запуск не найден")
+        return crawl_run
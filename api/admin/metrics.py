@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from api.dependencies import admin_auth
+from pydantic import BaseModel
+from typing import List, Optional
+from database.db_session import get_engine
+from database.pool import get_pool_metrics
+from database.instrumentation import query_metrics
+
+router = APIRouter(prefix="/admin/metrics", tags=["Admin - Metrics"])
+
+# Модель для ответа
+class PoolMetricsResponse(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    timeout: Optional[float] = None
+    acquired: int
+    timeouts: int
+    waiters: int
+    max_waiters: int
+    avg_acquire_ms: float
+    max_acquire_ms: float
+
+class QueryMetricsResponse(BaseModel):
+    name: str
+    runs: int
+    queries: int
+    avg_queries: float
+    max_queries: int
+    total_ms: float
+    slowest_ms: float
+    slowest_statement: Optional[str] = None
+    repeated_warnings: int
+
+# Состояние пула соединений процесса API
+@router.get("/pool", response_model=PoolMetricsResponse)
+async def get_pool(is_admin: bool = Depends(admin_auth)):
+    engine = get_engine()
+    if engine is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="База данных не инициализирована")
+    return get_pool_metrics(engine)
+
+# Запросы к БД по маршрутам API с момента запуска процесса, больше всего запросов — сверху
+@router.get("/queries", response_model=List[QueryMetricsResponse])
+async def get_queries(is_admin: bool = Depends(admin_auth)):
+    return query_metrics.as_list()
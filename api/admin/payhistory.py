@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from api.dependencies import admin_auth
 from pydantic import BaseModel
 from typing import Optional
@@ -6,6 +6,8 @@ from datetime import datetime
 from database import DBApi
 from fastapi_pagination import Page  # Импортируем Page для пагинации
 from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.utils.keyset import KeysetPage, keyset_paginate
+from database.payhistory import PayHistory
 
 router = APIRouter(prefix="/admin/payhistory", tags=["Admin - PayHistory"])
 
@@ -54,15 +56,26 @@ async def create_pay_history(pay_history: PayHistoryCreate, is_admin: bool = Dep
 # Получение всех записей в истории платежей с пагинацией
 @router.get("/", response_model=Page[PayHistoryResponse])
 async def get_all_pay_histories(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_pay_histories_query для получения SQLAlchemy-запроса
         query = await db.get_all_pay_histories_query()
         return await paginate(db._sess, query)
 
+# Получение истории платежей по курсору (keyset), для глубокого листания без OFFSET
+@router.get("/cursor", response_model=KeysetPage[PayHistoryResponse])
+async def get_all_pay_histories_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_pay_histories_query()
+        return await keyset_paginate(db, query, PayHistory, [PayHistory.id], cursor, size)
+
 # Получение истории платежей по пользователю с пагинацией
 @router.get("/user/{user_id}", response_model=Page[PayHistoryResponse])
 async def get_pay_history_by_user(user_id: int, is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_pay_history_by_user_query для получения SQLAlchemy-запроса
         query = await db.get_pay_history_by_user_query(user_id)
         return await paginate(db._sess, query)
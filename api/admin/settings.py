@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from api.dependencies import admin_auth
 from pydantic import BaseModel
 from typing import Optional
@@ -6,6 +6,8 @@ from datetime import datetime
 from database import DBApi
 from fastapi_pagination import Page  # Импортируем Page для пагинации
 from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.utils.keyset import KeysetPage, keyset_paginate
+from database.settings import Settings
 
 router = APIRouter(prefix="/admin/settings", tags=["Admin - Settings"])
 
@@ -50,11 +52,22 @@ async def set_setting(setting: SettingCreate, is_admin: bool = Depends(admin_aut
 # Получение всех настроек с пагинацией
 @router.get("/", response_model=Page[SettingResponse])
 async def get_all_settings(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_settings_query для получения SQLAlchemy-запроса
         query = await db.get_all_settings_query()
         return await paginate(db._sess, query)
 
+# Получение настроек по курсору (keyset), для глубокого листания без OFFSET
+@router.get("/cursor", response_model=KeysetPage[SettingResponse])
+async def get_all_settings_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_settings_query()
+        return await keyset_paginate(db, query, Settings, [Settings.id], cursor, size)
+
 # Получение настройки по ключу
 @router.get("/key/{key}", response_model=SettingResponse)
 async def get_setting_by_key(key: str, is_admin: bool = Depends(admin_auth)):
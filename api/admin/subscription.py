@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from api.dependencies import admin_auth
 from pydantic import BaseModel
 from typing import Optional
@@ -6,6 +6,8 @@ from datetime import datetime
 from database import DBApi
 from fastapi_pagination import Page  # Импортируем Page для пагинации
 from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.utils.keyset import KeysetPage, keyset_paginate
+from database.subscription import Subscription
 
 router = APIRouter(prefix="/admin/subscription", tags=["Admin - Subscription"])
 
@@ -46,22 +48,33 @@ async def create_subscription(subscription: SubscriptionCreate, is_admin: bool =
 # Получение всех подписок с пагинацией
 @router.get("/", response_model=Page[SubscriptionResponse])
 async def get_all_subscriptions(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_subscriptions_query для получения SQLAlchemy-запроса
         query = await db.get_all_subscriptions_query()
         return await paginate(db._sess, query)
 
+# Получение подписок по курсору (keyset), для глубокого листания без OFFSET
+@router.get("/cursor", response_model=KeysetPage[SubscriptionResponse])
+async def get_all_subscriptions_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_subscriptions_query()
+        return await keyset_paginate(db, query, Subscription, [Subscription.id], cursor, size)
+
 # Получение подписки по пользователю
 @router.get("/user/{user_id}", response_model=Page[SubscriptionResponse])
 async def get_subscription_by_user(user_id: int, is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         subscription = await db.get_subscription_by_user_query(user_id)
         return await paginate(db._sess, subscription)
 
 # Получение подписок, истекающих в заданном временном интервале, с пагинацией
 @router.get("/expiring", response_model=Page[SubscriptionResponse])
 async def get_expiring_subscriptions(start_time: datetime, end_time: datetime, is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_expiring_subscriptions_query для получения SQLAlchemy-запроса
         query = await db.get_expiring_subscriptions_query(start_time, end_time)
         return await paginate(db._sess, query)
@@ -54,7 +54,7 @@ async def create_tariff(tariff: TariffCreate, is_admin: bool = Depends(admin_aut
 # Получение всех тарифов с пагинацией
 @router.get("/", response_model=Page[TariffResponse])
 async def get_all_tariffs(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_tariffs_query для получения SQLAlchemy-запроса
         query = await db.get_all_tariffs_query()
         return await paginate(db._sess, query)
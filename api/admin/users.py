@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from api.dependencies import admin_auth
 from pydantic import BaseModel
 from typing import Optional
@@ -6,6 +6,8 @@ from datetime import datetime
 from database import DBApi
 from fastapi_pagination import Page  # Импортируем Page для пагинации
 from fastapi_pagination.ext.sqlalchemy import paginate  # Импортируем paginate для SQLAlchemy
+from api.utils.keyset import KeysetPage, keyset_paginate
+from database.users import Users
 
 router = APIRouter(prefix="/admin/users", tags=["Admin - Users"])
 
@@ -44,11 +46,22 @@ async def create_user(user: UserCreate, is_admin: bool = Depends(admin_auth)):
 # Получение всех пользователей с пагинацией
 @router.get("/", response_model=Page[UserResponse])
 async def get_all_users(is_admin: bool = Depends(admin_auth)):
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         # Используем новый метод get_all_users_query для получения SQLAlchemy-запроса
         query = await db.get_all_users_query()
         return await paginate(db._sess, query)
 
+# Получение пользователей по курсору (keyset), для глубокого листания без OFFSET
+@router.get("/cursor", response_model=KeysetPage[UserResponse])
+async def get_all_users_by_cursor(
+    cursor: Optional[str] = None,
+    size: int = Query(50, ge=1, le=500),
+    is_admin: bool = Depends(admin_auth)
+):
+    async with DBApi(read_only=True) as db:
+        query = await db.get_all_users_query()
+        return await keyset_paginate(db, query, Users, [Users.id], cursor, size)
+
 # Получение пользователя по ID
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, is_admin: bool = Depends(admin_auth)):
@@ -2,6 +2,7 @@
 from fastapi import Header, HTTPException, Depends
 from aiogram.utils.web_app import safe_parse_webapp_init_data
 from database import DBApi
+from database.routing import current_user_id
 from typing import Optional
 
 async def get_telegram_user(auth: str = Header(...)):
@@ -40,6 +41,8 @@ async def get_admin_token(auth: str = Header(...), login: str = Header(...)):
 
 # Пример использования в эндпоинтах
 async def telegram_auth(user_id: int = Depends(get_telegram_user)):
+    # Запросы пользователя после его записи читают с основной базы, а не с реплики
+    current_user_id.set(user_id)
     return user_id
 
 async def admin_auth(is_admin: bool = Depends(get_admin_token)):
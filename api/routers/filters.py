@@ -61,7 +61,7 @@ async def create_filter(filter_data: FilterCreate, user_id: int = Depends(telegr
 @router.get("/list", response_model=List[FilterResponse])
 async def get_filters(auth_user_id: int = Depends(telegram_auth)):
     filters_data = []
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         filters = await db.get_filters_by_user(auth_user_id)
         for i in filters:
             manufacture = await db.get_manufacture_by_id(i.manufacture_id) if i.manufacture_id else None
@@ -91,6 +91,20 @@ async def get_filters(auth_user_id: int = Depends(telegram_auth)):
             )
     return [FilterResponse(**f) for f in filters_data]
 
+@router.get("/{id}/count", response_model=int)
+async def get_filter_match_count(id: int, user_id: int = Depends(telegram_auth)):
+    """
+    Depends on telegram_auth
+
+    Число машин каталога под фильтром
+    """
+    async with DBApi(read_only=True) as db:
+        filter = await db.get_filter_by_id(id)
+        if not filter or filter.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Фильтр не найден")
+        from matching.snapshot import count_matches  # numpy грузится при первом подсчёте, не при старте API
+        return await count_matches(db, filter)
+
 @router.delete("/{id}")
 async def delete_filter(id: int, user_id: bool = Depends(telegram_auth)):
     """
@@ -12,7 +12,7 @@ async def get_manufacturers(user_id: int = Depends(telegram_auth)):
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_all_manufactures()
 
 @router.get("/model/{manufactury_id}", response_model=List[ReferenceResponse])
@@ -20,7 +20,7 @@ async def get_models(manufactury_id: int, user_id: int = Depends(telegram_auth))
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_models_by_manufacture(manufactury_id)
 
 @router.get("/series/{model_id}", response_model=List[ReferenceResponse])
@@ -30,7 +30,7 @@ async def get_series(model_id: int, user_id: int = Depends(telegram_auth)):
     """
     data = []
     now = datetime.now()
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         series = await db.get_series_by_model(model_id)
         for i in series:
             min_date, max_date = await db.get_series_date_range(i.id)
@@ -53,7 +53,7 @@ async def get_equipment(series_id: int, user_id: int = Depends(telegram_auth)):
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_equipment_by_series(series_id)
 
 @router.get("/engineType", response_model=List[ReferenceResponse])
@@ -61,7 +61,7 @@ async def get_engine_types(user_id: int = Depends(telegram_auth)):
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_all_engine_types()
 
 @router.get("/driveType", response_model=List[ReferenceResponse])
@@ -69,7 +69,7 @@ async def get_drive_types(user_id: int = Depends(telegram_auth)):
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_all_drive_types()
 
 @router.get("/carColor", response_model=List[ReferenceResponse])
@@ -77,5 +77,5 @@ async def get_car_colors(user_id: int = Depends(telegram_auth)):
     """
     Depends on telegram_auth
     """
-    async with DBApi() as db:
+    async with DBApi(read_only=True) as db:
         return await db.get_all_car_colors()
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Keyset-пагинация (по курсору) для админских списков больших таблиц.
+
+В отличие от fastapi_pagination с OFFSET и COUNT(*), страница читается по индексу
+с места, где закончилась предыдущая: WHERE (ключи) < (ключи последней строки)
+ORDER BY ключи DESC LIMIT size. Время ответа не зависит от глубины листания.
+NULL в ключе сортировки стоит там же, где его ставит DESC в базе: в PostgreSQL
+раньше всех значений, в MySQL и SQLite — после всех.
+Курсор — непрозрачная base64-строка с ключами последней строки страницы.
+"""
+import base64
+import binascii
+import json
+import time
+from datetime import datetime
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import and_, false, or_, tuple_
+
+from database import DBApi
+
+T = TypeVar("T")
+
+# Сколько секунд держать оценку числа строк таблицы
+TOTAL_CACHE_TTL = 60
+
+_total_cache: Dict[str, Tuple[float, int]] = {}
+
+
+class KeysetPage(BaseModel, Generic[T]):
+    items: List[T]
+    size: int
+    # Курсор следующей страницы; None — это последняя страница
+    next_cursor: Optional[str] = None
+    # Приблизительное число строк в таблице; для списков с условием не считается
+    total: Optional[int] = None
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Упаковывает значения ключей сортировки в непрозрачный курсор."""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> list:
+    """Распаковывает курсор; неверный курсор — ошибка 400."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if value is not None and key.type.python_type is datetime else value
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Неверный курсор")
+
+
+def after_cursor(keys: Sequence, values: Sequence, nulls_first: bool, row_values: bool = False):
+    """
+    Условие «строка после курсора» при сортировке по убыванию всех ключей.
+
+    Args:
+        nulls_first: NULL в ключе идёт раньше любых значений (DESC в PostgreSQL),
+            иначе — после них (DESC в MySQL и SQLite).
+        row_values: Сравнивать ключи одним row value (key1, key2) < (v1, v2) —
+            так PostgreSQL читает страницу одним диапазоном индекса.
+    """
+    if not keys:
+        return false()
+    if row_values and nulls_first and all(value is not None for value in values):
+        # Строки с NULL в ключе дают NULL в сравнении и отсекаются — они уже были раньше курсора
+        return tuple_(*keys) < tuple_(*values)
+    key, value = keys[0], values[0]
+    rest = after_cursor(keys[1:], values[1:], nulls_first, row_values)
+    if value is None:
+        same = and_(key.is_(None), rest)
+        return or_(same, key.is_not(None)) if nulls_first else same
+    after = key < value
+    if key.nullable and not nulls_first:
+        after = or_(after, key.is_(None))
+    return or_(after, and_(key == value, rest))
+
+
+async def get_total(db: DBApi, model) -> int:
+    """Оценка числа строк таблицы с кэшем на TOTAL_CACHE_TTL секунд."""
+    table_name = model.__tablename__
+    cached = _total_cache.get(table_name)
+    if cached and time.monotonic() - cached[0] < TOTAL_CACHE_TTL:
+        return cached[1]
+    total = await db.get_table_row_estimate(model)
+    _total_cache[table_name] = (time.monotonic(), total)
+    return total
+
+
+async def keyset_paginate(db: DBApi, query, model, keys: Sequence, cursor: Optional[str], size: int) -> dict:
+    """
+    Выполняет запрос одной keyset-страницей.
+
+    Args:
+        query: Запрос select(model) с условиями, но без сортировки.
+        keys: Колонки сортировки; последняя должна быть уникальной (обычно id).
+        cursor: Курсор из next_cursor предыдущей страницы или None для первой.
+        size: Размер страницы.
+
+    Returns:
+        Словарь в форме KeysetPage.
+    """
+    filtered = query.whereclause is not None
+    if cursor:
+        postgresql = db._sess.get_bind().dialect.name == "postgresql"
+        query = query.where(after_cursor(keys, decode_cursor(cursor, keys), nulls_first=postgresql, row_values=postgresql))
+    query = query.order_by(*(key.desc() for key in keys)).limit(size + 1)
+    items = (await db._sess.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor([getattr(items[-1], key.key) for key in keys])
+    total = None if filtered else await get_total(db, model)
+    return {"items": items, "size": size, "next_cursor": next_cursor, "total": total}
@@ -0,0 +1,148 @@
+"""
+Замер индекса фильтров (matching/index.py) на синтетических данных без базы.
+
+Генерирует фильтры и новые машины с распределением, похожим на боевое (марка/модель почти
+всегда заданы, серия и комплектации — у части фильтров, диапазоны цены и пробега — у большинства),
+строит индекс и раскладывает машины по фильтрам. Для выборки машин результат сверяется
+с полным перебором; при расхождении скрипт завершается с кодом 1.
+
+Часть фильтров (--duplicates) повторяет условия уже созданных — как пользователи, заведшие
+одинаковый фильтр; такие фильтры индекс проверяет один раз на группу.
+
+Запуск: python bench_matcher.py [--filters 100000] [--cars 10000] [--check 200] [--duplicates 0.3]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from matching.index import FilterIndex, FilterRule
+
+MANUFACTURES = 40
+MODELS_PER_MANUFACTURE = 25
+SERIES_PER_MODEL = 6
+EQUIPMENT_PER_SERIES = 4
+ENGINE_TYPES = 5
+DRIVE_TYPES = 3
+CAR_COLORS = 12
+
+
+def model_id(manufacture_id: int, index: int) -> int:
+    return manufacture_id * 100 + index
+
+
+def series_id(model: int, index: int) -> int:
+    return model * 10 + index
+
+
+def equipment_id(series: int, index: int) -> int:
+    return series * 10 + index
+
+
+def make_filters(count: int, rng: random.Random, now: datetime, duplicates: float) -> list:
+    filters = []
+    for filter_id in range(1, count + 1):
+        if filters and rng.random() < duplicates:
+            filters.append(rng.choice(filters)._replace(
+                id=filter_id, user_id=filter_id, create_dttm=now - timedelta(days=rng.randint(1, 365))
+            ))
+            continue
+        manufacture = rng.randint(1, MANUFACTURES) if rng.random() < 0.99 else None
+        model = model_id(manufacture, rng.randint(1, MODELS_PER_MANUFACTURE)) if manufacture and rng.random() < 0.9 else None
+        series = series_id(model, rng.randint(1, SERIES_PER_MODEL)) if model and rng.random() < 0.4 else None
+        equipment = (
+            {equipment_id(series, index) for index in rng.sample(range(1, EQUIPMENT_PER_SERIES + 1), 2)}
+            if series and rng.random() < 0.3 else set()
+        )
+        price_from = rng.randrange(0, 5_000_000, 100_000) if rng.random() < 0.7 else None
+        filter_obj = SimpleNamespace(
+            id=filter_id,
+            user_id=filter_id,
+            create_dttm=now - timedelta(days=rng.randint(1, 365)),
+            manufacture_id=manufacture,
+            model_id=model,
+            series_id=series,
+            engine_type_id=rng.randint(1, ENGINE_TYPES) if rng.random() < 0.2 else None,
+            drive_type_id=rng.randint(1, DRIVE_TYPES) if rng.random() < 0.1 else None,
+            car_color_id=rng.randint(1, CAR_COLORS) if rng.random() < 0.1 else None,
+            mileage_from=None,
+            mileage_defore=rng.randrange(50_000, 300_000, 10_000) if rng.random() < 0.6 else None,
+            price_from=price_from,
+            price_defore=(price_from or 0) + rng.randrange(500_000, 5_000_000, 100_000) if rng.random() < 0.7 else None,
+            date_release_from=datetime(rng.randint(2005, 2020), 1, 1) if rng.random() < 0.3 else None,
+            date_release_defore=None,
+        )
+        filters.append(FilterRule.from_filter(filter_obj, equipment))
+    return filters
+
+
+def make_cars(count: int, rng: random.Random, now: datetime) -> list:
+    cars = []
+    for car_id in range(1, count + 1):
+        manufacture = rng.randint(1, MANUFACTURES)
+        model = model_id(manufacture, rng.randint(1, MODELS_PER_MANUFACTURE))
+        series = series_id(model, rng.randint(1, SERIES_PER_MODEL))
+        cars.append(SimpleNamespace(
+            id=car_id,
+            create_dttm=now - timedelta(seconds=rng.randint(0, 600)),
+            manufacture_id=manufacture,
+            model_id=model,
+            series_id=series,
+            equipment_id=equipment_id(series, rng.randint(1, EQUIPMENT_PER_SERIES)),
+            engine_type_id=rng.randint(1, ENGINE_TYPES),
+            drive_type_id=rng.randint(1, DRIVE_TYPES),
+            car_color_id=rng.randint(1, CAR_COLORS),
+            mileage=rng.randint(0, 300_000),
+            price_rub=rng.randint(300_000, 10_000_000),
+            date_release=datetime(rng.randint(2003, 2024), rng.randint(1, 12), 1),
+        ))
+    return cars
+
+
+def main(filters_count: int, cars_count: int, check: int, seed: int, duplicates: float) -> int:
+    rng = random.Random(seed)
+    now = datetime.now()
+    filters = make_filters(filters_count, rng, now, duplicates)
+    cars = make_cars(cars_count, rng, now)
+
+    index = FilterIndex()
+    started = time.perf_counter()
+    index.build(filters)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    routed = index.route(cars)
+    route_time = time.perf_counter() - started
+    matches = sum(len(matched) for matched in routed.values())
+
+    print(f"Фильтров: {filters_count}, машин: {cars_count}, совпадений: {matches}")
+    print(f"Различных условий: {index.group_count} (x{index.dedup_ratio():.2f})")
+    print(f"Построение индекса: {build_time * 1000:.0f} мс")
+    print(f"Разбор машин: {route_time * 1000:.0f} мс ({route_time / cars_count * 1e6:.1f} мкс на машину)")
+
+    # Полный перебор — то, во что обошлась бы проверка каждого фильтра каждой машиной
+    sample = rng.sample(cars, min(check, cars_count))
+    started = time.perf_counter()
+    expected = {car.id: {rule.id for rule in filters if rule.matches(car)} for car in sample}
+    scan_time = (time.perf_counter() - started) / len(sample) * cars_count if sample else 0
+    print(f"Полный перебор (оценка по {len(sample)} машинам): {scan_time * 1000:.0f} мс")
+
+    mismatched = [car.id for car in sample if {rule.id for rule in index.match(car)} != expected[car.id]]
+    if mismatched:
+        print(f"FAIL: индекс разошёлся с перебором для машин {mismatched[:10]}")
+        return 1
+    print(f"Индекс совпал с перебором на {len(sample)} машинах, ускорение x{scan_time / route_time:.0f}" if route_time else "OK")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер индекса фильтров")
+    parser.add_argument("--filters", type=int, default=100000, help="Число фильтров")
+    parser.add_argument("--cars", type=int, default=10000, help="Число новых машин")
+    parser.add_argument("--check", type=int, default=200, help="Сколько машин сверить с полным перебором")
+    parser.add_argument("--seed", type=int, default=1, help="Зерно генератора")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Доля фильтров, повторяющих условия другого")
+    args = parser.parse_args()
+    sys.exit(main(args.filters, args.cars, args.check, args.seed, args.duplicates))
@@ -0,0 +1,95 @@
+"""
+Замер времени импорта точек входа (python -X importtime).
+
+Каждая точка входа импортируется в отдельном процессе; из отчёта importtime берётся
+суммарное время импорта за вычетом старта пустого интерпретатора и список загруженных модулей.
+Лёгким процессам (бот, API, рассылка, подписки, архивация) запрещено грузить тяжёлые
+зависимости парсера и переводчиков — при нарушении или превышении --max-ms скрипт
+завершается с кодом 1.
+
+Запуск: python bench_startup.py [--max-ms 1500] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Модули, которые нужны только парсеру, массовому переводу и снимку машин (numpy)
+HEAVY_MODULES = ["zendriver", "openai", "twocaptcha", "deep_translator", "bs4", "numpy"]
+
+# Точка входа: должна ли она обходиться без HEAVY_MODULES
+ENTRYPOINTS = {
+    "bot.py": True,
+    "api.py": True,
+    "task_filter.py": True,
+    "task_subscriptions.py": True,
+    "task_archive.py": True,
+    "task_parser.py": False,
+    "task_new_cars.py": False,
+}
+
+
+def import_profile(code: str) -> list:
+    """Запускает код с -X importtime и возвращает [(модуль, self мкс, cumulative мкс, вложенность)]."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "ошибка импорта")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # строка заголовка
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def total_ms(rows: list) -> float:
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+
+def main(max_ms: float = None, top: int = 0) -> int:
+    baseline = total_ms(import_profile("pass"))
+    failed = 0
+    print(f"{'точка входа':<24}{'импорт, мс':>12}  тяжёлые модули")
+    for entrypoint, must_be_light in ENTRYPOINTS.items():
+        # run_name не __main__, чтобы не запускать сам процесс
+        try:
+            rows = import_profile(f"import runpy; runpy.run_path({entrypoint!r}, run_name='bench_startup')")
+        except RuntimeError as e:
+            failed += 1
+            print(f"{entrypoint:<24}{'—':>12}  ОШИБКА: {e}")
+            continue
+        elapsed = total_ms(rows) - baseline
+        modules = {name.split(".")[0] for name, _, _, _ in rows}
+        heavy = [module for module in HEAVY_MODULES if module in modules]
+
+        problems = []
+        if must_be_light and heavy:
+            problems.append("лишние зависимости")
+        if max_ms is not None and elapsed > max_ms:
+            problems.append(f"дольше {max_ms:.0f} мс")
+        failed += bool(problems)
+        status = f"  FAIL: {', '.join(problems)}" if problems else ""
+        print(f"{entrypoint:<24}{elapsed:>12.0f}  {', '.join(heavy) or '—'}{status}")
+
+        if top:
+            for name, self_us, _, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+                print(f"{'':<6}{self_us / 1000:>8.1f} мс  {name}")
+    print("Все точки входа в норме" if not failed else f"Точек входа с проблемами: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени импорта точек входа")
+    parser.add_argument("--max-ms", type=float, default=None, help="Предел времени импорта одной точки входа, мс")
+    parser.add_argument("--top", type=int, default=0, help="Показать N самых медленных модулей каждой точки входа")
+    args = parser.parse_args()
+    sys.exit(main(args.max_ms, args.top))
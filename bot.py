@@ -7,8 +7,6 @@ from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 from database import DBApi
 from tgbot.handlers import commands_router
 # from functions import parse_cars
-from functions.mobile import parse_full_car_info, parse_cars, parse_car_details, parse_accident_summary, init_browser
-from tasks import run_parser_periodically, check_subscriptions
 
 
 async def get_bot_token():
@@ -40,6 +38,7 @@ async def main(run_bot=True, run_parser=False):
 
     # Запуск планировщика
     # if run_scheduler:
+    #     from tasks import run_parser_periodically, check_subscriptions
     #     scheduler = AsyncIOScheduler()
     #     scheduler.add_job(run_parser_periodically, 'interval', hours=48)
     #     scheduler.add_job(check_subscriptions, 'interval', hours=24)
@@ -48,6 +47,8 @@ async def main(run_bot=True, run_parser=False):
 
     # Запуск парсера
     if run_parser:
+        # Браузер и капча нужны только ручному запуску парсера
+        from functions.mobile import parse_full_car_info, parse_cars, parse_car_details, parse_accident_summary, init_browser
         await init_browser()
         print("Запускаю парсинг...")
         res = await parse_cars('kor', max_pages=2)
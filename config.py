@@ -8,4 +8,68 @@ DB_PASSWORD = getenv("DB_PASSWORD")
 DB_HOST = getenv("DB_HOST")
 DB_PORT = getenv("DB_PORT")
 DB_NAME = getenv("DB_NAME")
-deepseek_api_key = getenv("DEEPSEEK_API_KEY")
\ No newline at end of file
+deepseek_api_key = getenv("DEEPSEEK_API_KEY")
+
+# Размер LRU-кэша переводов в памяти процесса
+TRANSLATION_CACHE_SIZE = int(getenv("TRANSLATION_CACHE_SIZE", 10000))
+
+# Пакетный перевод: максимум строк и оценочных токенов в одном запросе к LLM
+TRANSLATION_BATCH_SIZE = int(getenv("TRANSLATION_BATCH_SIZE", 40))
+TRANSLATION_TOKEN_BUDGET = int(getenv("TRANSLATION_TOKEN_BUDGET", 2000))
+
+# Массовый перевод справочников: строк за одну выборку и параллельных запросов к LLM
+TRANSLATION_PAGE_SIZE = int(getenv("TRANSLATION_PAGE_SIZE", 500))
+TRANSLATION_CONCURRENCY = int(getenv("TRANSLATION_CONCURRENCY", 4))
+
+# Дозаполнение переводов: строк за проход, пауза после первой неудачи (с, дальше удваивается) и число попыток
+TRANSLATION_PENDING_LIMIT = int(getenv("TRANSLATION_PENDING_LIMIT", 200))
+TRANSLATION_RETRY_DELAY = int(getenv("TRANSLATION_RETRY_DELAY", 60))
+TRANSLATION_MAX_ATTEMPTS = int(getenv("TRANSLATION_MAX_ATTEMPTS", 10))
+
+# Локальный словарь переводов: минимальная доля хангыля, покрытая словарём, чтобы не звать LLM
+GLOSSARY_MIN_COVERAGE = float(getenv("GLOSSARY_MIN_COVERAGE", 0.8))
+
+# Переводчики: таймаут одного запроса (с), ошибок подряд до отключения и пауза перед повтором (с)
+TRANSLATION_TIMEOUT = float(getenv("TRANSLATION_TIMEOUT", 20))
+TRANSLATION_BREAKER_FAILURES = int(getenv("TRANSLATION_BREAKER_FAILURES", 5))
+TRANSLATION_BREAKER_RESET = float(getenv("TRANSLATION_BREAKER_RESET", 60))
+
+# Пул соединений с БД
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(getenv("DB_POOL_TIMEOUT", 30))  # ожидание свободного соединения, с
+DB_POOL_RECYCLE = int(getenv("DB_POOL_RECYCLE", 1800))  # пересоздание соединения, с
+DB_STATEMENT_CACHE_SIZE = int(getenv("DB_STATEMENT_CACHE_SIZE", 100))  # кэш подготовленных запросов asyncpg
+DB_COMMAND_TIMEOUT = float(getenv("DB_COMMAND_TIMEOUT", 60))  # таймаут одного запроса asyncpg, с
+
+# Реплики только для чтения: "host:port,host:port"; пользователь, пароль и база — как у основной
+DB_REPLICA_HOSTS = getenv("DB_REPLICA_HOSTS", "")
+DB_REPLICA_STICKY_SECONDS = float(getenv("DB_REPLICA_STICKY_SECONDS", 5))  # чтение своих записей с основной базы, с
+DB_REPLICA_RETRY = float(getenv("DB_REPLICA_RETRY", 30))  # сколько не ходить на упавшую реплику, с
+
+# Кэш настроек: как часто сверять версию с базой, когда нет LISTEN/NOTIFY, с
+SETTINGS_CACHE_TTL = float(getenv("SETTINGS_CACHE_TTL", 10))
+
+# Счётчики запросов к БД: сколько раз один и тот же запрос может выполниться за HTTP-запрос
+# или задачу до предупреждения о N+1, и сколько самых долгих запросов запоминать
+DB_QUERY_REPEAT_WARN = int(getenv("DB_QUERY_REPEAT_WARN", 10))
+DB_SLOW_QUERIES_KEPT = int(getenv("DB_SLOW_QUERIES_KEPT", 3))
+
+# Подбор новых машин по индексу фильтров: машин за одну выборку, с какой глубины (мин) начинают
+# водяные знаки существующих фильтров после миграции и перекрытие с прошлым проходом на случай поздних коммитов (с)
+MATCH_BATCH_SIZE = int(getenv("MATCH_BATCH_SIZE", 1000))
+MATCH_LOOKBACK_MINUTES = int(getenv("MATCH_LOOKBACK_MINUTES", 60))
+MATCH_OVERLAP_SECONDS = int(getenv("MATCH_OVERLAP_SECONDS", 120))
+# Сколько ждать остальные уведомления new_cars пачки перед подбором, с
+MATCH_NOTIFY_DEBOUNCE = float(getenv("MATCH_NOTIFY_DEBOUNCE", 1))
+
+# Колоночный снимок каталога для подбора по фильтру (matching/snapshot.py): файл, как часто
+# пересобирать его целиком (ч) и сколько машин новее снимка дочитывать из базы, прежде чем перейти на SQL
+CAR_SNAPSHOT_PATH = getenv("CAR_SNAPSHOT_PATH", "car_snapshot.bin")
+CAR_SNAPSHOT_FULL_REBUILD_HOURS = float(getenv("CAR_SNAPSHOT_FULL_REBUILD_HOURS", 24))
+CAR_SNAPSHOT_DELTA_LIMIT = int(getenv("CAR_SNAPSHOT_DELTA_LIMIT", 1000))
+
+# Архивация старых объявлений из car в car_archive
+ARCHIVE_AFTER_DAYS = int(getenv("ARCHIVE_AFTER_DAYS", 90))  # объявление, не встречавшееся парсеру дольше этого, уходит в архив
+ARCHIVE_BATCH_SIZE = int(getenv("ARCHIVE_BATCH_SIZE", 1000))  # машин в одной транзакции
+ARCHIVE_BATCH_PAUSE = float(getenv("ARCHIVE_BATCH_PAUSE", 0.5))  # пауза между пачками, с
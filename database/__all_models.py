@@ -1 +1 @@
-from . import users, car_color, car, contacts, engine_type, equipment, filters, manufacture, models, payhistory, series, settings, subscription, tariffs, viewed_cars, drive_type
\ No newline at end of file
+from . import users, car_color, car, contacts, engine_type, equipment, filters, manufacture, models, payhistory, series, settings, subscription, tariffs, viewed_cars, drive_type, crawl_run, translation_cache, translation_progress, schema_version, car_archive, version_counter, translation_queue, viewed_cars_archive
\ No newline at end of file
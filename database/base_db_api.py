@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import asynccontextmanager, nullcontext
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,8 +9,10 @@ from database.db_session import create_session
 class BaseDBApi:
     _sess: AsyncSession
 
-    def __init__(self):
-        self._sess = create_session()
+    def __init__(self, read_only: bool = False):
+        # read_only: SELECT-запросы можно отправлять на реплику (см. database/routing.py)
+        self._sess = create_session(read_only)
+        self._in_unit_of_work = False
 
     async def __aenter__(self):
         return self
@@ -20,3 +23,45 @@ class BaseDBApi:
     async def close(self):
         if self._sess:
             await self._sess.close()
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """
+        Объединяет вызовы методов DBApi в одну транзакцию.
+
+        Внутри блока методы только отправляют изменения в базу (flush), а коммит
+        выполняется один раз при выходе; при исключении откатывается всё.
+
+            async with DBApi() as db:
+                async with db.unit_of_work():
+                    await db.create_car(...)
+                    await db.create_car(...)
+        """
+        if self._in_unit_of_work:
+            yield self
+            return
+        self._in_unit_of_work = True
+        try:
+            yield self
+            await self._sess.commit()
+        except BaseException:
+            await self._sess.rollback()
+            raise
+        finally:
+            self._in_unit_of_work = False
+
+    async def _commit(self):
+        """Коммитит изменения, а внутри unit_of_work только отправляет их в базу."""
+        if self._in_unit_of_work:
+            await self._sess.flush()
+        else:
+            await self._sess.commit()
+
+    async def _rollback(self):
+        """Откатывает транзакцию; внутри unit_of_work откат делает _savepoint."""
+        if not self._in_unit_of_work:
+            await self._sess.rollback()
+
+    def _savepoint(self):
+        """SAVEPOINT внутри unit_of_work, чтобы ошибка одной записи не откатывала всю транзакцию."""
+        return self._sess.begin_nested() if self._in_unit_of_work else nullcontext()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Integer, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, BigInteger, Integer, Text, DateTime, ForeignKey, Float, Index
 from datetime import datetime
 
 from database.base import SqlAlchemyBase
@@ -32,6 +32,25 @@ class Car(SqlAlchemyBase):
     url = Column(Text, default=None)
     create_dttm = Column(DateTime, default=datetime.now)
     update_dttm = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Когда объявление последний раз встретилось парсеру в выдаче — по нему машины уходят в архив
+    last_seen_dttm = Column(DateTime, default=datetime.now)
+    __table_args__ = (
+        # Подбор по фильтрам: равенство по марке/модели/серии, затем диапазон цены
+        Index("ix_car_manufacture_model_series_price", "manufacture_id", "model_id", "series_id", "price_rub"),
+        Index("ix_car_engine_type_price", "engine_type_id", "price_rub"),
+        # Новые машины после создания фильтра
+        Index("ix_car_manufacture_create_dttm", "manufacture_id", "create_dttm"),
+        # id вторым ключом — для листания фильтра в порядке (create_dttm, id)
+        Index("ix_car_create_dttm_id", "create_dttm", "id"),
+        # Фильтры без марки: диапазоны комбинируются через bitmap
+        Index("ix_car_price_rub", "price_rub"),
+        Index("ix_car_mileage", "mileage"),
+        Index("ix_car_date_release", "date_release"),
+        # Машины, изменённые после сборки снимка каталога (matching/snapshot.py)
+        Index("ix_car_update_dttm", "update_dttm"),
+        # Отбор давно не встречавшихся в выдаче машин для архивации
+        Index("ix_car_last_seen_dttm", "last_seen_dttm"),
+    )
 
     def __repr__(self):
         return (
@@ -61,6 +80,7 @@ class Car(SqlAlchemyBase):
             f"death={self.death}, "
             f"url={self.url}, "
             f"create_dttm={self.create_dttm}, "
-            f"update_dttm={self.update_dttm}"
+            f"update_dttm={self.update_dttm}, "
+            f"last_seen_dttm={self.last_seen_dttm}"
             f")>"
         )
\ No newline at end of file
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, BigInteger, Integer, Text, DateTime, Float, Index
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class CarArchive(SqlAlchemyBase):
+    """Архив объявлений, давно не встречавшихся парсеру в выдаче. Колонки повторяют Car."""
+    __tablename__ = "car_archive"
+    id = Column(BigInteger, primary_key=True)
+    manufacture_id = Column(BigInteger)
+    model_id = Column(BigInteger)
+    series_id = Column(BigInteger)
+    equipment_id = Column(BigInteger)
+    engine_type_id = Column(BigInteger)
+    drive_type_id = Column(BigInteger)
+    car_color_id = Column(BigInteger)
+    mileage = Column(Integer, default=None)
+    price_won = Column(Integer, default=None)
+    price_rub = Column(Integer, default=None)
+    date_release = Column(DateTime, default=None)
+    publication_dttm = Column(DateTime, default=None)
+    check_dttm = Column(DateTime, default=None)
+    change_ownership = Column(Integer, default=None)
+    all_traffic_accident = Column(Integer, default=None)
+    traffic_accident_owner = Column(Integer, default=None)
+    traffic_accident_other = Column(Integer, default=None)
+    repair_cost_owner = Column(Float, default=None)
+    repair_cost_other = Column(Float, default=None)
+    theft = Column(Integer, default=None)
+    flood = Column(Integer, default=None)
+    death = Column(Integer, default=None)
+    url = Column(Text, default=None)
+    create_dttm = Column(DateTime)
+    update_dttm = Column(DateTime)
+    last_seen_dttm = Column(DateTime)
+    archive_dttm = Column(DateTime, default=datetime.now)
+    __table_args__ = (
+        Index("ix_car_archive_archive_dttm", "archive_dttm", "id"),
+        Index("ix_car_archive_series_id", "series_id"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"id={self.id}, "
+            f"manufacture_id={self.manufacture_id}, "
+            f"model_id={self.model_id}, "
+            f"series_id={self.series_id}, "
+            f"price_rub={self.price_rub}, "
+            f"create_dttm={self.create_dttm}, "
+            f"update_dttm={self.update_dttm}, "
+            f"last_seen_dttm={self.last_seen_dttm}, "
+            f"archive_dttm={self.archive_dttm}"
+            f")>"
+        )
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, DateTime, String, JSON
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class CrawlRun(SqlAlchemyBase):
+    __tablename__ = "crawl_run"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source = Column(String(255), default=None)  # какой парсер запускался (full, mobile)
+    start_dttm = Column(DateTime, default=datetime.now)
+    end_dttm = Column(DateTime, default=None)
+    pages_fetched = Column(Integer, default=0)
+    listings_seen = Column(Integer, default=0)
+    new_count = Column(Integer, default=0)
+    updated_count = Column(Integer, default=0)
+    skipped_count = Column(Integer, default=0)
+    failures = Column(JSON, default=None)  # {этап: количество ошибок}
+    bytes_transferred = Column(BigInteger, default=0)
+    # Суммарное время по этапам, в секундах
+    fetch_time = Column(Float, default=0)
+    translate_time = Column(Float, default=0)
+    resolve_time = Column(Float, default=0)
+    db_write_time = Column(Float, default=0)
+    # Обращения к кэшу переводов: попадания и реальные запросы к API
+    translation_cache_hits = Column(Integer, default=0)
+    translation_api_calls = Column(Integer, default=0)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"id={self.id}, "
+            f"source={self.source}, "
+            f"start_dttm={self.start_dttm}, "
+            f"end_dttm={self.end_dttm}, "
+            f"pages_fetched={self.pages_fetched}, "
+            f"listings_seen={self.listings_seen}, "
+            f"new_count={self.new_count}, "
+            f"updated_count={self.updated_count}, "
+            f"skipped_count={self.skipped_count}, "
+            f"failures={self.failures}, "
+            f"bytes_transferred={self.bytes_transferred}, "
+            f"fetch_time={self.fetch_time}, "
+            f"translate_time={self.translate_time}, "
+            f"resolve_time={self.resolve_time}, "
+            f"db_write_time={self.db_write_time}, "
+            f"translation_cache_hits={self.translation_cache_hits}, "
+            f"translation_api_calls={self.translation_api_calls}"
+            f")>"
+        )
@@ -1,12 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, and_, update, delete, insert, null, literal, tuple_, exists, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from asyncpg.exceptions import UniqueViolationError
-from typing import Optional, List, Tuple
+from typing import Dict, NamedTuple, Optional, List, Tuple
 
 from database.base_db_api import BaseDBApi
 from database.car import Car
+from database.car_archive import CarArchive
 from database.car_color import CarColor
 from database.manufacture import Manufacture
 from database.models import Models
@@ -22,6 +24,158 @@ from database.payhistory import PayHistory
 from database.contacts import Contacts
 from database.settings import Settings
 from database.viewed_cars import ViewedCars
+from database.viewed_cars_archive import ViewedCarsArchive
+from database.crawl_run import CrawlRun
+from database.translation_cache import TranslationCache
+from database.translation_progress import TranslationProgress
+from database.translation_queue import TranslationQueue
+from database.schema_version import SchemaVersion
+from database.version_counter import VersionCounter
+from database.settings_cache import settings_cache, SETTINGS_VERSION_KEY, SETTINGS_CHANNEL
+from database.notify import notify
+
+# Связи справочников: колонка родителя, колонка в Car и в Filters, дочерний справочник
+DIMENSION_PARENT_COLUMNS = {
+    Models: "manufacture_id",
+    Series: "models_id",
+    Equipment: "series_id",
+}
+DIMENSION_CAR_COLUMNS = {
+    Manufacture: "manufacture_id",
+    Models: "model_id",
+    Series: "series_id",
+    Equipment: "equipment_id",
+    EngineType: "engine_type_id",
+    DriveType: "drive_type_id",
+    CarColor: "car_color_id",
+}
+DIMENSION_FILTER_COLUMNS = {
+    Manufacture: "manufacture_id",
+    Models: "model_id",
+    Series: "series_id",
+    EngineType: "engine_type_id",
+    DriveType: "drive_type_id",
+    CarColor: "car_color_id",
+}
+DIMENSION_CHILDREN = {
+    Manufacture: Models,
+    Models: Series,
+    Series: Equipment,
+}
+# Ключ настройки с версией справочников: растёт при каждом изменении, процессы по ней сбрасывают свои кэши
+DIMENSION_VERSION_KEY = "dimension_version"
+# Версия фильтров и канал NOTIFY с id изменённого фильтра — для индекса фильтров (matching/index.py)
+FILTER_VERSION_KEY = "filter_version"
+FILTERS_CHANNEL = "filters_changed"
+# Канал NOTIFY с id добавленной или изменённой машины — по нему task_filter.py подбирает её сразу после коммита
+NEW_CARS_CHANNEL = "new_cars"
+
+def car_filter_conditions(filter_obj: Filters, equipment_ids: List[int]) -> list:
+    """Условия отбора машин по фильтру; незаданные поля фильтра не ограничивают выборку."""
+    return [
+        (Car.manufacture_id == filter_obj.manufacture_id) if filter_obj.manufacture_id else True,
+        (Car.model_id == filter_obj.model_id) if filter_obj.model_id else True,
+        (Car.series_id == filter_obj.series_id) if filter_obj.series_id else True,
+        (Car.equipment_id.in_(equipment_ids)) if equipment_ids else True,  # Поддержка нескольких комплектаций
+        (Car.engine_type_id == filter_obj.engine_type_id) if filter_obj.engine_type_id else True,
+        (Car.drive_type_id == filter_obj.drive_type_id) if filter_obj.drive_type_id else True,
+        (Car.car_color_id == filter_obj.car_color_id) if filter_obj.car_color_id else True,
+        (Car.mileage >= filter_obj.mileage_from) if filter_obj.mileage_from else True,
+        (Car.mileage <= filter_obj.mileage_defore) if filter_obj.mileage_defore else True,
+        (Car.price_rub >= filter_obj.price_from) if filter_obj.price_from else True,
+        (Car.price_rub <= filter_obj.price_defore) if filter_obj.price_defore else True,
+        (Car.date_release >= filter_obj.date_release_from) if filter_obj.date_release_from else True,
+        (Car.date_release <= filter_obj.date_release_defore) if filter_obj.date_release_defore else True,
+    ]
+
+
+class CarCard(NamedTuple):
+    """Машина с готовыми подписями справочников для сообщения."""
+    car: Car
+    manufacture: Optional[str]
+    model: Optional[str]
+    series: Optional[str]
+    engine_type: Optional[str]
+
+
+def dimension_label(model):
+    """Подпись записи справочника в SQL: перевод, а пока его нет — оригинальное name."""
+    return func.coalesce(func.nullif(model.translated, ""), model.name)
+
+
+def filter_cursor_condition(filter_obj: Filters):
+    """Машины после курсора фильтра в порядке (create_dttm, id) по убыванию; без курсора — все."""
+    if filter_obj.cursor_dttm is None or filter_obj.cursor_car_id is None:
+        return True
+    return or_(
+        Car.create_dttm < filter_obj.cursor_dttm,
+        and_(Car.create_dttm == filter_obj.cursor_dttm, Car.id < filter_obj.cursor_car_id)
+    )
+
+
+def filter_watermark_condition(filter_obj: Filters):
+    """Машины после водяного знака фильтра в порядке (create_dttm, id) по возрастанию; без знака — все."""
+    if filter_obj.match_dttm is None or filter_obj.match_car_id is None:
+        return True
+    return or_(
+        Car.create_dttm > filter_obj.match_dttm,
+        and_(Car.create_dttm == filter_obj.match_dttm, Car.id > filter_obj.match_car_id)
+    )
+
+
+def not_viewed_condition(filter_id: int):
+    """
+    Анти-join с viewed_cars: машина ещё не показана по фильтру.
+
+    Проверка идёт по уникальному индексу (filter_id, car_id) для каждой машины-кандидата,
+    поэтому стоимость подбора не зависит от того, сколько машин пользователь уже видел.
+    """
+    return ~exists().where(ViewedCars.filter_id == filter_id, ViewedCars.car_id == Car.id)
+
+
+# Запросы подбора по фильтру; их же проверяет database/explain_check.py
+def unviewed_cars_query(filter_obj: Filters, equipment_ids: List[int], limit: int):
+    """Непросмотренные машины под условиями фильтра, в любом порядке."""
+    return select(Car).where(
+        *car_filter_conditions(filter_obj, equipment_ids),
+        not_viewed_condition(filter_obj.id)
+    ).limit(limit)
+
+
+def new_cars_query(filter_obj: Filters, equipment_ids: List[int], limit: int):
+    """Непросмотренные машины после создания фильтра и его водяного знака, от старых к новым."""
+    return select(Car).where(
+        Car.create_dttm > filter_obj.create_dttm,
+        filter_watermark_condition(filter_obj),
+        *car_filter_conditions(filter_obj, equipment_ids),
+        not_viewed_condition(filter_obj.id)
+    ).order_by(Car.create_dttm.asc(), Car.id.asc()).limit(limit)
+
+
+def next_cars_query(filter_obj: Filters, equipment_ids: List[int], limit: int):
+    """Непросмотренные машины после курсора фильтра, от новых к старым."""
+    return select(Car).where(
+        *car_filter_conditions(filter_obj, equipment_ids),
+        filter_cursor_condition(filter_obj),
+        not_viewed_condition(filter_obj.id)
+    ).order_by(Car.create_dttm.desc(), Car.id.desc()).limit(limit)
+
+
+def dimension_key_condition(model, keys):
+    """Условие на записи справочника с ключами (id родителя, name); родитель None — запись без родителя."""
+    parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+    if not parent_column:
+        return model.name.in_([name for _, name in keys])
+    parent = getattr(model, parent_column)
+    # tuple IN не находит NULL, поэтому записи без родителя отбираются отдельно
+    with_parent = [(parent_id, name) for parent_id, name in keys if parent_id is not None]
+    orphan_names = [name for parent_id, name in keys if parent_id is None]
+    conditions = []
+    if with_parent:
+        conditions.append(tuple_(parent, model.name).in_(with_parent))
+    if orphan_names:
+        conditions.append(and_(parent.is_(None), model.name.in_(orphan_names)))
+    return or_(*conditions)
 
 
 class DBApi(BaseDBApi):
@@ -30,8 +184,12 @@ class DBApi(BaseDBApi):
         """Создает новую запись в таблице Car."""
         car = Car(**kwargs)
         try:
-            self._sess.add(car)
-            await self._sess.commit()
+            async with self._savepoint():
+                self._sess.add(car)
+                await self._sess.flush()
+                # Внутри SAVEPOINT: при откате дубликата уведомление тоже отменится
+                await notify(self._sess, NEW_CARS_CHANNEL, str(car.id))
+            await self._commit()
             return car
         except IntegrityError as e:
             # Проверяем, вызвана ли ошибка нарушением уникальности
@@ -39,7 +197,7 @@ class DBApi(BaseDBApi):
                 print("Машина уже существует")
             else:
                 print(f"Ошибка при создании автомобиля: {e}")
-            await self._sess.rollback()  # Откатываем изменения
+            await self._rollback()  # Откатываем изменения
             return None
     
     async def get_all_car_ids(self):
@@ -47,6 +205,110 @@ class DBApi(BaseDBApi):
         result = await self._sess.execute(select(Car.id))  # Предполагается, что модель называется Car
         return [row[0] for row in result.fetchall()]
     
+    async def mark_cars_seen(self, car_ids: List[int]) -> Tuple[set, set]:
+        """
+        Отмечает объявления, встреченные парсером в выдаче.
+
+        Машины из архива, снова появившиеся в выдаче, возвращаются в car с прежним create_dttm
+        вместе с отметками просмотра, так что ни подбор новых машин, ни «Ещё» не пришлют их повторно.
+
+        Returns:
+            (id машин, уже бывших в car; id машин, возвращённых из архива).
+        """
+        if not car_ids:
+            return set(), set()
+        now = datetime.now()
+        result = await self._sess.execute(select(Car.id).where(Car.id.in_(car_ids)))
+        known = set(result.scalars().all())
+        if known:
+            await self._sess.execute(
+                update(Car).where(Car.id.in_(list(known))).values(
+                    last_seen_dttm=now,
+                    update_dttm=Car.update_dttm  # Объявление не менялось
+                )
+            )
+        result = await self._sess.execute(select(CarArchive.id).where(CarArchive.id.in_(car_ids)))
+        restored = [car_id for car_id in result.scalars().all() if car_id not in known]
+        if restored:
+            columns = [column.name for column in Car.__table__.columns if column.name not in ("update_dttm", "last_seen_dttm")]
+            await self._sess.execute(
+                insert(Car).from_select(
+                    columns + ["update_dttm", "last_seen_dttm"],
+                    select(*(CarArchive.__table__.c[name] for name in columns), literal(now), literal(now))
+                    .where(CarArchive.id.in_(restored))
+                )
+            )
+            await self._sess.execute(
+                insert(ViewedCars).from_select(
+                    ["user_id", "filter_id", "car_id"],
+                    select(Filters.user_id, ViewedCarsArchive.filter_id, ViewedCarsArchive.car_id)
+                    .join(Filters, Filters.id == ViewedCarsArchive.filter_id)
+                    .where(ViewedCarsArchive.car_id.in_(restored))
+                )
+            )
+            await self._sess.execute(delete(ViewedCarsArchive).where(ViewedCarsArchive.car_id.in_(restored)))
+            await self._sess.execute(delete(CarArchive).where(CarArchive.id.in_(restored)))
+        await self._commit()
+        return known, set(restored)
+
+    async def get_car_cards(self, car_ids: List[int]) -> List[CarCard]:
+        """
+        Получает машины вместе с подписями марки, модели, серии и типа двигателя одним запросом.
+
+        Returns:
+            Карточки в порядке car_ids; отсутствующие машины пропускаются.
+        """
+        if not car_ids:
+            return []
+        result = await self._sess.execute(
+            select(
+                Car,
+                dimension_label(Manufacture),
+                dimension_label(Models),
+                dimension_label(Series),
+                dimension_label(EngineType),
+            )
+            .outerjoin(Manufacture, Manufacture.id == Car.manufacture_id)
+            .outerjoin(Models, Models.id == Car.model_id)
+            .outerjoin(Series, Series.id == Car.series_id)
+            .outerjoin(EngineType, EngineType.id == Car.engine_type_id)
+            .where(Car.id.in_(car_ids))
+        )
+        cards = {row[0].id: CarCard(*row) for row in result.all()}
+        return [cards[car_id] for car_id in car_ids if car_id in cards]
+
+    async def get_cars_created_after(self, after_dttm: datetime, after_id: int, limit: int) -> List[Car]:
+        """Следующая страница машин, добавленных после позиции (create_dttm, id), по возрастанию."""
+        result = await self._sess.execute(
+            select(Car)
+            .where(or_(Car.create_dttm > after_dttm, and_(Car.create_dttm == after_dttm, Car.id > after_id)))
+            .order_by(Car.create_dttm.asc(), Car.id.asc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def get_cars_by_ids(self, car_ids: List[int]) -> List[Car]:
+        """Получает машины по списку ID в порядке (create_dttm, id)."""
+        if not car_ids:
+            return []
+        result = await self._sess.execute(
+            select(Car).where(Car.id.in_(car_ids)).order_by(Car.create_dttm.asc(), Car.id.asc())
+        )
+        return result.scalars().all()
+
+    async def get_car_rows(self, columns: List[str], after_id: int, limit: int, updated_since: datetime = None) -> list:
+        """
+        Страница строк car из выбранных колонок по ключу id > after_id.
+
+        Args:
+            updated_since: Только машины, добавленные или изменённые после этого времени.
+        """
+        query = select(*(Car.__table__.c[name] for name in columns)).where(Car.id > after_id)
+        if updated_since is not None:
+            query = query.where(Car.update_dttm > updated_since)
+        result = await self._sess.execute(query.order_by(Car.id.asc()).limit(limit))
+        return result.fetchall()
+
     async def get_all_cars_query(self):
         # Возвращаем SQLAlchemy-запрос вместо списка
         return select(Car)
@@ -68,7 +330,8 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(car, key):
                     setattr(car, key, value)
-            await self._sess.commit()
+            await notify(self._sess, NEW_CARS_CHANNEL, str(car_id))
+            await self._commit()
             return car
         print(f"Автомобиль с id={car_id} не найден")
         return None
@@ -78,17 +341,73 @@ class DBApi(BaseDBApi):
         car = await self.get_car_by_id(car_id)
         if car:
             await self._sess.delete(car)
-            await self._sess.commit()
+            await self._commit()
             return True
         print(f"Автомобиль с id={car_id} не найден")
         return False
 
+    # Методы для таблицы CarArchive
+    async def archive_cars(self, seen_before: datetime, limit: int) -> Tuple[int, int]:
+        """
+        Переносит в car_archive одну пачку машин, которых парсер не встречал в выдаче с seen_before.
+
+        Пачка переносится в одной короткой транзакции: копия в архив, перенос отметок просмотра
+        в viewed_cars_archive (машина может вернуться в выдачу) и удаление из car.
+
+        Returns:
+            (перенесено машин, перенесено отметок просмотра).
+        """
+        result = await self._sess.execute(
+            select(Car.id).where(Car.last_seen_dttm < seen_before).order_by(Car.last_seen_dttm).limit(limit)
+        )
+        car_ids = result.scalars().all()
+        if not car_ids:
+            return 0, 0
+
+        columns = [column.name for column in Car.__table__.columns]
+        # Машина могла попасть в архив раньше и вернуться — в архиве остаётся последняя версия
+        await self._sess.execute(delete(CarArchive).where(CarArchive.id.in_(car_ids)))
+        await self._sess.execute(delete(ViewedCarsArchive).where(ViewedCarsArchive.car_id.in_(car_ids)))
+        await self._sess.execute(
+            insert(CarArchive).from_select(
+                columns + ["archive_dttm"],
+                select(*(Car.__table__.c[name] for name in columns), literal(datetime.now())).where(Car.id.in_(car_ids))
+            )
+        )
+        await self._sess.execute(
+            insert(ViewedCarsArchive).from_select(
+                ["filter_id", "car_id"],
+                select(ViewedCars.filter_id, ViewedCars.car_id)
+                .where(ViewedCars.car_id.in_(car_ids), ViewedCars.filter_id.isnot(None))
+            )
+        )
+        viewed = await self._sess.execute(delete(ViewedCars).where(ViewedCars.car_id.in_(car_ids)))
+        await self._sess.execute(delete(Car).where(Car.id.in_(car_ids)))
+        await self._commit()
+        return len(car_ids), viewed.rowcount
+
+    async def get_archived_car_by_id(self, car_id: int) -> Optional[CarArchive]:
+        """Получает машину из архива по ID."""
+        result = await self._sess.execute(select(CarArchive).where(CarArchive.id == car_id))
+        return result.scalars().first()
+
+    async def get_archived_car_ids_since(self, since: datetime) -> List[int]:
+        """ID машин, перенесённых в архив после since."""
+        result = await self._sess.execute(select(CarArchive.id).where(CarArchive.archive_dttm > since))
+        return [row[0] for row in result.fetchall()]
+
+    async def get_all_archived_cars_query(self, series_id: int = None):
+        query = select(CarArchive)
+        if series_id:
+            query = query.where(CarArchive.series_id == series_id)
+        return query
+
     # Методы для таблицы CarColor
     async def create_car_color(self, name: str, translated: str) -> CarColor:
         """Создает новый цвет автомобиля."""
         color = CarColor(name=name, translated=translated)
         self._sess.add(color)
-        await self._sess.commit()
+        await self._commit()
         return color
     
     async def get_car_color_by_id(self, color_id: int) -> Optional[CarColor]:
@@ -126,7 +445,7 @@ class DBApi(BaseDBApi):
         """Создает нового производителя."""
         manufacture = Manufacture(name=name, translated=translated)
         self._sess.add(manufacture)
-        await self._sess.commit()
+        await self._commit()
         return manufacture
     
     async def get_manufacture_by_id(self, manufacture_id: int) -> Optional[Manufacture]:
@@ -166,7 +485,7 @@ class DBApi(BaseDBApi):
         """Создает новую модель автомобиля."""
         model = Models(manufacture_id=manufacture_id, name=name, translated=translated)
         self._sess.add(model)
-        await self._sess.commit()
+        await self._commit()
         return model
     
     async def get_model_by_id(self, model_id: int) -> Optional[Models]:
@@ -205,7 +524,7 @@ class DBApi(BaseDBApi):
         """Создает новую серию модели."""
         series = Series(models_id=models_id, name=name, translated=translated)
         self._sess.add(series)
-        await self._sess.commit()
+        await self._commit()
         return series
     
     async def get_series_by_id(self, series_id: int) -> Optional[Series]:
@@ -267,7 +586,7 @@ class DBApi(BaseDBApi):
         """Создает новую комплектацию."""
         equipment = Equipment(series_id=series_id, name=name, translated=translated)
         self._sess.add(equipment)
-        await self._sess.commit()
+        await self._commit()
         return equipment
     
     async def get_equipment_by_id(self, equipment_id: int) -> Optional[Equipment]:
@@ -306,7 +625,7 @@ class DBApi(BaseDBApi):
         """Создает новый тип двигателя."""
         engine_type = EngineType(name=name, translated=translated)
         self._sess.add(engine_type)
-        await self._sess.commit()
+        await self._commit()
         return engine_type
     
     async def get_engine_type_by_id(self, engine_type_id: int) -> Optional[EngineType]:
@@ -344,7 +663,7 @@ class DBApi(BaseDBApi):
         """Создает новый тип привода."""
         drive_type = DriveType(name=name, translated=translated)
         self._sess.add(drive_type)
-        await self._sess.commit()
+        await self._commit()
         return drive_type
     
     async def get_drive_type_by_id(self, drive_type_id: int) -> Optional[DriveType]:
@@ -385,7 +704,7 @@ class DBApi(BaseDBApi):
             return user
         user = Users(id=id, username=username, first_name=first_name)
         self._sess.add(user)
-        await self._sess.commit()
+        await self._commit()
         return user
 
     async def get_user_by_id(self, user_id: int) -> Users:
@@ -408,7 +727,7 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(user, key):
                     setattr(user, key, value)
-            await self._sess.commit()
+            await self._commit()
             return user
         print(f"Пользователь с id={user_id} не найден")
         return None
@@ -418,7 +737,7 @@ class DBApi(BaseDBApi):
         user = await self.get_user_by_id(user_id)
         if user:
             await self._sess.delete(user)
-            await self._sess.commit()
+            await self._commit()
             return True
         print(f"Пользователь с id={user_id} не найден")
         return False
@@ -428,7 +747,9 @@ class DBApi(BaseDBApi):
         """Создает новый фильтр для пользователя."""
         filter = Filters(user_id=user_id, **kwargs)
         self._sess.add(filter)
-        await self._sess.commit()
+        await self._sess.flush()
+        await self._filters_changed(filter.id)
+        await self._commit()
         return filter
     
     async def get_filter_by_id(self, filter_id: int):
@@ -454,7 +775,8 @@ class DBApi(BaseDBApi):
         filter_obj = await self.get_filter_by_id(filter_id)
         if filter_obj:
             await self._sess.delete(filter_obj)
-            await self._sess.commit()
+            await self._filters_changed(filter_id)
+            await self._commit()
             return True
         return False
     
@@ -473,7 +795,8 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(filter_obj, key):
                     setattr(filter_obj, key, value)
-            await self._sess.commit()
+            await self._filters_changed(filter_id)
+            await self._commit()
             return filter_obj
         print(f"Фильтр с id={filter_id} не найден")
         return None
@@ -484,7 +807,8 @@ class DBApi(BaseDBApi):
             raise ValueError(f"Комплектация с ID {equipment_id} не найдена")
         filter_equipment = FilterEquipment(filter_id=filter_id, equipment_id=equipment_id)
         self._sess.add(filter_equipment)
-        await self._sess.commit()
+        await self._filters_changed(filter_id)
+        await self._commit()
 
     async def remove_equipment_from_filter(self, filter_id: int, equipment_id: int):
         """Удаляет комплектацию из фильтра."""
@@ -496,7 +820,8 @@ class DBApi(BaseDBApi):
         )).scalars().first()
         if filter_equipment:
             await self._sess.delete(filter_equipment)
-            await self._sess.commit()
+            await self._filters_changed(filter_id)
+            await self._commit()
 
     async def get_equipment_ids_by_filter(self, filter_id: int) -> List[int]:
         """Получает все ID комплектаций для фильтра."""
@@ -505,12 +830,29 @@ class DBApi(BaseDBApi):
         )
         return result.scalars().all()
 
+    async def get_all_filter_equipment(self) -> Dict[int, List[int]]:
+        """Комплектации всех фильтров одним запросом: {id фильтра: [id комплектаций]}."""
+        result = await self._sess.execute(select(FilterEquipment.filter_id, FilterEquipment.equipment_id))
+        equipment: Dict[int, List[int]] = {}
+        for filter_id, equipment_id in result.fetchall():
+            equipment.setdefault(filter_id, []).append(equipment_id)
+        return equipment
+
+    async def get_filter_version(self) -> int:
+        """Читает версию фильтров напрямую из базы."""
+        return await self._get_counter(FILTER_VERSION_KEY)
+
+    async def _filters_changed(self, filter_id: int):
+        """Поднимает версию фильтров и оповещает индексы других процессов (доставится после коммита)."""
+        await self._bump_counter(FILTER_VERSION_KEY)
+        await notify(self._sess, FILTERS_CHANNEL, str(filter_id))
+
     # Методы для таблицы Subscription
     async def create_subscription(self, user_id: int, tariff_id: int, subscription_end: datetime) -> Subscription:
         """Создает новую подписку."""
         subscription = Subscription(user_id=user_id, tariff_id=tariff_id, subscription_end=subscription_end)
         self._sess.add(subscription)
-        await self._sess.commit()
+        await self._commit()
         return subscription
 
     async def get_all_subscriptions(self) -> list[Subscription]:
@@ -566,7 +908,7 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(subscription, key):
                     setattr(subscription, key, value)
-            await self._sess.commit()
+            await self._commit()
             return subscription
         print(f"Подписка с id={subscription_id} не найдена")
         return None
@@ -576,7 +918,7 @@ class DBApi(BaseDBApi):
         sub = await self.get_subscription_by_id(sub_id)
         if sub:
             await self._sess.delete(sub)
-            await self._sess.commit()
+            await self._commit()
             return True
         return False
     
@@ -588,7 +930,7 @@ class DBApi(BaseDBApi):
                 sub_obj.tariff_id = tariff_id
             if subscription_end:
                 sub_obj.subscription_end = subscription_end
-            await self._sess.commit()
+            await self._commit()
             return sub_obj
         return None
 
@@ -597,7 +939,7 @@ class DBApi(BaseDBApi):
         """Создает новый тариф."""
         tariff = Tariffs(name=name, description=description, days_count=days_count, price=price, filters_count=filters_count)
         self._sess.add(tariff)
-        await self._sess.commit()
+        await self._commit()
         return tariff
 
     async def get_tariff_by_id(self, tariff_id: int) -> Tariffs:
@@ -620,7 +962,7 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(tariff, key):
                     setattr(tariff, key, value)
-            await self._sess.commit()
+            await self._commit()
             return tariff
         print(f"Тариф с id={tariff_id} не найден")
         return None
@@ -630,7 +972,7 @@ class DBApi(BaseDBApi):
         tariff = await self.get_tariff_by_id(tariff_id)
         if tariff:
             await self._sess.delete(tariff)
-            await self._sess.commit()
+            await self._commit()
             return True
         print(f"Тариф с id={tariff_id} не найден")
         return False
@@ -640,7 +982,7 @@ class DBApi(BaseDBApi):
         """Создает запись в истории платежей."""
         pay_history = PayHistory(user_id=user_id, tariff_id=tariff_id, price=price, successfully=successfully, **kwargs)
         self._sess.add(pay_history)
-        await self._sess.commit()
+        await self._commit()
         return pay_history
 
     async def get_all_pay_histories(self) -> list[PayHistory]:
@@ -681,7 +1023,7 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(pay_history, key):
                     setattr(pay_history, key, value)
-            await self._sess.commit()
+            await self._commit()
             return pay_history
         print(f"Запись в истории платежей с id={pay_history_id} не найдена")
         return None
@@ -693,7 +1035,7 @@ class DBApi(BaseDBApi):
         if pay_obj:
             if successfully is not None:
                 pay_obj.successfully = successfully
-            await self._sess.commit()
+            await self._commit()
             return pay_obj
         return None
 
@@ -702,7 +1044,7 @@ class DBApi(BaseDBApi):
         pay_history = await self.get_pay_history_by_id(pay_history_id)
         if pay_history:
             await self._sess.delete(pay_history)
-            await self._sess.commit()
+            await self._commit()
             return True
         print(f"Запись в истории платежей с id={pay_history_id} не найдена")
         return False
@@ -715,7 +1057,7 @@ class DBApi(BaseDBApi):
                 pay_obj.successfully = successfully
             if invoice_id is not None:
                 pay_obj.invoice_id = invoice_id
-            await self._sess.commit()
+            await self._commit()
             return pay_obj
         return None
 
@@ -724,7 +1066,7 @@ class DBApi(BaseDBApi):
         """Создает новый контакт."""
         contact = Contacts(title=title, url=url, sequence_number=sequence_number)
         self._sess.add(contact)
-        await self._sess.commit()
+        await self._commit()
         return contact
 
     async def get_all_contacts(self) -> list[Contacts]:
@@ -747,7 +1089,7 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(contact, key):
                     setattr(contact, key, value)
-            await self._sess.commit()
+            await self._commit()
             return contact
         print(f"Контакт с id={contact_id} не найден")
         return None
@@ -757,7 +1099,7 @@ class DBApi(BaseDBApi):
         contact = await self.get_contact_by_id(contact_id)
         if contact:
             await self._sess.delete(contact)
-            await self._sess.commit()
+            await self._commit()
             return True
         print(f"Контакт с id={contact_id} не найден")
         return False
@@ -765,7 +1107,8 @@ class DBApi(BaseDBApi):
     # Методы для таблицы Settings
     async def set_setting(self, key: str, value: str, name: str = None, description: str = None) -> Settings:
         """Создает или обновляет настройку по ключу."""
-        setting = await self.get_setting_by_key(key)
+        result = await self._sess.execute(select(Settings).where(Settings.key == key))
+        setting = result.scalars().first()
         if setting:
             setting.value = value
             if name:
@@ -775,13 +1118,14 @@ class DBApi(BaseDBApi):
         else:
             setting = Settings(key=key, value=value, name=name, description=description)
             self._sess.add(setting)
-        await self._sess.commit()
+        await self._settings_changed()
+        await self._commit()
+        settings_cache.invalidate()
         return setting
 
     async def get_setting_by_key(self, key: str) -> Settings:
-        """Получает настройку по ключу."""
-        result = await self._sess.execute(select(Settings).where(Settings.key == key))
-        return result.scalars().first()
+        """Получает настройку по ключу из кэша процесса (см. database/settings_cache.py)."""
+        return await settings_cache.get(key)
 
     async def get_setting_by_id(self, setting_id: int) -> Settings:
         """Получает настройку по ID."""
@@ -803,7 +1147,9 @@ class DBApi(BaseDBApi):
             for key, value in kwargs.items():
                 if hasattr(setting, key):
                     setattr(setting, key, value)
-            await self._sess.commit()
+            await self._settings_changed()
+            await self._commit()
+            settings_cache.invalidate()
             return setting
         print(f"Настройка с id={setting_id} не найдена")
         return None
@@ -813,18 +1159,49 @@ class DBApi(BaseDBApi):
         setting = await self.get_setting_by_id(setting_id)
         if setting:
             await self._sess.delete(setting)
-            await self._sess.commit()
+            await self._settings_changed()
+            await self._commit()
+            settings_cache.invalidate()
             return True
         print(f"Настройка с id={setting_id} не найдена")
         return False
+
+    async def _settings_changed(self):
+        """Поднимает версию настроек и оповещает другие процессы (доставится после коммита)."""
+        version = await self._bump_counter(SETTINGS_VERSION_KEY)
+        await notify(self._sess, SETTINGS_CHANNEL, str(version))
     
     async def create_viewed_car(self, user_id: int, filter_id: int, car_id: int) -> ViewedCars:
         """Создаёт запись о просмотренном автомобиле."""
         viewed_car = ViewedCars(user_id=user_id, filter_id=filter_id, car_id=car_id)
         self._sess.add(viewed_car)
-        await self._sess.commit()
+        await self._commit()
         return viewed_car
 
+    async def create_viewed_cars(self, user_id: int, filter_id: int, car_ids: List[int]) -> int:
+        """
+        Отмечает машины просмотренными одним INSERT за цикл отправки.
+
+        Уже отмеченные машины пропускаются по уникальному индексу (filter_id, car_id).
+
+        Returns:
+            Количество добавленных записей.
+        """
+        rows = [
+            {"user_id": user_id, "filter_id": filter_id, "car_id": car_id, "viewed_dttm": datetime.now()}
+            for car_id in dict.fromkeys(car_ids)
+        ]
+        if not rows:
+            return 0
+        if self._sess.get_bind().dialect.name == "postgresql":
+            query = pg_insert(ViewedCars).on_conflict_do_nothing(index_elements=[ViewedCars.filter_id, ViewedCars.car_id])
+        else:
+            query = insert(ViewedCars).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        conn = await self._sess.connection()
+        result = await conn.execute(query, rows)
+        await self._commit()
+        return max(result.rowcount or 0, 0)
+
     async def get_viewed_cars_by_filter(self, user_id: int, filter_id: int) -> list[int]:
         """Получает список ID просмотренных автомобилей для фильтра."""
         result = await self._sess.execute(
@@ -835,6 +1212,15 @@ class DBApi(BaseDBApi):
         )
         return [row[0] for row in result.fetchall()]
 
+    async def get_viewed_car_ids(self, filter_id: int, car_ids: List[int]) -> set:
+        """Возвращает те из car_ids, что уже показаны по фильтру."""
+        if not car_ids:
+            return set()
+        result = await self._sess.execute(
+            select(ViewedCars.car_id).where(ViewedCars.filter_id == filter_id, ViewedCars.car_id.in_(car_ids))
+        )
+        return {row[0] for row in result.fetchall()}
+
     async def get_unviewed_cars_by_filter(self, filter_id: int, user_id: int, limit: int = 1) -> List[Car]:
         """Получает непросмотренные автомобили, соответствующие фильтру."""
         filter_obj = await self.get_filter_by_id(filter_id)
@@ -843,59 +1229,605 @@ class DBApi(BaseDBApi):
 
         equipment_ids = await self.get_equipment_ids_by_filter(filter_id)
 
-        query = select(Car).where(
-            (Car.manufacture_id == filter_obj.manufacture_id) if filter_obj.manufacture_id else True,
-            (Car.model_id == filter_obj.model_id) if filter_obj.model_id else True,
-            (Car.series_id == filter_obj.series_id) if filter_obj.series_id else True,
-            (Car.equipment_id.in_(equipment_ids)) if equipment_ids else True,  # Поддержка нескольких комплектаций
-            (Car.engine_type_id == filter_obj.engine_type_id) if filter_obj.engine_type_id else True,
-            (Car.drive_type_id == filter_obj.drive_type_id) if filter_obj.drive_type_id else True,
-            (Car.car_color_id == filter_obj.car_color_id) if filter_obj.car_color_id else True,
-            (Car.mileage >= filter_obj.mileage_from) if filter_obj.mileage_from else True,
-            (Car.mileage <= filter_obj.mileage_defore) if filter_obj.mileage_defore else True,
-            (Car.price_rub >= filter_obj.price_from) if filter_obj.price_from else True,
-            (Car.price_rub <= filter_obj.price_defore) if filter_obj.price_defore else True,
-            (Car.date_release >= filter_obj.date_release_from) if filter_obj.date_release_from else True,
-            (Car.date_release <= filter_obj.date_release_defore) if filter_obj.date_release_defore else True,
-        )
-
-        viewed_cars = await self.get_viewed_cars_by_filter(user_id, filter_id)
-        if viewed_cars:
-            query = query.where(Car.id.notin_(viewed_cars))
-
-        query = query.limit(limit)
-        result = await self._sess.execute(query)
+        result = await self._sess.execute(unviewed_cars_query(filter_obj, equipment_ids, limit))
         return result.scalars().all()
 
     async def get_new_cars_by_filter(self, filter_id: int, user_id: int, limit: int = 1) -> List[Car]:
-        """Получает новые автомобили, добавленные после создания фильтра."""
+        """
+        Получает новые автомобили, добавленные после создания фильтра и после его водяного знака.
+
+        Машины идут от старых к новым, так что после отправки знак можно сдвинуть на последнюю из них.
+        """
+        filter_obj = await self.get_filter_by_id(filter_id)
+        if not filter_obj:
+            return []
+
+        equipment_ids = await self.get_equipment_ids_by_filter(filter_id)
+
+        result = await self._sess.execute(new_cars_query(filter_obj, equipment_ids, limit))
+        return result.scalars().all()
+
+    async def get_next_cars_by_filter(self, filter_id: int, user_id: int, limit: int = 1) -> List[Car]:
+        """
+        Следующая страница машин фильтра для кнопки «Ещё».
+
+        Машины идут от новых к старым по (create_dttm, id), страница начинается сразу
+        после курсора фильтра, так что каждое нажатие читает индекс с места, где остановилось прошлое.
+        """
         filter_obj = await self.get_filter_by_id(filter_id)
         if not filter_obj:
             return []
 
         equipment_ids = await self.get_equipment_ids_by_filter(filter_id)
 
-        query = select(Car).where(
-            Car.create_dttm > filter_obj.create_dttm,
-            (Car.manufacture_id == filter_obj.manufacture_id) if filter_obj.manufacture_id else True,
-            (Car.model_id == filter_obj.model_id) if filter_obj.model_id else True,
-            (Car.series_id == filter_obj.series_id) if filter_obj.series_id else True,
-            (Car.equipment_id.in_(equipment_ids)) if equipment_ids else True,  # Поддержка нескольких комплектаций
-            (Car.engine_type_id == filter_obj.engine_type_id) if filter_obj.engine_type_id else True,
-            (Car.drive_type_id == filter_obj.drive_type_id) if filter_obj.drive_type_id else True,
-            (Car.car_color_id == filter_obj.car_color_id) if filter_obj.car_color_id else True,
-            (Car.mileage >= filter_obj.mileage_from) if filter_obj.mileage_from else True,
-            (Car.mileage <= filter_obj.mileage_defore) if filter_obj.mileage_defore else True,
-            (Car.price_rub >= filter_obj.price_from) if filter_obj.price_from else True,
-            (Car.price_rub <= filter_obj.price_defore) if filter_obj.price_defore else True,
-            (Car.date_release >= filter_obj.date_release_from) if filter_obj.date_release_from else True,
-            (Car.date_release <= filter_obj.date_release_defore) if filter_obj.date_release_defore else True,
-        )
-
-        viewed_cars = await self.get_viewed_cars_by_filter(user_id, filter_id)
-        if viewed_cars:
-            query = query.where(Car.id.notin_(viewed_cars))
-
-        query = query.limit(limit)
+        result = await self._sess.execute(next_cars_query(filter_obj, equipment_ids, limit))
+        return result.scalars().all()
+
+    async def count_cars_by_filter(self, filter_id: int) -> int:
+        """Число машин каталога под условиями фильтра."""
+        filter_obj = await self.get_filter_by_id(filter_id)
+        if not filter_obj:
+            return 0
+        equipment_ids = await self.get_equipment_ids_by_filter(filter_id)
+        result = await self._sess.execute(
+            select(func.count(Car.id)).where(*car_filter_conditions(filter_obj, equipment_ids))
+        )
+        return result.scalar()
+
+    async def set_filter_cursor(self, filter_id: int, car: Optional[Car]) -> None:
+        """Запоминает последнюю отправленную по фильтру машину; None начинает листание заново."""
+        await self._sess.execute(
+            update(Filters).where(Filters.id == filter_id).values(
+                cursor_dttm=car.create_dttm if car else None,
+                cursor_car_id=car.id if car else None,
+                update_dttm=Filters.update_dttm  # Курсор — не правка фильтра пользователем
+            )
+        )
+        await self._commit()
+
+    async def get_match_start(self) -> Optional[datetime]:
+        """Самый ранний водяной знак среди фильтров (у фильтра без знака — время создания)."""
+        result = await self._sess.execute(select(func.min(func.coalesce(Filters.match_dttm, Filters.create_dttm))))
+        return result.scalar()
+
+    async def get_filter_watermarks(self, filter_ids: List[int]) -> Dict[int, Tuple[datetime, int]]:
+        """Водяные знаки фильтров: {id фильтра: (create_dttm, id машины)}; фильтры без знака пропускаются."""
+        if not filter_ids:
+            return {}
+        result = await self._sess.execute(
+            select(Filters.id, Filters.match_dttm, Filters.match_car_id)
+            .where(Filters.id.in_(filter_ids), Filters.match_dttm.isnot(None))
+        )
+        return {filter_id: (match_dttm, match_car_id or 0) for filter_id, match_dttm, match_car_id in result.fetchall()}
+
+    async def set_filter_watermark(self, filter_id: int, match_dttm: datetime, match_car_id: int) -> None:
+        """Сдвигает водяной знак фильтра на машину (create_dttm, id)."""
+        await self._sess.execute(
+            update(Filters).where(Filters.id == filter_id).values(
+                match_dttm=match_dttm,
+                match_car_id=match_car_id,
+                update_dttm=Filters.update_dttm  # Знак — не правка фильтра пользователем
+            )
+        )
+        await self._commit()
+
+    async def advance_filter_watermarks(self, match_dttm: datetime, match_car_id: int, exclude_ids: List[int] = ()) -> int:
+        """
+        Сдвигает вперёд водяные знаки всех фильтров, что отстают от (match_dttm, match_car_id).
+
+        Returns:
+            Число сдвинутых фильтров.
+        """
+        query = update(Filters).where(
+            or_(
+                Filters.match_dttm.is_(None),
+                Filters.match_dttm < match_dttm,
+                and_(Filters.match_dttm == match_dttm, Filters.match_car_id < match_car_id)
+            )
+        )
+        if exclude_ids:
+            query = query.where(Filters.id.notin_(list(exclude_ids)))
+        result = await self._sess.execute(
+            query.values(match_dttm=match_dttm, match_car_id=match_car_id, update_dttm=Filters.update_dttm)
+            .execution_options(synchronize_session=False)
+        )
+        await self._commit()
+        return result.rowcount
+
+    # Методы для таблицы CrawlRun
+    async def create_crawl_run(self, **kwargs) -> CrawlRun:
+        """Создает запись о запуске парсера."""
+        crawl_run = CrawlRun(**kwargs)
+        self._sess.add(crawl_run)
+        await self._commit()
+        return crawl_run
+
+    async def get_crawl_run_by_id(self, run_id: int) -> Optional[CrawlRun]:
+        """Получает запуск парсера по ID."""
+        result = await self._sess.execute(select(CrawlRun).where(CrawlRun.id == run_id))
+        return result.scalars().first()
+
+    async def update_crawl_run(self, run_id: int, **kwargs) -> Optional[CrawlRun]:
+        """Обновляет счётчики запуска парсера по ID."""
+        crawl_run = await self.get_crawl_run_by_id(run_id)
+        if crawl_run:
+            for key, value in kwargs.items():
+                if hasattr(crawl_run, key):
+                    setattr(crawl_run, key, value)
+            await self._commit()
+            return crawl_run
+        print(f"Запуск парсера с id={run_id} не найден")
+        return None
+
+    async def get_all_crawl_runs_query(self, source: str = None):
+        query = select(CrawlRun).order_by(CrawlRun.id.desc())
+        if source:
+            query = query.where(CrawlRun.source == source)
+        return query
+
+    async def get_finished_crawl_runs(self, since: datetime, source: str = None) -> List[CrawlRun]:
+        """Получает завершённые запуски парсера, начатые после since, в порядке запуска."""
+        query = select(CrawlRun).where(
+            CrawlRun.start_dttm >= since,
+            CrawlRun.end_dttm.is_not(None)
+        ).order_by(CrawlRun.start_dttm)
+        if source:
+            query = query.where(CrawlRun.source == source)
         result = await self._sess.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+
+    # Методы для таблицы TranslationCache
+    async def get_translation(self, source: str, context: str) -> Optional[TranslationCache]:
+        """Получает сохранённый перевод по исходному тексту и контексту."""
+        result = await self._sess.execute(
+            select(TranslationCache).where(
+                TranslationCache.source == source,
+                TranslationCache.context == context
+            )
+        )
+        return result.scalars().first()
+
+    async def create_translation(self, source: str, context: str, translated: str) -> Optional[TranslationCache]:
+        """Сохраняет перевод. Если его уже записал другой процесс, возвращает None."""
+        translation = TranslationCache(source=source, context=context, translated=translated)
+        try:
+            async with self._savepoint():
+                self._sess.add(translation)
+            await self._commit()
+            return translation
+        except IntegrityError:
+            await self._rollback()
+            return None
+
+    async def set_translation(self, source: str, context: str, translated: str) -> TranslationCache:
+        """Создает или перезаписывает перевод."""
+        translation = await self.get_translation(source, context)
+        if translation:
+            translation.translated = translated
+            await self._commit()
+            return translation
+        return await self.create_translation(source, context, translated)
+
+    async def set_translations(self, context: str, translations: dict):
+        """Создает или перезаписывает пачку переводов одного контекста одной транзакцией."""
+        if not translations:
+            return
+        result = await self._sess.execute(
+            select(TranslationCache).where(
+                TranslationCache.context == context,
+                TranslationCache.source.in_(list(translations))
+            )
+        )
+        existing = {row.source: row for row in result.scalars().all()}
+        for source, translated in translations.items():
+            if source in existing:
+                existing[source].translated = translated
+            else:
+                self._sess.add(TranslationCache(source=source, context=context, translated=translated))
+        try:
+            await self._commit()
+        except IntegrityError:
+            await self._rollback()
+
+    async def seed_translation_cache(self, tables: List[Tuple[type, str]]) -> int:
+        """
+        Переносит уже известные переводы из справочников в translation_cache.
+
+        Args:
+            tables: Пары (модель справочника, контекст перевода).
+
+        Returns:
+            Количество добавленных записей.
+        """
+        added = 0
+        postgresql = self._sess.get_bind().dialect.name == "postgresql"
+        for model, context in tables:
+            known = await self._sess.execute(
+                select(TranslationCache.source).where(TranslationCache.context == context)
+            )
+            known_sources = set(known.scalars().all())
+            rows = await self._sess.execute(select(model.name, model.translated).distinct())
+            new_rows = []
+            for name, translated in rows.fetchall():
+                source = ' '.join((name or '').split())
+                # translated == name — запись ещё ждёт перевода, такой «перевод» в кэш не нужен
+                if not source or not translated or translated == name or source in known_sources or len(source) > 512:
+                    continue
+                new_rows.append({"source": source, "context": context, "translated": translated})
+                known_sources.add(source)
+            if not new_rows:
+                continue
+            # Строки, которые параллельно записал другой процесс, пропускаются, не откатывая остальные
+            for start in range(0, len(new_rows), 1000):
+                chunk = new_rows[start:start + 1000]
+                if postgresql:
+                    statement = pg_insert(TranslationCache).values(chunk).on_conflict_do_nothing()
+                else:
+                    statement = (
+                        insert(TranslationCache).values(chunk)
+                        .prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+                    )
+                result = await self._sess.execute(statement)
+                added += max(result.rowcount or 0, 0)
+            await self._commit()
+        return added
+
+    # Общие методы для справочников
+    async def get_pending_translations(self, model, limit: int) -> list:
+        """Получает записи справочника из очереди перевода, у которых подошло время следующей попытки."""
+        result = await self._sess.execute(
+            select(model)
+            .join(
+                TranslationQueue,
+                and_(TranslationQueue.table_name == model.__tablename__, TranslationQueue.record_id == model.id)
+            )
+            .where(TranslationQueue.next_attempt_dttm <= datetime.now())
+            .order_by(TranslationQueue.next_attempt_dttm)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def enqueue_translations(self, model, record_ids: List[int], commit: bool = True):
+        """Ставит записи справочника в очередь перевода, пропуская уже стоящие в ней."""
+        if not record_ids:
+            return
+        rows = [{"table_name": model.__tablename__, "record_id": record_id} for record_id in record_ids]
+        if self._sess.get_bind().dialect.name == "postgresql":
+            await self._sess.execute(pg_insert(TranslationQueue).values(rows).on_conflict_do_nothing())
+        else:
+            await self._sess.execute(
+                insert(TranslationQueue).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+                rows
+            )
+        if commit:
+            await self._commit()
+
+    async def dequeue_translations(self, model, record_ids: List[int], commit: bool = True):
+        """Убирает записи справочника из очереди перевода."""
+        if not record_ids:
+            return
+        await self._sess.execute(
+            delete(TranslationQueue).where(
+                TranslationQueue.table_name == model.__tablename__,
+                TranslationQueue.record_id.in_(record_ids)
+            )
+        )
+        if commit:
+            await self._commit()
+
+    async def postpone_translations(self, model, record_ids: List[int], retry_delay: int, max_attempts: int):
+        """
+        Откладывает неудавшиеся переводы: пауза удваивается с каждой попыткой,
+        после max_attempts попыток запись остаётся в очереди без времени следующей.
+        """
+        if not record_ids:
+            return
+        result = await self._sess.execute(
+            select(TranslationQueue).where(
+                TranslationQueue.table_name == model.__tablename__,
+                TranslationQueue.record_id.in_(record_ids)
+            )
+        )
+        now = datetime.now()
+        for item in result.scalars().all():
+            item.attempts += 1
+            if item.attempts >= max_attempts:
+                item.next_attempt_dttm = None
+            else:
+                item.next_attempt_dttm = now + timedelta(seconds=retry_delay * 2 ** (item.attempts - 1))
+        await self._commit()
+
+    async def set_dimension_translation(self, model, record_id: int, translated: str) -> Optional[int]:
+        """
+        Записывает перевод в справочник и, если у того же родителя уже есть запись
+        с таким переводом, сливает с ней текущую.
+
+        Returns:
+            ID записи, которая осталась после слияния, или None, если запись не найдена.
+        """
+        record = (await self._sess.execute(select(model).where(model.id == record_id))).scalars().first()
+        if not record:
+            return None
+
+        query = select(model).where(model.translated == translated, model.id != record.id)
+        parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+        if parent_column:
+            query = query.where(getattr(model, parent_column) == getattr(record, parent_column))
+        twin = (await self._sess.execute(query.order_by(model.id))).scalars().first()
+
+        if twin:
+            await self.merge_dimension(model, record.id, twin.id)
+            return twin.id
+        record.translated = translated
+        await self.dequeue_translations(model, [record.id], commit=False)
+        await self.bump_dimension_version()
+        await self._commit()
+        return record.id
+
+    async def merge_dimension(self, model, source_id: int, target_id: int, commit: bool = True):
+        """
+        Переносит все ссылки с записи справочника source_id на target_id и удаляет source_id.
+        Дочерние записи с совпадающим name сливаются рекурсивно.
+        """
+        car_column = DIMENSION_CAR_COLUMNS[model]
+        for car_model in (Car, CarArchive):
+            await self._sess.execute(
+                update(car_model).where(getattr(car_model, car_column) == source_id).values({car_column: target_id})
+            )
+        filter_column = DIMENSION_FILTER_COLUMNS.get(model)
+        if filter_column:
+            await self._sess.execute(
+                update(Filters).where(getattr(Filters, filter_column) == source_id).values({filter_column: target_id})
+            )
+        if model is Equipment:
+            # Фильтры, где уже есть target_id, теряют только дубликат
+            result = await self._sess.execute(
+                select(FilterEquipment.filter_id).where(FilterEquipment.equipment_id == target_id)
+            )
+            filter_ids = result.scalars().all()
+            if filter_ids:
+                await self._sess.execute(
+                    delete(FilterEquipment).where(
+                        FilterEquipment.equipment_id == source_id,
+                        FilterEquipment.filter_id.in_(filter_ids)
+                    )
+                )
+            await self._sess.execute(
+                update(FilterEquipment).where(FilterEquipment.equipment_id == source_id).values(equipment_id=target_id)
+            )
+
+        child_model = DIMENSION_CHILDREN.get(model)
+        if child_model:
+            child_parent = getattr(child_model, DIMENSION_PARENT_COLUMNS[child_model])
+            result = await self._sess.execute(select(child_model).where(child_parent == source_id))
+            for child in result.scalars().all():
+                twin = (await self._sess.execute(
+                    select(child_model).where(child_parent == target_id, child_model.name == child.name)
+                )).scalars().first()
+                if twin:
+                    await self.merge_dimension(child_model, child.id, twin.id, commit=False)
+                else:
+                    setattr(child, DIMENSION_PARENT_COLUMNS[child_model], target_id)
+            await self._sess.flush()
+
+        await self._sess.execute(delete(model).where(model.id == source_id))
+        await self.dequeue_translations(model, [source_id], commit=False)
+        if commit:
+            await self.bump_dimension_version()
+            await self._commit()
+
+    async def get_dimension_rows(self, model) -> List[Tuple[int, Optional[int], str, str]]:
+        """Получает все записи справочника в виде (id, id родителя, name, translated)."""
+        parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+        parent = getattr(model, parent_column) if parent_column else null()
+        result = await self._sess.execute(select(model.id, parent, model.name, model.translated))
+        return [(row[0], row[1], row[2], row[3]) for row in result.fetchall()]
+
+    async def upsert_dimensions(self, model, rows: List[dict]) -> Tuple[Dict[Tuple[Optional[int], str], tuple], int]:
+        """
+        Создаёт недостающие записи справочника пачкой и возвращает id всех переданных (родитель, name), без коммита.
+
+        В PostgreSQL это один запрос INSERT ... ON CONFLICT DO NOTHING RETURNING, объединённый
+        с выборкой уже существующих строк. Строки, которые параллельно вставил другой процесс,
+        не видны ни в RETURNING, ни в снимке этого запроса — их добирает повторная выборка.
+
+        NULL в уникальном индексе (родитель, name) не совпадает сам с собой, поэтому записи
+        без родителя вставляются отдельно: в PostgreSQL с конфликтом по частичному индексу
+        name WHERE родитель IS NULL, в остальных СУБД — только те, которых ещё нет.
+
+        Args:
+            rows: Список {"name": ..., "translated": ..., колонка родителя: ...}.
+
+        Returns:
+            ({(id родителя, name): (id, translated)}, сколько записей вставлено).
+        """
+        if not rows:
+            return {}, 0
+        parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+        parent = getattr(model, parent_column) if parent_column else null()
+        keys = {(row.get(parent_column) if parent_column else None, row["name"]) for row in rows}
+        key_filter = dimension_key_condition(model, keys)
+
+        found = {}
+        inserted = 0
+        if self._sess.get_bind().dialect.name == "postgresql":
+            groups = [(rows, [model.name], None)]
+            if parent_column:
+                groups = [
+                    ([row for row in rows if row.get(parent_column) is not None], [parent, model.name], None),
+                    ([row for row in rows if row.get(parent_column) is None], [model.name], parent.is_(None)),
+                ]
+            for group_rows, conflict_columns, conflict_where in groups:
+                if not group_rows:
+                    continue
+                group_keys = {(row.get(parent_column) if parent_column else None, row["name"]) for row in group_rows}
+                inserted_rows = (
+                    pg_insert(model).values(group_rows)
+                    .on_conflict_do_nothing(index_elements=conflict_columns, index_where=conflict_where)
+                    .returning(model.id, *([parent] if parent_column else []), model.name, model.translated)
+                    .cte("inserted_rows")
+                )
+                query = select(
+                    inserted_rows.c.id,
+                    inserted_rows.c[parent_column] if parent_column else null(),
+                    inserted_rows.c.name,
+                    inserted_rows.c.translated,
+                    literal(True),
+                ).union_all(
+                    select(model.id, parent, model.name, model.translated, literal(False))
+                    .where(dimension_key_condition(model, group_keys))
+                )
+                for record_id, parent_id, name, translated, is_new in (await self._sess.execute(query)).fetchall():
+                    found[(parent_id, name)] = (record_id, translated)
+                    inserted += 1 if is_new else 0
+        else:
+            if parent_column:
+                orphan_names = [name for parent_id, name in keys if parent_id is None]
+                if orphan_names:
+                    result = await self._sess.execute(
+                        select(model.name).where(parent.is_(None), model.name.in_(orphan_names))
+                    )
+                    existing = set(result.scalars().all())
+                    rows = [row for row in rows if row.get(parent_column) is not None or row["name"] not in existing]
+            if rows:
+                conn = await self._sess.connection()
+                result = await conn.execute(
+                    insert(model.__table__).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+                    rows
+                )
+                inserted = max(result.rowcount or 0, 0)
+
+        if len(found) < len(keys):
+            result = await self._sess.execute(
+                select(model.id, parent, model.name, model.translated).where(key_filter).order_by(model.id)
+            )
+            for record_id, parent_id, name, translated in result.fetchall():
+                found.setdefault((parent_id, name), (record_id, translated))
+        # Записи, сохранённые без перевода, дозаполнит tasks.translate.translate_pending
+        await self.enqueue_translations(model, [
+            record_id for (_, name), (record_id, translated) in found.items()
+            if translated == name and not name.isascii()
+        ], commit=False)
+        return found, inserted
+
+    async def get_dimension_version(self) -> int:
+        """Читает версию справочников напрямую из базы."""
+        return await self._get_counter(DIMENSION_VERSION_KEY)
+
+    async def bump_dimension_version(self) -> int:
+        """
+        Атомарно увеличивает версию справочников в текущей транзакции (без коммита).
+
+        Returns:
+            Новую версию.
+        """
+        return await self._bump_counter(DIMENSION_VERSION_KEY)
+
+    # Счётчики версий живут в отдельной таблице version_counter, а не в settings: их не видно
+    # в админке настроек, и правка настройки не может сломать их увеличение
+    async def _get_counter(self, key: str) -> int:
+        result = await self._sess.execute(select(VersionCounter.value).where(VersionCounter.key == key))
+        return result.scalars().first() or 0
+
+    async def _bump_counter(self, key: str) -> int:
+        """Атомарно увеличивает счётчик версии без коммита, создавая его при отсутствии."""
+        increment = (
+            update(VersionCounter)
+            .where(VersionCounter.key == key)
+            .values(value=VersionCounter.value + 1)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._sess.execute(increment)
+        if not result.rowcount:
+            try:
+                # Счётчик поднимается посреди чужой транзакции — её нельзя откатывать целиком
+                async with self._sess.begin_nested():
+                    self._sess.add(VersionCounter(key=key, value=1))
+                    await self._sess.flush()
+            except IntegrityError:
+                # Счётчик одновременно создал другой процесс
+                await self._sess.execute(increment)
+        return await self._get_counter(key)
+
+    async def get_dimension_page(self, model, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """Получает следующую страницу (id, name) справочника по ключу id > after_id."""
+        result = await self._sess.execute(
+            select(model.id, model.name).where(model.id > after_id).order_by(model.id).limit(limit)
+        )
+        return [(row[0], row[1]) for row in result.fetchall()]
+
+    async def update_dimension_translations(self, model, translations: List[dict], last_id: int, rows_done: int):
+        """
+        Записывает пачку переводов справочника и контрольную точку прогресса одной транзакцией.
+
+        Args:
+            translations: Список {"id": ..., "translated": ...}.
+            last_id: Последний обработанный id, с которого продолжится перевод после сбоя.
+            rows_done: Сколько строк таблицы обработано с начала прохода.
+        """
+        if translations:
+            await self._sess.execute(update(model), translations)
+            await self.bump_dimension_version()
+        progress = await self.get_translation_progress(model.__tablename__)
+        if not progress:
+            progress = TranslationProgress(table_name=model.__tablename__)
+            self._sess.add(progress)
+        progress.last_id = last_id
+        progress.rows_done = rows_done
+        await self._commit()
+
+    # Методы для таблицы TranslationProgress
+    async def get_translation_progress(self, table_name: str) -> Optional[TranslationProgress]:
+        """Получает прогресс массового перевода таблицы."""
+        result = await self._sess.execute(
+            select(TranslationProgress).where(TranslationProgress.table_name == table_name)
+        )
+        return result.scalars().first()
+
+    async def reset_translation_progress(self, table_name: str) -> TranslationProgress:
+        """Начинает проход по таблице заново."""
+        progress = await self.get_translation_progress(table_name)
+        if not progress:
+            progress = TranslationProgress(table_name=table_name)
+            self._sess.add(progress)
+        progress.last_id = 0
+        progress.rows_done = 0
+        progress.start_dttm = datetime.now()
+        progress.finish_dttm = None
+        await self._commit()
+        return progress
+
+    async def finish_translation_progress(self, table_name: str):
+        """Отмечает проход по таблице завершённым."""
+        progress = await self.get_translation_progress(table_name)
+        if progress:
+            progress.finish_dttm = datetime.now()
+            await self._commit()
+    # Служебные методы
+    async def get_table_row_estimate(self, model) -> int:
+        """
+        Быстрая оценка числа строк таблицы без COUNT(*).
+
+        PostgreSQL берёт её из статистики pg_class, MySQL — из information_schema;
+        для таблицы без статистики и других СУБД выполняется обычный COUNT(*).
+        """
+        table_name = model.__tablename__
+        dialect = self._sess.get_bind().dialect.name
+        estimate = None
+        if dialect == "postgresql":
+            result = await self._sess.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                {"table_name": table_name}
+            )
+            estimate = result.scalar()
+        elif dialect == "mysql":
+            result = await self._sess.execute(
+                text("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :table_name"),
+                {"table_name": table_name}
+            )
+            estimate = result.scalar()
+        # reltuples = -1 у таблицы, по которой ещё не собиралась статистика
+        if estimate is None or estimate < 0:
+            result = await self._sess.execute(select(func.count()).select_from(model))
+            estimate = result.scalar()
+        return int(estimate)
@@ -1,14 +1,20 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from database.base import SqlAlchemyBase
+from database import instrumentation
+from database.pool import InstrumentedPool
+from database.routing import RoutingAsyncSession, router
+from config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_STATEMENT_CACHE_SIZE, DB_COMMAND_TIMEOUT, DB_REPLICA_HOSTS
+)
 
 __factory = None
+__engine = None
 
 
 async def global_init(user, password, host, port, dbname, delete_db=False):
-    global __factory
+    global __factory, __engine
 
     if __factory:
         return
@@ -16,9 +22,16 @@ async def global_init(user, password, host, port, dbname, delete_db=False):
     db_type = "postgresql+asyncpg" if host != "localhost" else "mysql+aiomysql"
     conn_str = f'{db_type}://{user}:{password}@{host}:{port}/{dbname}'
     print(f"Подключение к базе данных по адресу {conn_str}")
+    engine = _create_engine(conn_str)
+    __engine = engine
 
-    engine = create_async_engine(conn_str, pool_pre_ping=True)
-    
+    replicas = []
+    for replica in filter(None, (item.strip() for item in DB_REPLICA_HOSTS.split(","))):
+        replica_host, _, replica_port = replica.partition(":")
+        replica_str = f'{db_type}://{user}:{password}@{replica_host}:{replica_port or port}/{dbname}'
+        print(f"Реплика для чтения: {replica_str}")
+        replicas.append(_create_engine(replica_str))
+    router.configure(engine, replicas)
 
     from . import __all_models
     # Создание всех таблиц
@@ -28,11 +41,46 @@ async def global_init(user, password, host, port, dbname, delete_db=False):
             await conn.run_sync(SqlAlchemyBase.metadata.drop_all)
         await conn.run_sync(SqlAlchemyBase.metadata.create_all)
 
-    __factory = sessionmaker(
-        engine, expire_on_commit=False, class_=AsyncSession
+    # Индексы и колонки для уже существующих таблиц
+    from .migrations import run_migrations
+    await run_migrations(engine)
+
+    # Движок выбирает RoutingSession.get_bind для каждого запроса
+    __factory = async_sessionmaker(
+        expire_on_commit=False, class_=RoutingAsyncSession
+    )
+
+
+def _create_engine(conn_str: str):
+    connect_args = {}
+    if conn_str.startswith("postgresql+asyncpg"):
+        connect_args = {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "command_timeout": DB_COMMAND_TIMEOUT,
+        }
+    engine = create_async_engine(
+        conn_str,
+        pool_pre_ping=True,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args=connect_args,
     )
+    # Счётчики запросов для текущего HTTP-запроса или задачи (database/instrumentation.py)
+    instrumentation.install(engine)
+    return engine
 
 
-def create_session() -> AsyncSession:
+def create_session(read_only: bool = False) -> AsyncSession:
+    """Новая сессия; read_only=True разрешает читать с реплики."""
     global __factory
-    return __factory()
+    session = __factory()
+    session.info["read_only"] = read_only
+    return session
+
+
+def get_engine():
+    """Движок, созданный global_init (None до инициализации)."""
+    return __engine
@@ -0,0 +1,127 @@
+"""
+Слияние дубликатов в справочниках.
+
+Уникальные индексы (родитель, name) не создадутся в таблице с дубликатами, поэтому миграции
+v001 и v009 сначала сливают дубликаты здесь: ссылки из car, car_archive, filters,
+filter_equipment и дочерних справочников переносятся на самую старую запись, лишние
+записи удаляются. Справочники обходятся от родителей к детям — дети слитых родителей
+оказываются у одного родителя и сливаются на своём уровне.
+
+Скрипт повторяет то же вручную: python -m database.dedup
+"""
+import asyncio
+from typing import Dict
+
+from sqlalchemy import case, delete, insert, null, select, update
+
+from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+from database.db_session import global_init, get_engine
+from database.db_api import (
+    DIMENSION_PARENT_COLUMNS, DIMENSION_CAR_COLUMNS, DIMENSION_FILTER_COLUMNS, DIMENSION_CHILDREN,
+    DIMENSION_VERSION_KEY, FILTER_VERSION_KEY
+)
+from database.dimensions import DIMENSION_LEVELS
+from database.car import Car
+from database.car_archive import CarArchive
+from database.equipment import Equipment
+from database.filters import Filters, FilterEquipment
+from database.version_counter import VersionCounter
+
+# Сколько слитых id переписывается одним UPDATE
+CHUNK_SIZE = 1000
+
+
+def _remap(conn, table, column_name: str, mapping: Dict[int, int]):
+    """Заменяет в колонке id дубликатов на id оставшихся записей."""
+    column = table.c[column_name]
+    source_ids = list(mapping)
+    for start in range(0, len(source_ids), CHUNK_SIZE):
+        chunk = {source_id: mapping[source_id] for source_id in source_ids[start:start + CHUNK_SIZE]}
+        conn.execute(update(table).where(column.in_(list(chunk))).values({column_name: case(chunk, value=column)}))
+
+
+def _remap_filter_equipment(conn, mapping: Dict[int, int]):
+    # Фильтр, где есть и дубликат, и оставшаяся запись, теряет только дубликат
+    table = FilterEquipment.__table__
+    ids = list(mapping) + list(set(mapping.values()))
+    pairs = set()
+    for start in range(0, len(ids), CHUNK_SIZE):
+        result = conn.execute(
+            select(table.c.filter_id, table.c.equipment_id).where(table.c.equipment_id.in_(ids[start:start + CHUNK_SIZE]))
+        )
+        pairs.update(tuple(row) for row in result.fetchall())
+    for filter_id, equipment_id in pairs:
+        target_id = mapping.get(equipment_id)
+        if target_id is not None and (filter_id, target_id) in pairs:
+            conn.execute(delete(table).where(table.c.filter_id == filter_id, table.c.equipment_id == equipment_id))
+    _remap(conn, table, "equipment_id", mapping)
+
+
+def merge_duplicates(conn, model) -> int:
+    """Сливает записи справочника с одинаковыми (родитель, name). Возвращает число удалённых записей."""
+    parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+    table = model.__table__
+    parent = table.c[parent_column] if parent_column else null()
+    result = conn.execute(select(table.c.id, parent, table.c.name).order_by(table.c.id))
+    first_ids = {}
+    mapping = {}
+    for record_id, parent_id, name in result.fetchall():
+        target_id = first_ids.setdefault((parent_id, name), record_id)
+        if target_id != record_id:
+            mapping[record_id] = target_id
+    if not mapping:
+        return 0
+
+    car_column = DIMENSION_CAR_COLUMNS[model]
+    _remap(conn, Car.__table__, car_column, mapping)
+    _remap(conn, CarArchive.__table__, car_column, mapping)
+    filter_column = DIMENSION_FILTER_COLUMNS.get(model)
+    if filter_column:
+        _remap(conn, Filters.__table__, filter_column, mapping)
+    if model is Equipment:
+        _remap_filter_equipment(conn, mapping)
+    child_model = DIMENSION_CHILDREN.get(model)
+    if child_model:
+        _remap(conn, child_model.__table__, DIMENSION_PARENT_COLUMNS[child_model], mapping)
+
+    source_ids = list(mapping)
+    for start in range(0, len(source_ids), CHUNK_SIZE):
+        conn.execute(delete(table).where(table.c.id.in_(source_ids[start:start + CHUNK_SIZE])))
+    return len(mapping)
+
+
+def merge_all(conn) -> int:
+    """Сливает дубликаты во всех справочниках и поднимает версию справочников, если что-то слито."""
+    merged = 0
+    # Родители раньше детей: дети слитых родителей сливаются на своём уровне
+    for _, model, _ in DIMENSION_LEVELS:
+        count = merge_duplicates(conn, model)
+        if count:
+            print(f"Таблица {model.__tablename__}: слито дубликатов {count}")
+        merged += count
+    if merged:
+        # Кэши справочников и индексы фильтров других процессов ссылаются на удалённые id
+        for key in (DIMENSION_VERSION_KEY, FILTER_VERSION_KEY):
+            result = conn.execute(
+                update(VersionCounter).where(VersionCounter.key == key).values(value=VersionCounter.value + 1)
+            )
+            if not result.rowcount:
+                conn.execute(insert(VersionCounter).values(key=key, value=1))
+    return merged
+
+
+async def main():
+    await global_init(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME
+    )
+    async with get_engine().begin() as conn:
+        merged = await conn.run_sync(merge_all)
+    print(f"Слито дубликатов: {merged}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
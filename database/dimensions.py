@@ -0,0 +1,146 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from database.db_api import DBApi, DIMENSION_PARENT_COLUMNS, DIMENSION_CAR_COLUMNS
+from database.manufacture import Manufacture
+from database.models import Models
+from database.series import Series
+from database.equipment import Equipment
+from database.engine_type import EngineType
+from database.drive_type import DriveType
+from database.car_color import CarColor
+
+# Порядок разрешения: родитель всегда раньше дочернего справочника.
+# (ключ в строке машины, модель, ключ родителя)
+DIMENSION_LEVELS = [
+    ("manufacture", Manufacture, None),
+    ("model", Models, "manufacture"),
+    ("series", Series, "model"),
+    ("equipment", Equipment, "series"),
+    ("engine_type", EngineType, None),
+    ("drive_type", DriveType, None),
+    ("car_color", CarColor, None),
+]
+
+
+class DimensionResolver:
+    """
+    Кэш справочников в памяти процесса для разрешения названий в id.
+
+    Справочники загружаются целиком в словари {(id родителя, name): id} и
+    {(id родителя, translated): id}, так что поиск записи для машины не ходит в базу.
+    Новые записи создаются одним INSERT ... ON CONFLICT DO NOTHING на справочник для всей страницы машин.
+    Согласованность между процессами держится на версии в version_counter (dimension_version):
+    каждый, кто меняет справочники, увеличивает её, а резолвер перечитывает справочники,
+    когда видит чужую версию.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._by_name: Dict[type, Dict[Tuple[Optional[int], str], int]] = {}
+        self._by_translated: Dict[type, Dict[Tuple[Optional[int], str], int]] = {}
+
+    def _remember(self, model, record_id: int, parent_id: Optional[int], name: str, translated: str):
+        self._by_name[model].setdefault((parent_id, name), record_id)
+        if translated:
+            self._by_translated[model].setdefault((parent_id, translated), record_id)
+
+    async def load(self, db: DBApi):
+        """Загружает все справочники в память."""
+        started = time.perf_counter()
+        version = await db.get_dimension_version()
+        total = 0
+        for _, model, _ in DIMENSION_LEVELS:
+            self._by_name[model] = {}
+            self._by_translated[model] = {}
+            # Старые записи важнее новых — при дубликатах остаётся меньший id
+            for record_id, parent_id, name, translated in sorted(await db.get_dimension_rows(model)):
+                self._remember(model, record_id, parent_id, name, translated)
+            total += len(self._by_name[model])
+        self.version = version
+        print(f"Справочники загружены в кэш: {total} записей за {time.perf_counter() - started:.2f} с (версия {version})")
+
+    async def refresh(self, db: DBApi):
+        """Перечитывает справочники, если их изменил другой процесс."""
+        if self.version is None or await db.get_dimension_version() != self.version:
+            await self.load(db)
+
+    def lookup(self, model, parent_id: Optional[int], name: str, translated: str = None) -> Optional[int]:
+        """Ищет id записи по name, а затем по переводу."""
+        record_id = self._by_name[model].get((parent_id, name))
+        if record_id is None and translated:
+            record_id = self._by_translated[model].get((parent_id, translated))
+        return record_id
+
+    async def resolve(self, db: DBApi, rows: List[Dict[str, Tuple[str, str]]]) -> List[Dict[str, Optional[int]]]:
+        """
+        Разрешает справочники для страницы машин.
+
+        Args:
+            rows: Для каждой машины {ключ справочника: (name, translated)}; отсутствующие значения — None.
+
+        Returns:
+            Для каждой машины {колонка Car: id}, например {"manufacture_id": 1, ...}.
+        """
+        await self.refresh(db)
+        try:
+            ids = await self._resolve(db, rows)
+        except Exception:
+            # Созданные записи могли откатиться вместе с транзакцией — перечитаем справочники
+            self.version = None
+            raise
+        return [
+            {DIMENSION_CAR_COLUMNS[model]: row_ids[key] for key, model, _ in DIMENSION_LEVELS}
+            for row_ids in ids
+        ]
+
+    async def _resolve(self, db: DBApi, rows: List[Dict[str, Tuple[str, str]]]) -> List[Dict[str, Optional[int]]]:
+        ids = [{} for _ in rows]
+        created = 0
+        upserted = False
+        for key, model, parent_key in DIMENSION_LEVELS:
+            parent_column = DIMENSION_PARENT_COLUMNS.get(model)
+            missing = {}
+            for row, row_ids in zip(rows, ids):
+                value = row.get(key)
+                parent_id = row_ids.get(parent_key) if parent_key else None
+                if not value or (parent_key and parent_id is None):
+                    row_ids[key] = None
+                    continue
+                name, translated = value
+                record_id = self.lookup(model, parent_id, name, translated)
+                if record_id is None:
+                    missing.setdefault((parent_id, name), translated or name)
+                row_ids[key] = record_id
+
+            if missing:
+                new_rows = []
+                for (parent_id, name), translated in missing.items():
+                    new_row = {"name": name, "translated": translated}
+                    if parent_column:
+                        new_row[parent_column] = parent_id
+                    new_rows.append(new_row)
+                found, inserted = await db.upsert_dimensions(model, new_rows)
+                upserted = True
+                for (parent_id, name), (record_id, translated) in found.items():
+                    self._remember(model, record_id, parent_id, name, translated)
+                created += inserted
+                for row, row_ids in zip(rows, ids):
+                    if row_ids[key] is None and row.get(key):
+                        parent_id = row_ids.get(parent_key) if parent_key else None
+                        if not parent_key or parent_id is not None:
+                            row_ids[key] = self.lookup(model, parent_id, row[key][0], row[key][1])
+
+        if not upserted:
+            return ids
+        version = await db.bump_dimension_version() if created else None
+        # Коммит нужен и без новых записей: upsert_dimensions ставит записи без перевода в очередь
+        await db._commit()
+        if created:
+            # Если версию одновременно поднял кто-то ещё, при следующем обращении справочники перечитаются
+            self.version = version if version == self.version + 1 else None
+        return ids
+
+
+# Один резолвер на процесс
+resolver = DimensionResolver()
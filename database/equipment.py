@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Text, ForeignKey
+from sqlalchemy import Column, BigInteger, Text, ForeignKey, Index, text
 
 from database.base import SqlAlchemyBase
 
@@ -9,6 +9,11 @@ class Equipment(SqlAlchemyBase):
     series_id = Column(BigInteger, ForeignKey("series.id"))
     name = Column(Text, nullable=False)
     translated = Column(Text, nullable=False)
+    __table_args__ = (
+        Index("uq_equipment_series_id_name", "series_id", "name", unique=True, mysql_length={"name": 255}),
+        Index("uq_equipment_name_no_parent", "name", unique=True, postgresql_where=text("series_id IS NULL")).ddl_if(dialect="postgresql"),
+        Index("ix_equipment_series_id_translated", "series_id", "translated", mysql_length={"translated": 255}),
+    )
 
     def __str__(self):
         return self.name
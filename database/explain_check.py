@@ -0,0 +1,177 @@
+"""
+Проверка планов запросов подбора машин по фильтрам (только PostgreSQL).
+
+Внутри транзакции, которая в конце откатывается, скрипт заполняет справочники и
+таблицу car синтетическими данными, выполняет ANALYZE и смотрит EXPLAIN запросов
+get_new_cars_by_filter, get_unviewed_cars_by_filter и get_next_cars_by_filter для типичных фильтров.
+Если хоть один план читает car последовательным сканированием, скрипт завершается с кодом 1.
+
+Запуск: python -m database.explain_check [--cars 50000]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+from database import DBApi
+from database.db_session import global_init
+from database.db_api import new_cars_query, next_cars_query, unviewed_cars_query
+from database.car import Car
+from database.filters import Filters
+from database.manufacture import Manufacture
+from database.models import Models
+from database.series import Series
+from database.engine_type import EngineType
+
+SEED_PREFIX = "explain_check"
+MANUFACTURES = 20
+MODELS_PER_MANUFACTURE = 10
+SERIES_PER_MODEL = 10
+ENGINE_TYPES = 5
+# Фильтр для анти-join с viewed_cars; план проверки по уникальному индексу не зависит от наличия строк
+VIEWED_FILTER_ID = -1
+
+
+async def seed(db: DBApi, cars: int) -> dict:
+    """Заполняет справочники и car синтетическими строками с отрицательными id."""
+    manufacture_ids = (await db._sess.execute(
+        insert(Manufacture).returning(Manufacture.id),
+        [{"name": f"{SEED_PREFIX}_m{i}", "translated": f"{SEED_PREFIX}_m{i}"} for i in range(MANUFACTURES)]
+    )).scalars().all()
+    model_ids = (await db._sess.execute(
+        insert(Models).returning(Models.id),
+        [
+            {"manufacture_id": manufacture_id, "name": f"{SEED_PREFIX}_model{i}", "translated": f"{SEED_PREFIX}_model{i}"}
+            for manufacture_id in manufacture_ids for i in range(MODELS_PER_MANUFACTURE)
+        ]
+    )).scalars().all()
+    series_ids = (await db._sess.execute(
+        insert(Series).returning(Series.id),
+        [
+            {"models_id": model_id, "name": f"{SEED_PREFIX}_s{i}", "translated": f"{SEED_PREFIX}_s{i}"}
+            for model_id in model_ids for i in range(SERIES_PER_MODEL)
+        ]
+    )).scalars().all()
+    engine_type_ids = (await db._sess.execute(
+        insert(EngineType).returning(EngineType.id),
+        [{"name": f"{SEED_PREFIX}_e{i}", "translated": f"{SEED_PREFIX}_e{i}"} for i in range(ENGINE_TYPES)]
+    )).scalars().all()
+
+    # Машины равномерно по сериям, цене, пробегу, году выпуска и дате добавления за последний год
+    await db._sess.execute(text("""
+        INSERT INTO car (id, manufacture_id, model_id, series_id, engine_type_id,
+                         mileage, price_won, price_rub, date_release, create_dttm, update_dttm)
+        SELECT -g, m.manufacture_id, s.models_id, s.id, (:engine_type_ids)[1 + g % :engine_types],
+               (g * 7919) % 300000, (g::bigint * 104729) % 10000000, (g::bigint * 104729) % 10000000,
+               timestamp '2005-01-01' + ((g * 31) % 7000) * interval '1 day',
+               now() - ((g * 17) % 525600) * interval '1 minute', now()
+        FROM generate_series(1, :cars) AS g
+        JOIN (SELECT id, models_id, row_number() OVER (ORDER BY id) AS rn FROM series WHERE id = ANY(:series_ids)) AS s
+          ON s.rn = 1 + g % :series_count
+        JOIN models AS m ON m.id = s.models_id
+    """), {
+        "engine_type_ids": list(engine_type_ids),
+        "engine_types": len(engine_type_ids),
+        "series_ids": list(series_ids),
+        "series_count": len(series_ids),
+        "cars": cars,
+    })
+    await db._sess.execute(text("ANALYZE car"))
+    series = (await db._sess.execute(select(Series).where(Series.id == series_ids[0]))).scalars().first()
+    model = (await db._sess.execute(select(Models).where(Models.id == series.models_id))).scalars().first()
+    return {
+        "manufacture_id": model.manufacture_id,
+        "model_id": model.id,
+        "series_id": series.id,
+        "engine_type_id": engine_type_ids[0],
+    }
+
+
+def build_cases(ids: dict) -> dict:
+    """Запросы в том виде, в каком их строят get_new_cars_by_filter, get_unviewed_cars_by_filter и get_next_cars_by_filter."""
+    now = datetime.now()
+    filters = {
+        "марка и модель, диапазон цены": Filters(
+            manufacture_id=ids["manufacture_id"], model_id=ids["model_id"],
+            price_from=1000000, price_defore=3000000, create_dttm=now - timedelta(days=1)
+        ),
+        "марка, модель и серия": Filters(
+            manufacture_id=ids["manufacture_id"], model_id=ids["model_id"], series_id=ids["series_id"],
+            create_dttm=now - timedelta(days=1)
+        ),
+        "тип двигателя и узкий диапазон цены": Filters(
+            engine_type_id=ids["engine_type_id"], price_from=1000000, price_defore=1050000,
+            create_dttm=now - timedelta(days=1)
+        ),
+        "только марка, новые за час": Filters(
+            manufacture_id=ids["manufacture_id"], create_dttm=now - timedelta(hours=1)
+        ),
+    }
+    cases = {}
+    for name, filter_obj in filters.items():
+        filter_obj.id = VIEWED_FILTER_ID
+        # Фильтр только по марке без даты отбирает 5% машин — для LIMIT 1 seq scan там честно дешевле
+        if filter_obj.model_id or filter_obj.engine_type_id:
+            cases[f"unviewed: {name}"] = unviewed_cars_query(filter_obj, [], 1)
+            # «Ещё» с курсором посередине таблицы
+            filter_obj.cursor_dttm, filter_obj.cursor_car_id = now - timedelta(days=180), 0
+            cases[f"more: {name}"] = next_cars_query(filter_obj, [], 5)
+        # Водяной знак после создания фильтра, как после первого прохода сверки
+        filter_obj.match_dttm, filter_obj.match_car_id = filter_obj.create_dttm + timedelta(minutes=10), 0
+        cases[f"new: {name}"] = new_cars_query(filter_obj, [], 1)
+    return cases
+
+
+def find_seq_scans(plan: dict, table: str) -> list:
+    """Рекурсивно ищет узлы Seq Scan по таблице в плане EXPLAIN (FORMAT JSON)."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child, table))
+    return found
+
+
+async def main(cars: int) -> int:
+    await global_init(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME
+    )
+    failed = 0
+    async with DBApi() as db:
+        dialect = db._sess.get_bind().dialect
+        if dialect.name != "postgresql":
+            print("Проверка планов поддерживается только для PostgreSQL")
+            return 1
+        try:
+            print(f"Заполнение {cars} синтетических машин...")
+            ids = await seed(db, cars)
+            for name, query in build_cases(ids).items():
+                sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                raw = (await db._sess.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+                plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                seq_scans = find_seq_scans(plan, Car.__tablename__)
+                if seq_scans:
+                    failed += 1
+                    print(f"FAIL {name}: последовательное сканирование car")
+                    print(json.dumps(plan, indent=2, ensure_ascii=False))
+                else:
+                    print(f"OK   {name}")
+        finally:
+            await db._sess.rollback()
+    print("Все запросы используют индексы" if not failed else f"Запросов с последовательным сканированием: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка планов запросов подбора машин")
+    parser.add_argument("--cars", type=int, default=50000, help="Сколько синтетических машин добавить")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.cars)))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey, Index
 from datetime import datetime
 
 from database.base import SqlAlchemyBase
@@ -21,8 +21,17 @@ class Filters(SqlAlchemyBase):
     price_defore = Column(Integer, default=None)
     date_release_from = Column(DateTime, default=None)
     date_release_defore = Column(DateTime, default=None)
+    # Позиция листания по кнопке «Ещё»: последняя отправленная машина в порядке (create_dttm, id) по убыванию
+    cursor_dttm = Column(DateTime, default=None)
+    cursor_car_id = Column(BigInteger, default=None)
+    # Водяной знак подбора новых машин: последняя машина в порядке (create_dttm, id), с которой фильтр уже сверен
+    match_dttm = Column(DateTime, default=None)
+    match_car_id = Column(BigInteger, default=None)
     create_dttm = Column(DateTime, default=datetime.now)
     update_dttm = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    __table_args__ = (
+        Index("ix_filters_user_id", "user_id"),
+    )
 
     def __repr__(self):
         return (
@@ -41,6 +50,10 @@ class Filters(SqlAlchemyBase):
             f"price_defore={self.price_defore}, "
             f"date_release_from={self.date_release_from}, "
             f"date_release_defore={self.date_release_defore}, "
+            f"cursor_dttm={self.cursor_dttm}, "
+            f"cursor_car_id={self.cursor_car_id}, "
+            f"match_dttm={self.match_dttm}, "
+            f"match_car_id={self.match_car_id}, "
             f"create_dttm={self.create_dttm}, "
             f"update_dttm={self.update_dttm}"
             f")>"
@@ -0,0 +1,152 @@
+import functools
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from config import DB_QUERY_REPEAT_WARN, DB_SLOW_QUERIES_KEPT
+
+# Параметры запроса в тексте SQL: $1 (asyncpg), %s (aiomysql), ? (sqlite)
+_PARAM = r"(?:\$\d+|%s|\?)"
+_PARAM_LIST = re.compile(rf"{_PARAM}(?:\s*,\s*{_PARAM})+")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Форма запроса: без лишних пробелов и с IN-списком любой длины, схлопнутым в один параметр."""
+    return _PARAM_LIST.sub("?", _SPACES.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Запросы одной единицы работы: HTTP-запроса API или запуска задачи планировщика."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.shapes: Counter = Counter()
+        self.repeated: List[str] = []
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        # Предупреждаем один раз на форму, когда она впервые превысила порог
+        if self.shapes[shape] == DB_QUERY_REPEAT_WARN + 1:
+            self.repeated.append(shape)
+            print(f"Возможен N+1 в {self.name}: запрос выполнен больше {DB_QUERY_REPEAT_WARN} раз: {shape[:300]}")
+        if len(self.slowest) < DB_SLOW_QUERIES_KEPT or elapsed > self.slowest[-1][0]:
+            self.slowest.append((elapsed, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[DB_SLOW_QUERIES_KEPT:]
+
+    def summary(self) -> str:
+        text = f"{self.name}: запросов к БД {self.count}, {self.total_time * 1000:.1f} мс"
+        if self.slowest:
+            elapsed, shape = self.slowest[0]
+            text += f", самый долгий {elapsed * 1000:.1f} мс: {shape[:200]}"
+        return text
+
+
+class QueryMetrics:
+    """Накопленные за время жизни процесса счётчики запросов по именам единиц работы."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name: Dict[str, dict] = {}
+
+    def add(self, stats: QueryStats):
+        with self._lock:
+            item = self._by_name.setdefault(stats.name, {
+                "runs": 0, "queries": 0, "total_ms": 0.0, "max_queries": 0,
+                "slowest_ms": 0.0, "slowest_statement": None, "repeated_warnings": 0,
+            })
+            item["runs"] += 1
+            item["queries"] += stats.count
+            item["total_ms"] += stats.total_time * 1000
+            item["max_queries"] = max(item["max_queries"], stats.count)
+            item["repeated_warnings"] += len(stats.repeated)
+            if stats.slowest and stats.slowest[0][0] * 1000 > item["slowest_ms"]:
+                item["slowest_ms"] = stats.slowest[0][0] * 1000
+                item["slowest_statement"] = stats.slowest[0][1]
+
+    def as_list(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    **item,
+                    "avg_queries": round(item["queries"] / item["runs"], 2),
+                    "total_ms": round(item["total_ms"], 3),
+                    "slowest_ms": round(item["slowest_ms"], 3),
+                }
+                for name, item in sorted(self._by_name.items(), key=lambda pair: pair[1]["queries"], reverse=True)
+            ]
+
+
+# Общие на процесс
+query_metrics = QueryMetrics()
+_current: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+@contextmanager
+def track_queries(name: str):
+    """
+    Считает запросы к БД внутри блока и по выходу добавляет их в query_metrics.
+
+    Имя можно поменять внутри блока (stats.name), например когда маршрут известен только после обработки.
+    """
+    stats = QueryStats(name)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        query_metrics.add(stats)
+
+
+def track_job(func):
+    """Декоратор задачи планировщика: считает её запросы и пишет итог в лог."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with track_queries(func.__name__) as stats:
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                print(stats.summary())
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # Упавший запрос не дошёл до after_cursor_execute — убираем его отметку времени
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def install(engine):
+    """Вешает обработчики событий на движок (async-движок — на его sync_engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
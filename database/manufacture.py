@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Text
+from sqlalchemy import Column, BigInteger, Text, Index
 
 from database.base import SqlAlchemyBase
 
@@ -8,6 +8,10 @@ class Manufacture(SqlAlchemyBase):
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     name = Column(Text, nullable=False)
     translated = Column(Text, nullable=False)
+    __table_args__ = (
+        Index("uq_manufacture_name", "name", unique=True, mysql_length={"name": 255}),
+        Index("ix_manufacture_translated", "translated", mysql_length={"translated": 255}),
+    )
 
     def __str__(self):
         return self.name
@@ -0,0 +1,150 @@
+"""
+Лёгкие миграции схемы.
+
+create_all создаёт только недостающие таблицы, поэтому индексы и колонки, добавленные
+в модели позже, в существующие таблицы попадают через миграции. Миграция — модуль
+vNNN_*.py в этом пакете с VERSION, DESCRIPTION и функцией upgrade(conn), которая
+получает синхронное соединение. Применённые версии хранятся в таблице schema_version;
+global_init применяет недостающие при старте процесса, каждую в своей транзакции.
+
+Миграция с TRANSACTIONAL = False выполняется вне транзакции (AUTOCOMMIT): так в PostgreSQL
+индексы на большие таблицы строятся CONCURRENTLY, не блокируя запись. Такая миграция
+должна быть повторяемой — при сбое посередине она выполнится заново с начала.
+
+Имена и колонки индексов миграция перечисляет сама, а не берёт из модели: иначе результат
+старой миграции менялся бы вместе с моделью.
+"""
+import importlib
+import pkgutil
+
+from sqlalchemy import Column, Index, MetaData, Table, inspect, insert, select, text
+from sqlalchemy.schema import CreateColumn
+
+from database.schema_version import SchemaVersion
+
+# Ключ advisory lock PostgreSQL, чтобы процессы, стартующие одновременно, не применяли миграции параллельно
+MIGRATION_LOCK_ID = 7342001
+
+
+def load_migrations() -> list:
+    """Загружает модули миграций пакета, отсортированные по VERSION."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if module_info.name.startswith("v"):
+            migrations.append(importlib.import_module(f"{__name__}.{module_info.name}"))
+    return sorted(migrations, key=lambda migration: migration.VERSION)
+
+
+def _autocommit(conn) -> bool:
+    return conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+
+
+def _concurrently(conn) -> bool:
+    # CREATE/DROP INDEX CONCURRENTLY в PostgreSQL нельзя выполнять внутри транзакции
+    return conn.dialect.name == "postgresql" and _autocommit(conn)
+
+
+def _index_exists(conn, table_name, name) -> bool:
+    if conn.dialect.name == "postgresql":
+        valid = conn.execute(
+            text(
+                "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": name}
+        ).scalar()
+        if valid is False:
+            # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс — строим заново
+            conn.execute(text(f"DROP INDEX {'CONCURRENTLY ' if _concurrently(conn) else ''}{name}"))
+            return False
+        return bool(valid)
+    return name in {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+
+def create_index(conn, table_name, name, *columns, unique=False, **dialect_kw):
+    """
+    Создаёт индекс с заданными именем и колонками, если его ещё нет в базе.
+
+    Args:
+        dialect_kw: Параметры диалектов Index, например mysql_length или postgresql_where.
+    """
+    if _index_exists(conn, table_name, name):
+        return
+    table = Table(table_name, MetaData(), *(Column(column) for column in columns))
+    Index(
+        name, *(table.c[column] for column in columns), unique=unique,
+        postgresql_concurrently=_concurrently(conn), **dialect_kw
+    ).create(conn)
+
+
+def drop_index(conn, table_name, name):
+    """Удаляет индекс, убранный из модели, если он ещё есть в базе."""
+    if name not in {index["name"] for index in inspect(conn).get_indexes(table_name)}:
+        return
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"DROP INDEX {name} ON {table_name}"))
+    else:
+        conn.execute(text(f"DROP INDEX {'CONCURRENTLY ' if _concurrently(conn) else ''}{name}"))
+
+
+def add_columns(conn, model, *column_names):
+    """Добавляет в существующую таблицу колонки модели, которых в ней ещё нет."""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        column_ddl = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+
+
+def _apply(conn, migration) -> bool:
+    postgresql = conn.dialect.name == "postgresql"
+    autocommit = _autocommit(conn)
+    if postgresql:
+        # В транзакции блокировка снимается коммитом, вне транзакции — явно
+        lock = "pg_advisory_lock" if autocommit else "pg_advisory_xact_lock"
+        conn.execute(text(f"SELECT {lock}(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+    try:
+        applied = conn.execute(
+            select(SchemaVersion.version).where(SchemaVersion.version == migration.VERSION)
+        ).first()
+        if applied:
+            return False
+        migration.upgrade(conn)
+        conn.execute(insert(SchemaVersion).values(version=migration.VERSION, description=migration.DESCRIPTION))
+        return True
+    finally:
+        if postgresql and autocommit:
+            conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+
+
+async def _run(engine, migration) -> bool:
+    if getattr(migration, "TRANSACTIONAL", True):
+        async with engine.begin() as conn:
+            return await conn.run_sync(_apply, migration)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return await conn.run_sync(_apply, migration)
+
+
+async def run_migrations(engine):
+    """
+    Применяет недостающие миграции по порядку.
+
+    Миграции не зависят друг от друга, поэтому упавшая не мешает применить следующие,
+    но после прохода run_migrations падает с RuntimeError: работать на недомигрированной
+    схеме процесс не должен. Упавшие миграции повторяются при следующем старте.
+    """
+    failed = []
+    for migration in load_migrations():
+        try:
+            applied = await _run(engine, migration)
+        except Exception as e:
+            print(f"Миграция {migration.VERSION} ({migration.DESCRIPTION}) не применена: {e}")
+            failed.append(f"{migration.VERSION} ({e})")
+            continue
+        if applied:
+            print(f"Применена миграция {migration.VERSION}: {migration.DESCRIPTION}")
+    if failed:
+        raise RuntimeError(f"Не применены миграции схемы: {'; '.join(failed)}")
@@ -0,0 +1,31 @@
+from database.migrations import create_index
+from database.dedup import merge_all
+
+VERSION = 1
+DESCRIPTION = "Слияние дубликатов, уникальные индексы (родитель, name) и индексы по translated в справочниках"
+
+# (таблица, имя индекса, колонки, уникальный)
+INDEXES = [
+    ("manufacture", "uq_manufacture_name", ["name"], True),
+    ("manufacture", "ix_manufacture_translated", ["translated"], False),
+    ("models", "uq_models_manufacture_id_name", ["manufacture_id", "name"], True),
+    ("models", "ix_models_manufacture_id_translated", ["manufacture_id", "translated"], False),
+    ("series", "uq_series_models_id_name", ["models_id", "name"], True),
+    ("series", "ix_series_models_id_translated", ["models_id", "translated"], False),
+    ("equipment", "uq_equipment_series_id_name", ["series_id", "name"], True),
+    ("equipment", "ix_equipment_series_id_translated", ["series_id", "translated"], False),
+    ("engine_type", "uq_engine_type_name", ["name"], True),
+    ("engine_type", "ix_engine_type_translated", ["translated"], False),
+    ("drive_type", "uq_drive_type_name", ["name"], True),
+    ("drive_type", "ix_drive_type_translated", ["translated"], False),
+    ("car_color", "uq_car_color_name", ["name"], True),
+    ("car_color", "ix_car_color_translated", ["translated"], False),
+]
+
+
+def upgrade(conn):
+    # В таблице с дубликатами уникальный индекс не создастся
+    merge_all(conn)
+    for table_name, name, columns, unique in INDEXES:
+        # Text-колонки MySQL индексирует только по префиксу
+        create_index(conn, table_name, name, *columns, unique=unique, mysql_length={"name": 255, "translated": 255})
@@ -0,0 +1,22 @@
+from database.migrations import create_index
+
+VERSION = 2
+DESCRIPTION = "Индексы для подбора машин по фильтрам, фильтров пользователя, подписок и просмотров"
+# car большая — индексы строятся CONCURRENTLY, без блокировки записи
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, "car", "ix_car_manufacture_model_series_price", "manufacture_id", "model_id", "series_id", "price_rub")
+    create_index(conn, "car", "ix_car_engine_type_price", "engine_type_id", "price_rub")
+    create_index(conn, "car", "ix_car_manufacture_create_dttm", "manufacture_id", "create_dttm")
+    # (create_dttm) не создаётся: его заменяет ix_car_create_dttm_id из v007
+    create_index(conn, "car", "ix_car_price_rub", "price_rub")
+    create_index(conn, "car", "ix_car_mileage", "mileage")
+    create_index(conn, "car", "ix_car_date_release", "date_release")
+    create_index(conn, "filters", "ix_filters_user_id", "user_id")
+    create_index(conn, "subscription", "ix_subscription_user_end", "user_id", "subscription_end")
+    create_index(conn, "subscription", "ix_subscription_end", "subscription_end")
+    # payhistory.invoice_id и settings.key уже уникальны, их индексы создаёт create_all.
+    # Уникальный индекс просмотров требует чистки дубликатов и создаётся в v003
+    create_index(conn, "viewed_cars", "ix_viewed_cars_user_filter", "user_id", "filter_id")
@@ -0,0 +1,22 @@
+from sqlalchemy import delete, func, select
+
+from database.migrations import create_index
+from database.viewed_cars import ViewedCars
+
+VERSION = 3
+DESCRIPTION = "Уникальный индекс просмотров (filter_id, car_id) с удалением повторных отметок"
+
+
+def upgrade(conn):
+    # Раньше одна машина могла отмечаться по фильтру несколько раз — оставляем самую раннюю отметку
+    first_views = (
+        select(func.min(ViewedCars.id).label("id"))
+        .group_by(ViewedCars.filter_id, ViewedCars.car_id)
+        .subquery()
+    )
+    # Лишний уровень подзапроса нужен MySQL, который не даёт читать удаляемую таблицу напрямую
+    keep_ids = select(first_views.c.id).subquery()
+    result = conn.execute(delete(ViewedCars).where(ViewedCars.id.notin_(select(keep_ids.c.id))))
+    if result.rowcount:
+        print(f"Удалено повторных отметок просмотра: {result.rowcount}")
+    create_index(conn, "viewed_cars", "uq_viewed_cars_filter_car", "filter_id", "car_id", unique=True)
@@ -0,0 +1,10 @@
+from database.migrations import add_columns
+from database.filters import Filters
+
+VERSION = 4
+DESCRIPTION = "Курсор листания фильтра"
+
+
+def upgrade(conn):
+    # Индекс car (create_dttm, id) для курсора строится отдельно, в v007
+    add_columns(conn, Filters, "cursor_dttm", "cursor_car_id")
@@ -0,0 +1,10 @@
+from database.migrations import create_index
+
+VERSION = 5
+DESCRIPTION = "Индекс car.update_dttm для чтения изменений снимка машин (get_car_rows(updated_since=...))"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # Саму таблицу car_archive создаёт create_all
+    create_index(conn, "car", "ix_car_update_dttm", "update_dttm")
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from config import MATCH_LOOKBACK_MINUTES
+from database.migrations import add_columns
+from database.filters import Filters
+
+VERSION = 6
+DESCRIPTION = "Водяной знак подбора новых машин у фильтров"
+
+
+def upgrade(conn):
+    add_columns(conn, Filters, "match_dttm", "match_car_id")
+    # Существующие фильтры сверяются с машинами за MATCH_LOOKBACK_MINUTES, как и прежде при старте подбора
+    conn.execute(
+        update(Filters).where(Filters.match_dttm.is_(None)).values(
+            match_dttm=datetime.now() - timedelta(minutes=MATCH_LOOKBACK_MINUTES),
+            match_car_id=0,
+            update_dttm=Filters.update_dttm
+        )
+    )
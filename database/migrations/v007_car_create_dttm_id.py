@@ -0,0 +1,11 @@
+from database.migrations import create_index, drop_index
+
+VERSION = 7
+DESCRIPTION = "Индекс car (create_dttm, id) для курсора листания и подбора новых машин"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, "car", "ix_car_create_dttm_id", "create_dttm", "id")
+    # Новый индекс покрывает и отбор по create_dttm
+    drop_index(conn, "car", "ix_car_create_dttm")
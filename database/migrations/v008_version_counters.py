@@ -0,0 +1,23 @@
+from sqlalchemy import delete, insert, select
+
+from database.settings import Settings
+from database.version_counter import VersionCounter
+
+VERSION = 8
+DESCRIPTION = "Перенос счётчиков версий из settings в version_counter"
+
+# Счётчики, которые раньше хранились строками settings
+KEYS = ["settings_version", "dimension_version", "filter_version"]
+
+
+def upgrade(conn):
+    # Саму таблицу version_counter создаёт create_all
+    rows = conn.execute(select(Settings.key, Settings.value).where(Settings.key.in_(KEYS))).fetchall()
+    existing = set(conn.execute(select(VersionCounter.key)).scalars().all())
+    for key, value in rows:
+        if key in existing:
+            continue
+        # Значение могли испортить правкой в админке; версия лишь должна отличаться от закэшированной
+        version = int(value) if value and value.strip().isdigit() else 0
+        conn.execute(insert(VersionCounter).values(key=key, value=version + 1))
+    conn.execute(delete(Settings).where(Settings.key.in_(KEYS)))
@@ -0,0 +1,16 @@
+from database.migrations import create_index
+from database.dedup import merge_all
+
+VERSION = 9
+DESCRIPTION = "Уникальность name у записей справочников без родителя"
+
+
+def upgrade(conn):
+    # Записи без родителя уникальный индекс v001 не ограничивал — среди них могли появиться дубликаты
+    merge_all(conn)
+    if conn.dialect.name != "postgresql":
+        # Частичных индексов нет в MySQL; там DBApi.upsert_dimensions проверяет такие записи перед вставкой
+        return
+    create_index(conn, "models", "uq_models_name_no_parent", "name", unique=True, postgresql_where="manufacture_id IS NULL")
+    create_index(conn, "series", "uq_series_name_no_parent", "name", unique=True, postgresql_where="models_id IS NULL")
+    create_index(conn, "equipment", "uq_equipment_name_no_parent", "name", unique=True, postgresql_where="series_id IS NULL")
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from database.migrations import add_columns, create_index
+from database.car import Car
+from database.car_archive import CarArchive
+
+VERSION = 10
+DESCRIPTION = "Время последнего появления машины в выдаче для архивации по нему"
+# car большая: колонка заполняется пачками, индекс строится CONCURRENTLY
+TRANSACTIONAL = False
+
+BATCH_SIZE = 10000
+
+
+def upgrade(conn):
+    add_columns(conn, Car, "last_seen_dttm")
+    add_columns(conn, CarArchive, "last_seen_dttm")
+    # Уже известные машины считаем увиденными сейчас: за ARCHIVE_AFTER_DAYS парсер успеет встретить живые
+    table = Car.__table__
+    now = datetime.now()
+    while True:
+        car_ids = conn.execute(
+            select(table.c.id).where(table.c.last_seen_dttm.is_(None)).limit(BATCH_SIZE)
+        ).scalars().all()
+        if not car_ids:
+            break
+        conn.execute(
+            update(table).where(table.c.id.in_(car_ids)).values(last_seen_dttm=now, update_dttm=table.c.update_dttm)
+        )
+    create_index(conn, "car", "ix_car_last_seen_dttm", "last_seen_dttm")
@@ -0,0 +1,35 @@
+from sqlalchemy import column, insert, select, table
+
+from database.translation_queue import TranslationQueue
+
+VERSION = 11
+DESCRIPTION = "Очередь перевода справочников вместо поиска записей с translated = name"
+
+TABLES = ["manufacture", "models", "series", "equipment", "engine_type", "drive_type", "car_color"]
+BATCH_SIZE = 5000
+
+
+def upgrade(conn):
+    # Саму таблицу translation_queue создаёт create_all; сюда переносятся записи, ещё ждущие перевода
+    for table_name in TABLES:
+        dimension = table(table_name, column("id"), column("name"), column("translated"))
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(dimension.c.id, dimension.c.name)
+                .where(dimension.c.translated == dimension.c.name, dimension.c.id > last_id)
+                .order_by(dimension.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            queued = [
+                {"table_name": table_name, "record_id": record_id}
+                for record_id, name in rows if name and not name.isascii()
+            ]
+            if queued:
+                conn.execute(
+                    insert(TranslationQueue).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+                    queued
+                )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Text, ForeignKey
+from sqlalchemy import Column, BigInteger, Text, ForeignKey, Index, text
 
 from database.base import SqlAlchemyBase
 
@@ -9,6 +9,12 @@ class Models(SqlAlchemyBase):
     manufacture_id = Column(BigInteger, ForeignKey("manufacture.id"))
     name = Column(Text, nullable=False)
     translated = Column(Text, nullable=False)
+    __table_args__ = (
+        Index("uq_models_manufacture_id_name", "manufacture_id", "name", unique=True, mysql_length={"name": 255}),
+        # NULL в уникальном индексе не совпадает сам с собой — имена записей без родителя держит частичный индекс
+        Index("uq_models_name_no_parent", "name", unique=True, postgresql_where=text("manufacture_id IS NULL")).ddl_if(dialect="postgresql"),
+        Index("ix_models_manufacture_id_translated", "manufacture_id", "translated", mysql_length={"translated": 255}),
+    )
 
     def __str__(self):
         return self.name
@@ -0,0 +1,120 @@
+"""
+Уведомления между процессами через PostgreSQL LISTEN/NOTIFY.
+
+Писатель вызывает notify() в своей транзакции — PostgreSQL доставит уведомление
+слушателям только после коммита. Слушатель держит отдельное соединение asyncpg
+(не из пула SQLAlchemy) и переподключается при обрыве; после переподключения
+обработчики вызываются с payload=None, так как уведомления за время обрыва потеряны.
+Канал, на который подписались уже после подключения, добавляется к живому соединению.
+На других СУБД notify() ничего не делает, а listen() возвращает False — вызывающий
+код должен сам перепроверять данные по таймеру.
+"""
+import asyncio
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+
+from database.db_session import get_engine
+
+# Пауза перед повторным подключением слушателя, с
+RECONNECT_DELAY = 5
+
+Handler = Callable[[Optional[str]], None]
+
+
+async def notify(session, channel: str, payload: str = "") -> None:
+    """Отправляет уведомление в канал в транзакции сессии (доставляется после коммита)."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class Listener:
+    """Одно соединение LISTEN на процесс и обработчики по каналам."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._connection = None
+        # Каналы, на которые текущее соединение уже выполнило LISTEN
+        self._channels: Set[str] = set()
+
+    def listening(self, channel: str) -> bool:
+        """Доходят ли сейчас уведомления канала; иначе вызывающий перепроверяет данные сам."""
+        return channel in self._channels
+
+    def listen(self, channel: str, handler: Handler) -> bool:
+        """
+        Подписывает обработчик на канал и запускает слушателя, если он ещё не запущен.
+
+        Returns:
+            True, если уведомления поддерживаются (PostgreSQL).
+        """
+        engine = get_engine()
+        if engine is None or engine.dialect.name != "postgresql":
+            return False
+        handlers = self._handlers.setdefault(channel, [])
+        if handler not in handlers:
+            handlers.append(handler)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(engine.url))
+        elif self._connection is not None and channel not in self._channels:
+            asyncio.get_running_loop().create_task(self._subscribe(self._connection, channel))
+        return True
+
+    def _dispatch(self, channel: str, payload: Optional[str]):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Ошибка обработчика уведомления {channel}: {e}")
+
+    def _on_notification(self, _connection, _pid, channel: str, payload: str):
+        self._dispatch(channel, payload)
+
+    async def _subscribe(self, connection, channel: str):
+        """Выполняет LISTEN канала на соединении, если ещё не выполнен."""
+        if channel in self._channels:
+            return
+        self._channels.add(channel)
+        try:
+            await connection.add_listener(channel, self._on_notification)
+        except Exception as e:
+            self._channels.discard(channel)
+            print(f"Ошибка подписки на канал {channel}: {e}")
+            return
+        # Пока канал не слушался, изменения могли пройти мимо
+        self._dispatch(channel, None)
+
+    async def _run(self, url):
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(
+                    user=url.username, password=url.password, host=url.host,
+                    port=url.port, database=url.database
+                )
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                # Каналы, добавленные во время этого цикла, подписывает listen()
+                self._connection = connection
+                for channel in list(self._handlers):
+                    await self._subscribe(connection, channel)
+                await lost.wait()
+                print("Соединение LISTEN потеряно, переподключение")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ошибка соединения LISTEN: {e}")
+            finally:
+                self._connection = None
+                self._channels.clear()
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+# Один слушатель на процесс
+listener = Listener()
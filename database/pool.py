@@ -0,0 +1,77 @@
+import threading
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Счётчики выдачи соединений из пула за время жизни процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.timeouts = 0
+        self.waiters = 0
+        self.max_waiters = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start_wait(self):
+        with self._lock:
+            self.waiters += 1
+            self.max_waiters = max(self.max_waiters, self.waiters)
+
+    def end_wait(self, elapsed: float, success: bool):
+        with self._lock:
+            self.waiters -= 1
+            if success:
+                self.acquired += 1
+                self.total_wait += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+            else:
+                self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "waiters": self.waiters,
+            "max_waiters": self.max_waiters,
+            "avg_acquire_ms": round(self.total_wait / self.acquired * 1000, 3) if self.acquired else 0.0,
+            "max_acquire_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+# Общие на процесс: при recreate() пула счётчики не теряются
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет время получения соединения и число ожидающих."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        pool_stats.start_wait()
+        success = False
+        try:
+            connection = super()._do_get()
+            success = True
+            return connection
+        finally:
+            pool_stats.end_wait(time.perf_counter() - started, success)
+
+
+def get_pool_metrics(engine) -> dict:
+    """Состояние пула движка и накопленные счётчики выдачи соединений."""
+    pool = engine.pool
+    metrics = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    metrics.update(pool_stats.as_dict())
+    return metrics
@@ -0,0 +1,141 @@
+"""
+Маршрутизация запросов между основной базой и репликами только для чтения.
+
+Сессия DBApi(read_only=True) отправляет SELECT на реплику, а всё остальное — на основную базу.
+На основную базу читается также:
+- всё в транзакции после первой записи этой же сессии;
+- всё в течение DB_REPLICA_STICKY_SECONDS после записи текущего пользователя
+  (read-your-writes: только что созданный фильтр сразу виден в списке);
+- всё, пока реплика недоступна: упавшая реплика выключается на DB_REPLICA_RETRY секунд.
+
+Без DB_REPLICA_HOSTS все запросы идут на основную базу.
+"""
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from config import DB_REPLICA_STICKY_SECONDS, DB_REPLICA_RETRY
+
+# Пользователь текущего запроса — ключ read-your-writes; выставляется в telegram_auth
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+
+class ReplicaRouter:
+    """Движки процесса: основной и реплики с отметками о недоступности."""
+
+    def __init__(self):
+        self.primary: Optional[AsyncEngine] = None
+        self.replicas: List[AsyncEngine] = []
+        self._down_until: Dict[AsyncEngine, float] = {}
+        self._last_write: Dict[int, float] = {}
+
+    def configure(self, primary: AsyncEngine, replicas: List[AsyncEngine]):
+        self.primary = primary
+        self.replicas = list(replicas)
+        for replica in self.replicas:
+            if not event.contains(replica.sync_engine, "handle_error", _on_replica_error):
+                event.listen(replica.sync_engine, "handle_error", _on_replica_error)
+
+    def replica_for(self, engine: Engine) -> Optional[AsyncEngine]:
+        """Реплика, которой принадлежит синхронный движок, или None для основной базы."""
+        return next((replica for replica in self.replicas if replica.sync_engine is engine), None)
+
+    def pick_replica(self) -> Optional[AsyncEngine]:
+        """Случайная доступная реплика или None, если читать надо с основной базы."""
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if self._down_until.get(replica, 0) <= now]
+        return random.choice(healthy) if healthy else None
+
+    def mark_down(self, replica: AsyncEngine, error: Exception):
+        if self._down_until.get(replica, 0) <= time.monotonic():
+            print(f"Реплика {replica.url.host} недоступна ({error}), чтение переключено на основную базу на {DB_REPLICA_RETRY} с")
+        self._down_until[replica] = time.monotonic() + DB_REPLICA_RETRY
+
+    def record_write(self, user_id: Optional[int]):
+        if user_id is not None:
+            self._last_write[user_id] = time.monotonic()
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        """Пользователь недавно писал в базу — его чтения идут на основную базу."""
+        if user_id is None:
+            return False
+        last_write = self._last_write.get(user_id)
+        if last_write is None:
+            return False
+        if time.monotonic() - last_write >= DB_REPLICA_STICKY_SECONDS:
+            del self._last_write[user_id]
+            return False
+        return True
+
+
+router = ReplicaRouter()
+
+
+def _on_replica_error(context: ExceptionContext):
+    """Соединение с репликой оборвалось посреди запроса — выключаем её."""
+    replica = router.replica_for(context.engine)
+    if replica is not None and context.is_disconnect:
+        router.mark_down(replica, context.original_exception)
+
+
+class RoutingSession(Session):
+    """Синхронная часть сессии: выбирает движок для каждого запроса."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = None
+        if not isinstance(clause, Select):
+            # flush, INSERT/UPDATE/DELETE, текстовый SQL и connection() — всё считается записью
+            self.info["wrote"] = True
+        if (
+            self.info.get("read_only")
+            and isinstance(clause, Select)
+            and not self._flushing
+            and not self.info.get("wrote")
+            and not router.is_sticky(current_user_id.get())
+        ):
+            replica = router.pick_replica()
+        self.info["replica"] = replica
+        return (replica or router.primary).sync_engine
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        # Сюда приходят execute, scalar(s), get и stream: здесь один раз и повторяем на основной базе
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        except OSError as e:
+            replica = router.replica_for(engine)
+            if replica is None:
+                raise
+            router.mark_down(replica, e)
+            self.info["replica"] = None
+            return super()._connection_for_bind(router.primary.sync_engine, execution_options, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    if session.info.pop("wrote", False):
+        router.record_write(current_user_id.get())
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("wrote", None)
+
+
+class RoutingAsyncSession(AsyncSession):
+    """
+    Асинхронная сессия с переключением на основную базу при отказе реплики.
+
+    Реплика, к которой не удалось подключиться или соединение с которой оборвалось,
+    выключается до истечения DB_REPLICA_RETRY. Запрос, не получивший соединения,
+    сразу повторяется на основной базе (RoutingSession._connection_for_bind);
+    оборванный посреди транзакции — завершается ошибкой.
+    """
+
+    sync_session_class = RoutingSession
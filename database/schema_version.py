@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, Text
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class SchemaVersion(SqlAlchemyBase):
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(Text, default=None)
+    applied_dttm = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"version={self.version}, "
+            f"description={self.description}, "
+            f"applied_dttm={self.applied_dttm}"
+            f")>"
+        )
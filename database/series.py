@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, Text, ForeignKey
+from sqlalchemy import Column, BigInteger, Text, ForeignKey, Index, text
 
 from database.base import SqlAlchemyBase
 
@@ -9,6 +9,11 @@ class Series(SqlAlchemyBase):
     models_id = Column(BigInteger, ForeignKey("models.id"))
     name = Column(Text, nullable=False)
     translated = Column(Text, nullable=False)
+    __table_args__ = (
+        Index("uq_series_models_id_name", "models_id", "name", unique=True, mysql_length={"name": 255}),
+        Index("uq_series_name_no_parent", "name", unique=True, postgresql_where=text("models_id IS NULL")).ddl_if(dialect="postgresql"),
+        Index("ix_series_models_id_translated", "models_id", "translated", mysql_length={"translated": 255}),
+    )
 
     def __str__(self):
         return self.name
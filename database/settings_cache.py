@@ -0,0 +1,73 @@
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.future import select
+
+from config import SETTINGS_CACHE_TTL
+from database.db_session import create_session
+from database.notify import listener
+from database.settings import Settings
+from database.version_counter import VersionCounter
+
+# Ключ счётчика в version_counter с версией таблицы settings: растёт при каждом изменении настроек
+SETTINGS_VERSION_KEY = "settings_version"
+# Канал NOTIFY, в который пишут изменения настроек
+SETTINGS_CHANNEL = "settings_changed"
+
+COLUMNS = [column.key for column in Settings.__table__.columns]
+
+
+class SettingsCache:
+    """
+    Кэш таблицы settings в памяти процесса.
+
+    Таблица читается целиком один раз, дальше get_setting_by_key отдаёт настройки из словаря.
+    DBApi при изменении настроек увеличивает settings_version и шлёт NOTIFY settings_changed;
+    на PostgreSQL кэш сбрасывается по уведомлению, а пока слушатель не подключён (или на
+    других СУБД) — сверяет версию с базой не чаще раза в SETTINGS_CACHE_TTL секунд.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._rows: Dict[str, dict] = {}
+        self._checked_at = 0.0
+
+    async def load(self):
+        """Загружает все настройки с основной базы."""
+        listener.listen(SETTINGS_CHANNEL, self.invalidate)
+        async with create_session() as sess:
+            version = await self._read_version(sess)
+            result = await sess.execute(select(*Settings.__table__.columns))
+            self._rows = {row.key: dict(row._mapping) for row in result.fetchall()}
+        self.version = version
+        self._checked_at = time.monotonic()
+
+    @staticmethod
+    async def _read_version(sess) -> int:
+        result = await sess.execute(select(VersionCounter.value).where(VersionCounter.key == SETTINGS_VERSION_KEY))
+        return result.scalars().first() or 0
+
+    async def refresh(self):
+        """Перечитывает настройки после сброса, а без слушателя — если изменилась версия."""
+        if self.version is None:
+            await self.load()
+        elif not listener.listening(SETTINGS_CHANNEL) and time.monotonic() - self._checked_at >= SETTINGS_CACHE_TTL:
+            async with create_session() as sess:
+                version = await self._read_version(sess)
+            self._checked_at = time.monotonic()
+            if version != self.version:
+                await self.load()
+
+    async def get(self, key: str) -> Optional[Settings]:
+        """Возвращает копию настройки (не привязанную к сессии), чтобы изменения вызывающего не портили кэш."""
+        await self.refresh()
+        row = self._rows.get(key)
+        return Settings(**row) if row else None
+
+    def invalidate(self, payload: str = None):
+        """Сбрасывает кэш: следующее чтение перечитает таблицу."""
+        self.version = None
+
+
+# Один кэш на процесс
+settings_cache = SettingsCache()
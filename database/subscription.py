@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, DateTime, ForeignKey, Index
 from datetime import datetime
 
 from database.base import SqlAlchemyBase
@@ -12,6 +12,10 @@ class Subscription(SqlAlchemyBase):
     subscription_end = Column(DateTime, default=None)
     create_dttm = Column(DateTime, default=datetime.now)
     update_dttm = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    __table_args__ = (
+        Index("ix_subscription_user_end", "user_id", "subscription_end"),
+        Index("ix_subscription_end", "subscription_end"),
+    )
 
     def __str__(self):
         return f'{self.user_id}'
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, DateTime, String, Text, UniqueConstraint
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class TranslationCache(SqlAlchemyBase):
+    __tablename__ = "translation_cache"
+    __table_args__ = (UniqueConstraint("source", "context", name="uq_translation_cache_source_context"),)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source = Column(String(512), nullable=False)  # нормализованный исходный текст
+    context = Column(String(64), nullable=False)  # manufacture, model, series и т.д.
+    translated = Column(Text, nullable=False)
+    create_dttm = Column(DateTime, default=datetime.now)
+
+    def __str__(self):
+        return self.translated
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"id={self.id}, "
+            f"source={self.source}, "
+            f"context={self.context}, "
+            f"translated={self.translated}, "
+            f"create_dttm={self.create_dttm}"
+            f")>"
+        )
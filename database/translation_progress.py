@@ -0,0 +1,26 @@
+from sqlalchemy import Column, BigInteger, DateTime, String
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class TranslationProgress(SqlAlchemyBase):
+    __tablename__ = "translation_progress"
+    table_name = Column(String(64), primary_key=True)
+    last_id = Column(BigInteger, default=0)  # последний обработанный id справочника
+    rows_done = Column(BigInteger, default=0)
+    start_dttm = Column(DateTime, default=datetime.now)
+    finish_dttm = Column(DateTime, default=None)
+    update_dttm = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"table_name={self.table_name}, "
+            f"last_id={self.last_id}, "
+            f"rows_done={self.rows_done}, "
+            f"start_dttm={self.start_dttm}, "
+            f"finish_dttm={self.finish_dttm}, "
+            f"update_dttm={self.update_dttm}"
+            f")>"
+        )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, DateTime, Integer, String, Index
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class TranslationQueue(SqlAlchemyBase):
+    """Записи справочников, сохранённые парсером без перевода, с числом попыток и временем следующей."""
+    __tablename__ = "translation_queue"
+    table_name = Column(String(64), primary_key=True)
+    record_id = Column(BigInteger, primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_dttm = Column(DateTime, default=datetime.now)  # NULL — попытки исчерпаны
+    create_dttm = Column(DateTime, default=datetime.now)
+    __table_args__ = (
+        Index("ix_translation_queue_table_next_attempt", "table_name", "next_attempt_dttm"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"table_name={self.table_name}, "
+            f"record_id={self.record_id}, "
+            f"attempts={self.attempts}, "
+            f"next_attempt_dttm={self.next_attempt_dttm}, "
+            f"create_dttm={self.create_dttm}"
+            f")>"
+        )
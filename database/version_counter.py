@@ -0,0 +1,21 @@
+from sqlalchemy import Column, BigInteger, DateTime, String
+from datetime import datetime
+
+from database.base import SqlAlchemyBase
+
+
+class VersionCounter(SqlAlchemyBase):
+    """Служебные счётчики версий (настроек, справочников, фильтров), по которым процессы сбрасывают кэши."""
+    __tablename__ = "version_counter"
+    key = Column(String(64), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    update_dttm = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"key={self.key}, "
+            f"value={self.value}, "
+            f"update_dttm={self.update_dttm}"
+            f")>"
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, ForeignKey, DateTime
+from sqlalchemy import Column, BigInteger, ForeignKey, DateTime, Index
 from datetime import datetime
 from database.base import SqlAlchemyBase
 
@@ -9,6 +9,10 @@ class ViewedCars(SqlAlchemyBase):
     filter_id = Column(BigInteger, ForeignKey("filters.id", ondelete="CASCADE"))
     car_id = Column(BigInteger, ForeignKey("car.id", ondelete="CASCADE"))
     viewed_dttm = Column(DateTime, default=datetime.now)
+    __table_args__ = (
+        Index("ix_viewed_cars_user_filter", "user_id", "filter_id"),
+        Index("uq_viewed_cars_filter_car", "filter_id", "car_id", unique=True),
+    )
 
     def __repr__(self):
         return (
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, ForeignKey
+
+from database.base import SqlAlchemyBase
+
+
+class ViewedCarsArchive(SqlAlchemyBase):
+    """Отметки просмотра машин из car_archive: только пары (фильтр, машина), владелец берётся из фильтра."""
+    __tablename__ = "viewed_cars_archive"
+    filter_id = Column(BigInteger, ForeignKey("filters.id", ondelete="CASCADE"), primary_key=True)
+    car_id = Column(BigInteger, primary_key=True)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}("
+            f"filter_id={self.filter_id}, "
+            f"car_id={self.car_id}"
+            f")>"
+        )
@@ -1,5 +1,16 @@
 # from .zd import parse_cars
-from .pc import parse_cars
-from .full import parse_full_car_info
+import importlib
 
-__all__ = ["parse_cars", "parse_full_car_info"]
\ No newline at end of file
+# Модули парсеров тянут zendriver, openai и TwoCaptcha — импортируем их только при первом обращении
+_LAZY = {
+    "parse_cars": ".pc",
+    "parse_full_car_info": ".full",
+}
+
+__all__ = ["parse_cars", "parse_full_car_info"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from database import DBApi
+from translation import cache_stats
+
+# Этапы, по которым копится время и ошибки
+STAGES = ("fetch", "translate", "resolve", "db_write")
+
+
+class CrawlRunStats:
+    """
+    Счётчики одного запуска парсера.
+
+    Значения копятся в памяти и сбрасываются в таблицу crawl_run пачкой
+    (flush после страницы и finish в конце), а не после каждой машины.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.run_id = None
+        self.pages_fetched = 0
+        self.listings_seen = 0
+        self.new_count = 0
+        self.updated_count = 0
+        self.skipped_count = 0
+        self.bytes_transferred = 0
+        self.failures = {}
+        self.timings = dict.fromkeys(STAGES, 0.0)
+
+    async def start(self):
+        """Создаёт запись о запуске."""
+        async with DBApi() as db:
+            crawl_run = await db.create_crawl_run(source=self.source, start_dttm=datetime.now())
+        self.run_id = crawl_run.id
+        cache_stats.reset()
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Добавляет время выполнения блока к этапу stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.perf_counter() - started
+
+    def fail(self, stage: str):
+        self.failures[stage] = self.failures.get(stage, 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "pages_fetched": self.pages_fetched,
+            "listings_seen": self.listings_seen,
+            "new_count": self.new_count,
+            "updated_count": self.updated_count,
+            "skipped_count": self.skipped_count,
+            "failures": dict(self.failures),
+            "bytes_transferred": self.bytes_transferred,
+            "fetch_time": round(self.timings["fetch"], 3),
+            "translate_time": round(self.timings["translate"], 3),
+            "resolve_time": round(self.timings["resolve"], 3),
+            "db_write_time": round(self.timings["db_write"], 3),
+            "translation_cache_hits": cache_stats.hits,
+            "translation_api_calls": cache_stats.api_calls,
+        }
+
+    async def flush(self, **extra):
+        """Записывает накопленные счётчики в crawl_run одним обновлением."""
+        if self.run_id is None:
+            return
+        try:
+            async with DBApi() as db:
+                await db.update_crawl_run(self.run_id, **self.as_dict(), **extra)
+        except Exception as e:
+            print(f"Ошибка сохранения статистики запуска {self.run_id}: {e}")
+
+    async def finish(self):
+        """Фиксирует время окончания и печатает сводку."""
+        await self.flush(end_dttm=datetime.now())
+        print(f"Запуск {self.run_id} ({self.source}) завершён: {self.as_dict()}")
+        print(f"Кэш переводов: {cache_stats.as_dict()}")
@@ -1,70 +1,44 @@
 import asyncio
 import json
-import re
 from datetime import datetime
 import bs4
 import zendriver as zd
 import urllib
 import aiohttp
 from database import DBApi
-from os import getenv
-from openai import AsyncOpenAI
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Инициализация клиента OpenAI для DeepSeek API
-deepseek_api_key = getenv("DEEPSEEK_API_KEY")
-if not deepseek_api_key:
-    raise ValueError("DeepSeek API key not found. Set the DEEPSEEK_API_KEY environment variable.")
-
-client = AsyncOpenAI(
-    api_key=deepseek_api_key,
-    base_url="https://api.deepseek.com/v1"
-)
+from database.dimensions import resolver
+from functions.crawl_run import CrawlRunStats
+from translation import lookup_translation, seed_from_dimensions
 
 # Единый User-Agent для согласованности
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:138.0) Gecko/20100101 Firefox/138.0"
 
-async def translate_text(text: str, context: str) -> str:
-    """Переводит текст с корейского на английский через DeepSeek API."""
+async def get_known_translation(text: str, context: str) -> str:
+    """
+    Возвращает перевод из кэша без обращения к API.
+
+    Если перевода ещё нет, возвращает исходный текст: запись справочника сохраняется
+    с translated == name и попадает в очередь перевода, которую дозаполняет tasks.translate.translate_pending.
+    """
     try:
-        normalized_text = ' '.join(text.strip().split())
-        if not normalized_text:
-            return text.capitalize()
-        
-        response = await client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "Вы переводчик. Переведите данный корейский текст на английский и верните только переведённый текст в формате JSON с ключом 'translated_text'. Не добавляйте пояснений или лишнего текста."},
-                {"role": "user", "content": normalized_text}
-            ],
-            max_tokens=100,
-            temperature=0.7,
-        )
-        
-        response_text = response.choices[0].message.content.strip()
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-        json_content = json_match.group(1) if json_match else response_text
-        
-        try:
-            translation_data = json.loads(json_content)
-            translated_text = translation_data.get('translated_text', text)
-        except json.JSONDecodeError:
-            print(f"Ошибка парсинга JSON из ответа: {response_text}")
-            translated_text = text
-        
-        normalized_translated = ' '.join(translated_text.strip().split())
-        return normalized_translated.capitalize() if normalized_translated else text.capitalize()
+        translated = await lookup_translation(text, context)
     except Exception as e:
-        print(f"Ошибка перевода текста '{text}' (контекст: {context}): {e}")
-        return text.capitalize()
+        print(f"Ошибка поиска перевода '{text}' (контекст: {context}): {e}")
+        translated = None
+    return translated or text
 
-async def fetch_api_data(page: zd.Tab, url: str):
+async def fetch_api_data(page: zd.Tab, url: str, stats: CrawlRunStats = None):
     """Получает данные из API через браузер."""
-    await page.get(url)
-    await page.wait(5)  # Ждём полной загрузки ответа API
-    text = await page.get_content()
+    if stats:
+        with stats.timed("fetch"):
+            await page.get(url)
+            await page.wait(5)  # Ждём полной загрузки ответа API
+            text = await page.get_content()
+        stats.bytes_transferred += len(text.encode())
+    else:
+        await page.get(url)
+        await page.wait(5)  # Ждём полной загрузки ответа API
+        text = await page.get_content()
     soup = bs4.BeautifulSoup(text, "html.parser")
     try:
         data = json.loads(soup.text)
@@ -85,7 +59,7 @@ async def get_exchange_rate():
                 print(f"Ошибка получения курса обмена: {response.status}")
                 return None
 
-async def parse_cars(car_type: str, max_pages: int = None):
+async def parse_cars(car_type: str, max_pages: int = None, stats: CrawlRunStats = None):
     """Генератор, возвращающий машины постранично из API через браузер."""
     base_url = "https://api.encar.com/search/car/list/mobile"
     if car_type == 'kor':
@@ -123,7 +97,9 @@ async def parse_cars(car_type: str, max_pages: int = None):
             encoded_params = "&".join(f"{k}={urllib.parse.quote(str(v))}" for k, v in params.items())
             api_url = f"{base_url}?{encoded_params}"
             
-            data = await fetch_api_data(page, api_url)
+            data = await fetch_api_data(page, api_url, stats)
+            if stats:
+                stats.pages_fetched += 1
             if not data or 'SearchResults' not in data or not data['SearchResults']:
                 print(f"Страница {page_num} не содержит машин, завершаем парсинг {car_type}.")
                 break
@@ -139,157 +115,149 @@ async def parse_cars(car_type: str, max_pages: int = None):
     finally:
         await browser.stop()
 
-async def parse_car_details(page: zd.Tab, car_id: str):
+async def parse_car_details(page: zd.Tab, car_id: str, stats: CrawlRunStats = None):
     """Получает подробную информацию о машине из API через браузер."""
     url = f"https://api.encar.com/v1/readside/vehicle/{car_id}?include=ADVERTISEMENT,CATEGORY,CONDITION,CONTACT,MANAGE,OPTIONS,PHOTOS,SPEC,PARTNERSHIP,CENTER,VIEW"
-    return await fetch_api_data(page, url)
+    return await fetch_api_data(page, url, stats)
 
-async def parse_accident_summary(page: zd.Tab, car_id: str, vehicle_no: str):
+async def parse_accident_summary(page: zd.Tab, car_id: str, vehicle_no: str, stats: CrawlRunStats = None):
     """Получает историю страхования машины из API через браузер."""
     url = f"https://api.encar.com/v1/readside/record/vehicle/{car_id}/open?vehicleNo={urllib.parse.quote(vehicle_no)}"
-    return await fetch_api_data(page, url)
+    return await fetch_api_data(page, url, stats)
 
-async def fetch_car_full_info(car, exchange_rate, sem: asyncio.Semaphore, page: zd.Tab):
-    """Обрабатывает полную информацию о машине и сохраняет в базу данных."""
+async def fetch_car_full_info(car, sem: asyncio.Semaphore, page: zd.Tab, stats: CrawlRunStats):
+    """
+    Загружает детали и страховую историю машины.
+
+    Returns:
+        (car, details, accident_data) или None, если данные получить не удалось.
+    """
     async with sem:
         try:
             print(f"Обработка машины {car['Id']}")
-            details = await parse_car_details(page, car['Id'])
+            details = await parse_car_details(page, car['Id'], stats)
             if not details or 'vehicleNo' not in details:
                 print(f"Не удалось получить детали для машины {car['Id']}")
-                return
+                stats.fail("fetch")
+                return None
             
-            accident_data = await parse_accident_summary(page, car['Id'], details['vehicleNo'])
+            accident_data = await parse_accident_summary(page, car['Id'], details['vehicleNo'], stats)
             if not accident_data:
                 print(f"Не удалось получить историю аварий для машины {car['Id']}")
-                return
-            
-            async with DBApi() as db:
-                car_exists = await db.get_car_by_id(int(car['Id']))
-                if car_exists:
-                    print(f"Машина {car['Id']} уже существует, пропускаем")
-                    return
-
-            manufacture_name_original = car.get('Manufacturer', details.get('category', {}).get('manufacturerName', 'Unknown'))
-            model_name_original = car.get('ModelGroup', details.get('category', {}).get('modelName', 'Unknown'))
-            series_name_original = car.get('Model', details.get('category', {}).get('gradeName', 'Unknown'))
-            
-            manufacture_name_translated = await translate_text(manufacture_name_original, "manufacture")
-            model_name_translated = await translate_text(model_name_original, "model")
-            series_name_translated = await translate_text(series_name_original, "series")
-            
-            drive_type_original = car.get('Transmission')
-            drive_type_translated = await translate_text(drive_type_original, "drive_type") if drive_type_original else None
-            
-            async with DBApi() as db:
-                manufacture = await db.get_manufacture_by_name_and_translated(manufacture_name_original, manufacture_name_translated)
-                if not manufacture:
-                    manufacture = await db.create_manufacture(name=manufacture_name_original, translated=manufacture_name_translated)
-                car['manufacture_id'] = manufacture.id
-                
-                model = await db.get_model_by_name_and_translated(model_name_original, model_name_translated, manufactures_id=car['manufacture_id'])
-                if not model:
-                    model = await db.create_model(manufacture_id=car['manufacture_id'], name=model_name_original, translated=model_name_translated)
-                car['model_id'] = model.id
-                
-                series = await db.get_series_by_name_and_translated(series_name_original, series_name_translated, models_id=car['model_id'])
-                if not series:
-                    series = await db.create_series(models_id=car['model_id'], name=series_name_original, translated=series_name_translated)
-                car['series_id'] = series.id
-                
-                equipment_original = car.get('Badge')
-                if equipment_original:
-                    equipment_translated = await translate_text(equipment_original, "equipment")
-                    equip = await db.get_equipment_by_name_and_translated(equipment_original, equipment_translated, series_id=car['series_id'])
-                    if not equip:
-                        equip = await db.create_equipment(series_id=car['series_id'], name=equipment_original, translated=equipment_translated)
-                    car['equipment_id'] = equip.id
-                else:
-                    car['equipment_id'] = None
-                
-                engine_type_original = car.get('FuelType', details.get('spec', {}).get('fuelName'))
-                if engine_type_original:
-                    engine_type_translated = await translate_text(engine_type_original, "engine_type")
-                    eng_type = await db.get_engine_type_by_name_and_translated(engine_type_original, engine_type_translated)
-                    if not eng_type:
-                        eng_type = await db.create_engine_type(name=engine_type_original, translated=engine_type_translated)
-                    car['engine_type_id'] = eng_type.id
-                else:
-                    car['engine_type_id'] = None
-                
-                if drive_type_original:
-                    drv_type = await db.get_drive_type_by_name_and_translated(drive_type_original, drive_type_translated)
-                    if not drv_type:
-                        drv_type = await db.create_drive_type(name=drive_type_original, translated=drive_type_translated)
-                    car['drive_type_id'] = drv_type.id
-                else:
-                    car['drive_type_id'] = None
-                
-                car_color_original = car.get('Color', details.get('spec', {}).get('colorName'))
-                if car_color_original:
-                    car_color_translated = await translate_text(car_color_original, "car_color")
-                    color = await db.get_car_color_by_name_and_translated(car_color_original, car_color_translated)
-                    if not color:
-                        color = await db.create_car_color(name=car_color_original, translated=car_color_translated)
-                    car['car_color_id'] = color.id
-                else:
-                    car['car_color_id'] = None
-                
-                price_won = car.get('Price') * 10000
-                price_rub = int(price_won * exchange_rate) if price_won and exchange_rate else None
-                
-                year = car.get('Year')
-                year_month = details.get('category', {}).get('yearMonth')
-                date_release = None
-                if year or year_month:
-                    date_value = year if year else year_month
-                    date_str = str(int(float(date_value)))
-                    date_release = datetime.strptime(date_str, '%Y%m')
-                
-                publication_dttm_raw = details.get('manage', {}).get('firstAdvertisedDateTime')
-                publication_dttm = None
-                if publication_dttm_raw:
-                    publication_dttm_str = publication_dttm_raw.split('.')[0]
-                    publication_dttm = datetime.strptime(publication_dttm_str, '%Y-%m-%dT%H:%M:%S')
-                
-                check_dttm_raw = accident_data.get('regDate')
-                check_dttm = None
-                if check_dttm_raw:
-                    check_dttm_str = check_dttm_raw.split('.')[0]
-                    check_dttm = datetime.strptime(check_dttm_str, '%Y-%m-%dT%H:%M:%S')
-                
-                car_data = {
-                    'id': int(car['Id']),
-                    'manufacture_id': car['manufacture_id'],
-                    'model_id': car['model_id'],
-                    'series_id': car['series_id'],
-                    'equipment_id': car['equipment_id'],
-                    'engine_type_id': car['engine_type_id'],
-                    'drive_type_id': car['drive_type_id'],
-                    'car_color_id': car['car_color_id'],
-                    'mileage': car.get('Mileage', details.get('spec', {}).get('mileage')),
-                    'price_won': price_won,
-                    'price_rub': price_rub,
-                    'date_release': date_release,
-                    'publication_dttm': publication_dttm,
-                    'check_dttm': check_dttm,
-                    'change_ownership': accident_data.get('ownerChangeCnt'),
-                    'all_traffic_accident': accident_data.get('accidentCnt'),
-                    'traffic_accident_owner': accident_data.get('myAccidentCnt'),
-                    'traffic_accident_other': accident_data.get('otherAccidentCnt'),
-                    'repair_cost_owner': accident_data.get('myAccidentCost'),
-                    'repair_cost_other': accident_data.get('otherAccidentCost'),
-                    'theft': 1 if accident_data.get('robberCnt', 0) > 0 else 0,
-                    'flood': 1 if accident_data.get('floodTotalLossCnt', 0) > 0 else 0,
-                    'death': 1 if accident_data.get('totalLossCnt', 0) > 0 else 0,
-                    'url': f"https://fem.encar.com/cars/detail/{car['Id']}"
-                }
-                
-                print(f"Сохранение машины {car['Id']} в базу данных")
-                await db.create_car(**car_data)
-                print(f"Добавлена машина с id={car['Id']}")
+                stats.fail("fetch")
+                return None
+            return car, details, accident_data
         except Exception as e:
+            stats.fail("fetch")
             print(f"Ошибка обработки машины {car['Id']}: {e}")
+            return None
+
+async def get_dimension_names(car, details) -> dict:
+    """Собирает оригинальные названия справочников машины и их известные переводы."""
+    originals = {
+        "manufacture": car.get('Manufacturer', details.get('category', {}).get('manufacturerName', 'Unknown')),
+        "model": car.get('ModelGroup', details.get('category', {}).get('modelName', 'Unknown')),
+        "series": car.get('Model', details.get('category', {}).get('gradeName', 'Unknown')),
+        "drive_type": car.get('Transmission'),
+        "equipment": car.get('Badge'),
+        "engine_type": car.get('FuelType', details.get('spec', {}).get('fuelName')),
+        "car_color": car.get('Color', details.get('spec', {}).get('colorName')),
+    }
+    # Ключи совпадают с контекстами перевода в translation_cache
+    return {
+        key: (original, await get_known_translation(original, key)) if original else None
+        for key, original in originals.items()
+    }
+
+def build_car_data(car, details, accident_data, dimension_ids: dict, exchange_rate) -> dict:
+    """Формирует запись для таблицы cars."""
+    price_won = car.get('Price') * 10000
+    price_rub = int(price_won * exchange_rate) if price_won and exchange_rate else None
+    
+    year = car.get('Year')
+    year_month = details.get('category', {}).get('yearMonth')
+    date_release = None
+    if year or year_month:
+        date_value = year if year else year_month
+        date_str = str(int(float(date_value)))
+        date_release = datetime.strptime(date_str, '%Y%m')
+    
+    publication_dttm_raw = details.get('manage', {}).get('firstAdvertisedDateTime')
+    publication_dttm = None
+    if publication_dttm_raw:
+        publication_dttm_str = publication_dttm_raw.split('.')[0]
+        publication_dttm = datetime.strptime(publication_dttm_str, '%Y-%m-%dT%H:%M:%S')
+    
+    check_dttm_raw = accident_data.get('regDate')
+    check_dttm = None
+    if check_dttm_raw:
+        check_dttm_str = check_dttm_raw.split('.')[0]
+        check_dttm = datetime.strptime(check_dttm_str, '%Y-%m-%dT%H:%M:%S')
+    
+    return {
+        'id': int(car['Id']),
+        **dimension_ids,
+        'mileage': car.get('Mileage', details.get('spec', {}).get('mileage')),
+        'price_won': price_won,
+        'price_rub': price_rub,
+        'date_release': date_release,
+        'publication_dttm': publication_dttm,
+        'check_dttm': check_dttm,
+        'change_ownership': accident_data.get('ownerChangeCnt'),
+        'all_traffic_accident': accident_data.get('accidentCnt'),
+        'traffic_accident_owner': accident_data.get('myAccidentCnt'),
+        'traffic_accident_other': accident_data.get('otherAccidentCnt'),
+        'repair_cost_owner': accident_data.get('myAccidentCost'),
+        'repair_cost_other': accident_data.get('otherAccidentCost'),
+        'theft': 1 if accident_data.get('robberCnt', 0) > 0 else 0,
+        'flood': 1 if accident_data.get('floodTotalLossCnt', 0) > 0 else 0,
+        'death': 1 if accident_data.get('totalLossCnt', 0) > 0 else 0,
+        'url': f"https://fem.encar.com/cars/detail/{car['Id']}"
+    }
+
+async def save_cars(fetched: list, exchange_rate, stats: CrawlRunStats):
+    """Разрешает справочники сразу для всей страницы машин и сохраняет машины в базу."""
+    if not fetched:
+        return
+    stage = "translate"
+    try:
+        with stats.timed("translate"):
+            rows = [await get_dimension_names(car, details) for car, details, _ in fetched]
+        stage = "resolve"
+        async with DBApi() as db:
+            with stats.timed("resolve"):
+                dimension_ids = await resolver.resolve(db, rows)
+    except Exception as e:
+        for _ in fetched:
+            stats.fail(stage)
+        print(f"Ошибка разрешения справочников для страницы из {len(fetched)} машин: {e}")
+        return
+
+    # Все машины страницы пишутся одной транзакцией; дубликат откатывает только свой SAVEPOINT
+    saved = []
+    try:
+        with stats.timed("db_write"):
+            async with DBApi() as db:
+                async with db.unit_of_work():
+                    for (car, details, accident_data), ids in zip(fetched, dimension_ids):
+                        try:
+                            car_data = build_car_data(car, details, accident_data, ids, exchange_rate)
+                        except Exception as e:
+                            stats.fail("db_write")
+                            print(f"Ошибка подготовки машины {car['Id']}: {e}")
+                            continue
+                        created = await db.create_car(**car_data)
+                        if not created:
+                            stats.fail("db_write")
+                            continue
+                        saved.append(car['Id'])
+    except Exception as e:
+        for _ in saved:
+            stats.fail("db_write")
+        print(f"Ошибка сохранения страницы из {len(fetched)} машин: {e}")
+        return
+    stats.new_count += len(saved)
+    print(f"Добавлено машин: {len(saved)} ({', '.join(map(str, saved))})")
 
 async def parse_full_car_info(max_pages: int = None):
     """Основная функция для парсинга полной информации о машинах."""
@@ -302,24 +270,39 @@ async def parse_full_car_info(max_pages: int = None):
     page = await browser.get('https://car.encar.com/list/car?page=1&search=%7B%22type%22%3A%22ev%22%2C%22action%22%3A%22(And.Hidden.N._.CarType.A._.GreenType.Y.)%22%2C%22title%22%3A%22%EC%A0%84%EA%B8%B0%C2%B7%EC%B9%9C%ED%99%98%EA%B2%BD%22%2C%22toggle%22%3A%7B%7D%2C%22layer%22%3A%22%22%2C%22sort%22%3A%22MobileModifiedDate%22%7D')
     await page.wait(20)  # Ждём полной загрузки страницы и API-запросов
     
+    stats = CrawlRunStats("full")
+    await stats.start()
+    await seed_from_dimensions()
+    async with DBApi() as db:
+        await resolver.refresh(db)
     try:
         for car_type in ['kor', 'ev']:
             print(f"Парсинг машин типа '{car_type}'...")
-            async for page_cars in parse_cars(car_type, max_pages):
+            async for page_cars in parse_cars(car_type, max_pages, stats):
                 async with DBApi() as db_temp:
-                    existing_ids = set(await db_temp.get_all_car_ids())
-                new_cars = [car for car in page_cars if car['Id'] not in existing_ids]
+                    # Известные машины отмечаются как живые, архивные возвращаются в car
+                    known_ids, restored_ids = await db_temp.mark_cars_seen([int(car['Id']) for car in page_cars])
+                existing_ids = known_ids | restored_ids
+                new_cars = [car for car in page_cars if int(car['Id']) not in existing_ids]
                 print(f"Найдено {len(new_cars)} новых машин из {len(page_cars)} на странице")
+                stats.listings_seen += len(page_cars)
+                # Обновлёнными считаются объявления, вернувшиеся из архива; остальные известные пропускаются
+                stats.updated_count += len(restored_ids)
+                stats.skipped_count += len(known_ids)
                 
                 sem = asyncio.Semaphore(1)
-                tasks = [fetch_car_full_info(car, exchange_rate, sem, page) for car in new_cars]
-                await asyncio.gather(*tasks, return_exceptions=True)
+                tasks = [fetch_car_full_info(car, sem, page, stats) for car in new_cars]
+                fetched = [result for result in await asyncio.gather(*tasks) if result]
+                await save_cars(fetched, exchange_rate, stats)
+                await stats.flush()
                 
                 del page_cars
                 del new_cars
+                del fetched
                 await asyncio.sleep(1)
     finally:
         await browser.stop()
+        await stats.finish()
     
     print("Парсинг завершён.")
 
@@ -8,25 +8,31 @@ from twocaptcha import TwoCaptcha
 from database import DBApi
 import urllib.parse
 import re
-from deep_translator import GoogleTranslator
+from typing import Optional
+from translation.provider import GoogleProvider
 
 # Глобальный браузер
 browser = None
 
 # Глобальный объект переводчика
-translator = GoogleTranslator(source='ko', target='ru')
+translator = GoogleProvider(source='ko', target='ru')
 
-async def translate_text(text: str) -> str:
-    """Переводит текст с корейского на русский, возвращает None при ошибке."""
+async def translate_text(text: str) -> Optional[str]:
+    """Переводит текст с корейского на русский; при ошибке или недоступности переводчика возвращает None."""
     if text and not all(ord(c) < 128 for c in text):  # Проверяем, что текст не на ASCII (корейский)
-        try:
-            translated = translator.translate(text)
-            return translated
-        except Exception as e:
-            print(f"Ошибка перевода '{text}': {e}")
-            return None  # Возвращаем None при ошибке перевода
+        return await translator.translate(text)
     return text  # Если текст уже на ASCII, возвращаем его как есть
 
+async def create_dimension(db: DBApi, create, translated: Optional[str], **fields):
+    """
+    Создаёт запись справочника; без перевода сохраняет translated = name
+    и ставит запись в очередь, которую дозаполняет tasks.translate.translate_pending.
+    """
+    record = await create(translated=translated or fields["name"], **fields)
+    if translated is None:
+        await db.enqueue_translations(type(record), [record.id])
+    return record
+
 async def init_browser():
     """Инициализирует глобальный браузер."""
     global browser
@@ -350,19 +356,19 @@ async def fetch_car_full_info(car, exchange_rate, sem: asyncio.Semaphore):
                 # Работа с manufacture (поиск по name)
                 manufacture = await db.get_manufacture_by_name(manufacture_name_original)
                 if not manufacture:
-                    manufacture = await db.create_manufacture(name=manufacture_name_original, translated=manufacture_name_translated)
+                    manufacture = await create_dimension(db, db.create_manufacture, manufacture_name_translated, name=manufacture_name_original)
                 car['manufacture_id'] = manufacture.id
                 
                 # Работа с model (поиск по name)
                 model = await db.get_model_by_name(model_name_original)
                 if not model:
-                    model = await db.create_model(manufacture_id=car['manufacture_id'], name=model_name_original, translated=model_name_translated)
+                    model = await create_dimension(db, db.create_model, model_name_translated, manufacture_id=car['manufacture_id'], name=model_name_original)
                 car['model_id'] = model.id
                 
                 # Работа с series (поиск по name)
                 series = await db.get_series_by_name(series_name_original)
                 if not series:
-                    series = await db.create_series(models_id=car['model_id'], name=series_name_original, translated=series_name_translated)
+                    series = await create_dimension(db, db.create_series, series_name_translated, models_id=car['model_id'], name=series_name_original)
                 car['series_id'] = series.id
                 
                 # Работа с equipment (поиск по name)
@@ -371,7 +377,7 @@ async def fetch_car_full_info(car, exchange_rate, sem: asyncio.Semaphore):
                     equipment_translated = await translate_text(equipment_original)
                     equip = await db.get_equipment_by_name(equipment_original)
                     if not equip:
-                        equip = await db.create_equipment(series_id=car['series_id'], name=equipment_original, translated=equipment_translated)
+                        equip = await create_dimension(db, db.create_equipment, equipment_translated, series_id=car['series_id'], name=equipment_original)
                     car['equipment_id'] = equip.id
                 else:
                     car['equipment_id'] = None
@@ -382,7 +388,7 @@ async def fetch_car_full_info(car, exchange_rate, sem: asyncio.Semaphore):
                     engine_type_translated = await translate_text(engine_type_original)
                     eng_type = await db.get_engine_type_by_name(engine_type_original)
                     if not eng_type:
-                        eng_type = await db.create_engine_type(name=engine_type_original, translated=engine_type_translated)
+                        eng_type = await create_dimension(db, db.create_engine_type, engine_type_translated, name=engine_type_original)
                     car['engine_type_id'] = eng_type.id
                 else:
                     car['engine_type_id'] = None
@@ -404,7 +410,7 @@ async def fetch_car_full_info(car, exchange_rate, sem: asyncio.Semaphore):
                     car_color_translated = await translate_text(car_color_original)
                     color = await db.get_car_color_by_name(car_color_original)
                     if not color:
-                        color = await db.create_car_color(name=car_color_original, translated=car_color_translated)
+                        color = await create_dimension(db, db.create_car_color, car_color_translated, name=car_color_original)
                     car['car_color_id'] = color.id
                 else:
                     car['car_color_id'] = None
@@ -455,7 +461,8 @@ async def parse_full_car_info(max_pages: int = None):
             print(f"Парсинг автомобилей типа '{car_type}'...")
             async for page_cars in parse_cars(car_type, max_pages):
                 async with DBApi() as db:
-                    existing_ids = set(await db.get_all_car_ids())
+                    known_ids, restored_ids = await db.mark_cars_seen([car['id'] for car in page_cars])
+                    existing_ids = known_ids | restored_ids
                     new_cars = [car for car in page_cars if car['id'] not in existing_ids]
                     print(f"Найдено новых автомобилей на странице: {len(new_cars)} из {len(page_cars)}")
                 
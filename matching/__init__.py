@@ -0,0 +1,4 @@
+from .canonical import FilterGroup, predicate_hash
+from .index import FilterIndex, FilterRule, filter_index
+
+__all__ = ['FilterGroup', 'FilterIndex', 'FilterRule', 'filter_index', 'predicate_hash']
@@ -0,0 +1,49 @@
+"""
+Канонический вид условий фильтра.
+
+Пользователи часто заводят одинаковые фильтры («Hyundai Sonata до 100 тыс. км»). Условия
+фильтра без владельца и времени создания сводятся к хэшу: поля-справочники, отсортированный
+набор комплектаций и нормализованные диапазоны. Фильтры с одинаковым хэшем образуют группу,
+которая проверяется против машины один раз, а совпадение раздаётся всем её фильтрам —
+у каждого остаются свои отметки о просмотре и водяной знак.
+"""
+import hashlib
+from datetime import datetime
+from typing import Dict
+
+# Поля условий, входящие в хэш; id, user_id и create_dttm у каждого фильтра свои
+PREDICATE_FIELDS = [
+    "manufacture_id", "model_id", "series_id", "engine_type_id", "drive_type_id", "car_color_id",
+    "equipment_ids", "mileage_from", "mileage_defore", "price_from", "price_defore",
+    "date_release_from", "date_release_defore",
+]
+
+
+def _normalize(value):
+    if isinstance(value, frozenset):
+        return ",".join(str(item) for item in sorted(value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if value is None else str(value)
+
+
+def predicate_hash(rule) -> str:
+    """Хэш условий FilterRule: у фильтров, отбирающих одни и те же машины, он совпадает."""
+    canonical = "|".join(f"{field}={_normalize(getattr(rule, field))}" for field in PREDICATE_FIELDS)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class FilterGroup:
+    """Фильтры с одинаковыми условиями; rule — общие условия без владельца и времени создания."""
+
+    __slots__ = ("key", "rule", "members")
+
+    def __init__(self, key: str, rule):
+        self.key = key
+        self.rule = rule._replace(id=None, user_id=None, create_dttm=None)
+        self.members: Dict[int, "FilterRule"] = {}
+
+    def __repr__(self):
+        return f"<FilterGroup(key={self.key}, members={len(self.members)})>"
@@ -0,0 +1,360 @@
+"""
+Обратный индекс фильтров для подбора машин в памяти процесса.
+
+Каждый фильтр лежит ровно в одной корзине — по самому избирательному из заданных
+полей-равенств (комплектации, серия, модель, марка, двигатель, привод, цвет) или в общей
+корзине, если таких полей нет. Фильтр с несколькими комплектациями лежит в корзине каждой
+из них; у машины одна комплектация, поэтому повторов не бывает. Машина проверяется
+только против фильтров из корзин своих значений. Внутри корзины фильтры разложены в отсортированные
+списки по каждой границе цены, пробега и года выпуска; бинпоиск в каждом списке даёт непрерывный
+отрезок фильтров, которые эта граница пропускает, и машина проверяется только против самого
+короткого из отрезков. Оставшиеся кандидаты проверяются FilterRule.matches — теми же условиями,
+что car_filter_conditions.
+
+В корзинах лежат не сами фильтры, а группы фильтров с одинаковыми условиями (matching/canonical.py):
+условия группы проверяются один раз, а новизна машины — для каждого фильтра группы.
+"""
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from database.db_api import FILTERS_CHANNEL
+from database.notify import listener
+from matching.canonical import FilterGroup, predicate_hash
+
+# Поля-равенства фильтра в порядке избирательности: первое заданное становится корзиной
+ANCHOR_FIELDS = ["series_id", "model_id", "manufacture_id", "engine_type_id", "drive_type_id", "car_color_id"]
+ANY = ("any", None)
+# Границы диапазонов: (поле фильтра, поле машины, нижняя ли это граница)
+RANGE_BOUNDS = [
+    ("price_from", "price_rub", True),
+    ("price_defore", "price_rub", False),
+    ("mileage_from", "mileage", True),
+    ("mileage_defore", "mileage", False),
+    ("date_release_from", "date_release", True),
+    ("date_release_defore", "date_release", False),
+]
+
+
+class FilterRule(NamedTuple):
+    """Неизменяемая копия условий фильтра; незаданные поля (None или 0) не ограничивают выборку."""
+    id: int
+    user_id: int
+    create_dttm: Optional[datetime]
+    manufacture_id: Optional[int]
+    model_id: Optional[int]
+    series_id: Optional[int]
+    engine_type_id: Optional[int]
+    drive_type_id: Optional[int]
+    car_color_id: Optional[int]
+    equipment_ids: frozenset
+    mileage_from: Optional[int]
+    mileage_defore: Optional[int]
+    price_from: Optional[int]
+    price_defore: Optional[int]
+    date_release_from: Optional[datetime]
+    date_release_defore: Optional[datetime]
+
+    @classmethod
+    def from_filter(cls, filter_obj, equipment_ids: Iterable[int] = ()) -> "FilterRule":
+        return cls(
+            id=filter_obj.id,
+            user_id=filter_obj.user_id,
+            create_dttm=filter_obj.create_dttm,
+            manufacture_id=filter_obj.manufacture_id or None,
+            model_id=filter_obj.model_id or None,
+            series_id=filter_obj.series_id or None,
+            engine_type_id=filter_obj.engine_type_id or None,
+            drive_type_id=filter_obj.drive_type_id or None,
+            car_color_id=filter_obj.car_color_id or None,
+            equipment_ids=frozenset(equipment_ids),
+            mileage_from=filter_obj.mileage_from or None,
+            mileage_defore=filter_obj.mileage_defore or None,
+            price_from=filter_obj.price_from or None,
+            price_defore=filter_obj.price_defore or None,
+            date_release_from=filter_obj.date_release_from or None,
+            date_release_defore=filter_obj.date_release_defore or None,
+        )
+
+    def anchors(self) -> List[Tuple[str, Optional[int]]]:
+        """Корзины индекса, в которых лежит фильтр."""
+        if self.equipment_ids:
+            return [("equipment_id", equipment_id) for equipment_id in self.equipment_ids]
+        for field in ANCHOR_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                return [(field, value)]
+        return [ANY]
+
+    def matches(self, car) -> bool:
+        """Проверяет машину условиями car_filter_conditions и новизной относительно фильтра."""
+        # Проверки развёрнуты вручную: метод вызывается для каждого кандидата из корзины
+        if not self.is_new(car):
+            return False
+        if self.series_id is not None and car.series_id != self.series_id:
+            return False
+        if self.model_id is not None and car.model_id != self.model_id:
+            return False
+        if self.manufacture_id is not None and car.manufacture_id != self.manufacture_id:
+            return False
+        if self.engine_type_id is not None and car.engine_type_id != self.engine_type_id:
+            return False
+        if self.drive_type_id is not None and car.drive_type_id != self.drive_type_id:
+            return False
+        if self.car_color_id is not None and car.car_color_id != self.car_color_id:
+            return False
+        if self.equipment_ids and car.equipment_id not in self.equipment_ids:
+            return False
+        # В SQL сравнение с NULL ложно, поэтому машина без значения не проходит заданную границу
+        if self.price_from is not None and (car.price_rub is None or car.price_rub < self.price_from):
+            return False
+        if self.price_defore is not None and (car.price_rub is None or car.price_rub > self.price_defore):
+            return False
+        if self.mileage_from is not None and (car.mileage is None or car.mileage < self.mileage_from):
+            return False
+        if self.mileage_defore is not None and (car.mileage is None or car.mileage > self.mileage_defore):
+            return False
+        if self.date_release_from is not None and (car.date_release is None or car.date_release < self.date_release_from):
+            return False
+        if self.date_release_defore is not None and (car.date_release is None or car.date_release > self.date_release_defore):
+            return False
+        return True
+
+    def is_new(self, car) -> bool:
+        """Машина добавлена после создания фильтра."""
+        return self.create_dttm is None or (car.create_dttm is not None and car.create_dttm > self.create_dttm)
+
+
+class _BoundList:
+    """
+    Группы корзины, отсортированные по одной границе диапазона.
+
+    Ключ — кортеж, чтобы незаданная граница сравнивалась с любым значением: нижние границы
+    идут по возрастанию с незаданными в начале, верхние — по возрастанию с незаданными в конце.
+    Тогда группы, пропускающие значение машины, — префикс списка для нижней границы и суффикс для верхней.
+    """
+
+    __slots__ = ("field", "lower", "keys", "groups")
+
+    def __init__(self, field: str, lower: bool):
+        self.field = field
+        self.lower = lower
+        self.keys: list = []
+        self.groups: List[FilterGroup] = []
+
+    def key(self, group: FilterGroup) -> tuple:
+        bound = getattr(group.rule, self.field)
+        if self.lower:
+            return (0,) if bound is None else (1, bound)
+        return (1,) if bound is None else (0, bound)
+
+    def add(self, group: FilterGroup):
+        key = self.key(group)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.groups.insert(position, group)
+
+    def remove(self, group: FilterGroup):
+        key = self.key(group)
+        for position in range(bisect_left(self.keys, key), bisect_right(self.keys, key)):
+            if self.groups[position].key == group.key:
+                del self.keys[position]
+                del self.groups[position]
+                return
+
+    def sort(self):
+        self.groups.sort(key=self.key)
+        self.keys = [self.key(group) for group in self.groups]
+
+    def passing(self, value) -> Tuple[int, int]:
+        """Отрезок [start, end) групп, чья граница пропускает значение машины."""
+        # В SQL сравнение с NULL ложно: машину без значения пропускают только группы без этой границы
+        if self.lower:
+            return 0, bisect_right(self.keys, (0,) if value is None else (1, value))
+        return bisect_left(self.keys, (1,) if value is None else (0, value)), len(self.keys)
+
+
+class _Bucket:
+    """Группы фильтров одной корзины, разложенные по спискам границ диапазонов."""
+
+    __slots__ = ("bounds",)
+
+    def __init__(self):
+        self.bounds = [(_BoundList(field, lower), car_field) for field, car_field, lower in RANGE_BOUNDS]
+
+    @property
+    def groups(self) -> List[FilterGroup]:
+        return self.bounds[0][0].groups
+
+    def add(self, group: FilterGroup):
+        for bound, _ in self.bounds:
+            bound.add(group)
+
+    def append(self, group: FilterGroup):
+        """Добавляет группу без сортировки; после всех append нужен sort."""
+        for bound, _ in self.bounds:
+            bound.groups.append(group)
+
+    def sort(self):
+        for bound, _ in self.bounds:
+            bound.sort()
+
+    def remove(self, group: FilterGroup):
+        for bound, _ in self.bounds:
+            bound.remove(group)
+
+    def candidates(self, car) -> List[FilterGroup]:
+        # Каждая граница отсекает свою часть групп; проверяем самый короткий из отрезков
+        best, best_start, best_end = None, 0, -1
+        for bound, car_field in self.bounds:
+            start, end = bound.passing(getattr(car, car_field))
+            if best is None or end - start < best_end - best_start:
+                best, best_start, best_end = bound, start, end
+                if start >= end:
+                    break
+        return best.groups[best_start:best_end]
+
+
+class FilterIndex:
+    """
+    Индекс всех фильтров процесса.
+
+    Загружается из filters и filter_equipment целиком; DBApi при изменении фильтра
+    поднимает filter_version и шлёт NOTIFY filters_changed с id фильтра. При активном
+    слушателе refresh перечитывает только изменённые фильтры, иначе сверяет версию
+    и при расхождении загружает индекс заново.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._rules: Dict[int, FilterRule] = {}
+        # Хэш условий фильтра (predicate_hash) у каждого фильтра и группы по хэшам
+        self._keys: Dict[int, str] = {}
+        self._groups: Dict[str, FilterGroup] = {}
+        self._buckets: Dict[Tuple[str, Optional[int]], _Bucket] = {}
+        self._changed: Set[int] = set()
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def group_count(self) -> int:
+        """Число различных условий среди фильтров — столько проверок стоит одна машина в худшем случае."""
+        return len(self._groups)
+
+    def dedup_ratio(self) -> float:
+        """Во сколько раз фильтров больше, чем различных условий."""
+        return len(self._rules) / len(self._groups) if self._groups else 1.0
+
+    def add(self, rule: FilterRule):
+        """Добавляет фильтр, заменяя прежнюю версию с тем же id."""
+        self.remove(rule.id)
+        key = predicate_hash(rule)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = FilterGroup(key, rule)
+            for anchor in rule.anchors():
+                self._buckets.setdefault(anchor, _Bucket()).add(group)
+        group.members[rule.id] = rule
+        self._rules[rule.id] = rule
+        self._keys[rule.id] = key
+
+    def remove(self, filter_id: int):
+        rule = self._rules.pop(filter_id, None)
+        if rule is None:
+            return
+        key = self._keys.pop(filter_id)
+        group = self._groups[key]
+        del group.members[filter_id]
+        if group.members:
+            return
+        del self._groups[key]
+        for anchor in rule.anchors():
+            bucket = self._buckets[anchor]
+            bucket.remove(group)
+            if not bucket.groups:
+                del self._buckets[anchor]
+
+    def build(self, rules: Iterable[FilterRule]):
+        """Строит индекс заново из набора фильтров."""
+        self._rules = {}
+        self._keys = {}
+        self._groups = {}
+        self._buckets = {}
+        for rule in rules:
+            key = predicate_hash(rule)
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = FilterGroup(key, rule)
+                for anchor in rule.anchors():
+                    self._buckets.setdefault(anchor, _Bucket()).append(group)
+            group.members[rule.id] = rule
+            self._rules[rule.id] = rule
+            self._keys[rule.id] = key
+        for bucket in self._buckets.values():
+            bucket.sort()
+
+    def match(self, car) -> List[FilterRule]:
+        """Фильтры, которым подходит машина."""
+        matched = []
+        probes = [("equipment_id", car.equipment_id)] + [(field, getattr(car, field)) for field in ANCHOR_FIELDS] + [ANY]
+        for anchor in probes:
+            bucket = self._buckets.get(anchor)
+            if bucket is None:
+                continue
+            for group in bucket.candidates(car):
+                if group.rule.matches(car):
+                    matched.extend(rule for rule in group.members.values() if rule.is_new(car))
+        return matched
+
+    def route(self, cars: Iterable) -> Dict[int, list]:
+        """Раскладывает машины по фильтрам: {id фильтра: [машины в исходном порядке]}."""
+        routed: Dict[int, list] = {}
+        for car in cars:
+            for rule in self.match(car):
+                routed.setdefault(rule.id, []).append(car)
+        return routed
+
+    def get(self, filter_id: int) -> Optional[FilterRule]:
+        return self._rules.get(filter_id)
+
+    def mark_changed(self, payload: Optional[str] = None):
+        """Обработчик уведомления: id изменённого фильтра, None — перечитать всё."""
+        if payload is None or not payload.isdigit():
+            self.version = None
+        else:
+            self._changed.add(int(payload))
+
+    async def load(self, db):
+        """Загружает все фильтры с комплектациями."""
+        started = time.perf_counter()
+        listener.listen(FILTERS_CHANNEL, self.mark_changed)
+        self._changed.clear()
+        version = await db.get_filter_version()
+        equipment = await db.get_all_filter_equipment()
+        self.build(FilterRule.from_filter(filter_obj, equipment.get(filter_obj.id, ())) for filter_obj in await db.get_all_filters())
+        self.version = version
+        print(
+            f"Фильтры загружены в индекс: {len(self._rules)}, различных условий {len(self._groups)} "
+            f"(x{self.dedup_ratio():.2f}) за {time.perf_counter() - started:.2f} с (версия {version})"
+        )
+
+    async def refresh(self, db):
+        """Подтягивает изменения фильтров из базы."""
+        if self.version is None:
+            await self.load(db)
+        elif listener.listening(FILTERS_CHANNEL):
+            changed, self._changed = self._changed, set()
+            for filter_id in changed:
+                filter_obj = await db.get_filter_by_id(filter_id)
+                if filter_obj is None:
+                    self.remove(filter_id)
+                else:
+                    self.add(FilterRule.from_filter(filter_obj, await db.get_equipment_ids_by_filter(filter_id)))
+        elif await db.get_filter_version() != self.version:
+            await self.load(db)
+
+
+# Один индекс на процесс
+filter_index = FilterIndex()
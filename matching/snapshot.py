@@ -0,0 +1,308 @@
+"""
+Колоночный снимок каталога машин для подбора по одному фильтру.
+
+Файл CAR_SNAPSHOT_PATH — заголовок HEADER_SIZE байт и колонки COLUMNS подряд как int64
+(даты — микросекунды от 1970-01-01, NULL — NULL_VALUE), строки отсортированы от новых
+машин к старым по (create_dttm, id), как листает кнопка «Ещё». Читатели отображают файл
+в память (np.memmap), так что старт мгновенный, а страницы файла общие для всех процессов.
+Условия фильтра считаются векторно по колонкам.
+
+Снимок ведёт task_parser.py (refresh_car_snapshot после каждого прохода, вручную —
+python -m matching.snapshot [--full]): дочитывает машины, изменённые после прошлой сборки,
+и выкидывает ушедшие в архив; раз в CAR_SNAPSHOT_FULL_REBUILD_HOURS снимок собирается заново.
+Новый файл пишется рядом и подменяет старый через os.replace — читатели со старым
+отображением дочитывают его спокойно.
+Машины новее снимка get_next_cars берёт из базы, а кандидатов из снимка перепроверяет
+по текущим строкам car, поэтому устаревший снимок даёт только задержку, а не лишние машины.
+"""
+import argparse
+import asyncio
+import os
+import struct
+import time
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME,
+    CAR_SNAPSHOT_PATH, CAR_SNAPSHOT_FULL_REBUILD_HOURS, CAR_SNAPSHOT_DELTA_LIMIT, MATCH_OVERLAP_SECONDS
+)
+from database import DBApi
+from database.db_session import global_init
+from database.car import Car
+from matching.index import ANCHOR_FIELDS, FilterRule
+
+COLUMNS = [
+    "id", "create_dttm", "manufacture_id", "model_id", "series_id", "equipment_id",
+    "engine_type_id", "drive_type_id", "car_color_id", "mileage", "price_rub", "date_release",
+]
+DATETIME_COLUMNS = {"create_dttm", "date_release"}
+NULL_VALUE = np.iinfo(np.int64).min
+MAGIC = b"CARSNAP1"
+# magic, число колонок, число строк, время сборки (мкс)
+HEADER = struct.Struct("<8sqqq")
+HEADER_SIZE = 64
+EPOCH = datetime(1970, 1, 1)
+# Строк car за одну выборку при сборке
+PAGE_SIZE = 10000
+
+Cursor = Optional[Tuple[datetime, int]]
+
+
+def to_us(value: Optional[datetime]) -> int:
+    return NULL_VALUE if value is None else (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_us(value) -> datetime:
+    return EPOCH + timedelta(microseconds=int(value))
+
+
+def rows_to_columns(rows: list) -> np.ndarray:
+    """Строки (в порядке COLUMNS) в массив колонок формы (len(COLUMNS), len(rows))."""
+    converted = [
+        [to_us(value) if name in DATETIME_COLUMNS else (NULL_VALUE if value is None else value)
+         for name, value in zip(COLUMNS, row)]
+        for row in rows
+    ]
+    return np.array(converted, dtype=np.int64).reshape(len(rows), len(COLUMNS)).T
+
+
+def after_cursor(car: Car, cursor: Cursor) -> bool:
+    """Машина идёт после курсора «Ещё» в порядке (create_dttm, id) по убыванию."""
+    return cursor is None or (car.create_dttm, car.id) < cursor
+
+
+class CarSnapshot:
+    """Отображённый в память снимок."""
+
+    def __init__(self, columns: np.ndarray, built_at: datetime):
+        self.columns = columns
+        self.built_at = built_at
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[COLUMNS.index(name)]
+
+    def __len__(self):
+        return self.columns.shape[1]
+
+    @property
+    def high_water(self) -> Tuple[datetime, int]:
+        """Самая новая машина снимка (create_dttm, id)."""
+        if not len(self):
+            return EPOCH, 0
+        return from_us(self.column("create_dttm")[0]), int(self.column("id")[0])
+
+    @classmethod
+    def open(cls, path: str) -> Optional["CarSnapshot"]:
+        try:
+            with open(path, "rb") as file:
+                magic, column_count, row_count, built_at = HEADER.unpack(file.read(HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return None
+        if magic != MAGIC or column_count != len(COLUMNS):
+            print(f"Снимок {path} в другом формате, пропускаем")
+            return None
+        if row_count:
+            columns = np.memmap(path, dtype="<i8", mode="r", offset=HEADER_SIZE, shape=(column_count, row_count))
+        else:
+            columns = np.empty((column_count, 0), dtype=np.int64)
+        return cls(columns, from_us(built_at))
+
+    def mask(self, rule: FilterRule, cursor: Cursor = None) -> np.ndarray:
+        """Строки, подходящие под условия фильтра (car_filter_conditions) и идущие после курсора."""
+        mask = np.ones(len(self), dtype=bool)
+        for field in ANCHOR_FIELDS:
+            value = getattr(rule, field)
+            if value is not None:
+                mask &= self.column(field) == value
+        if rule.equipment_ids:
+            mask &= np.isin(self.column("equipment_id"), list(rule.equipment_ids))
+        for name, low, high in (
+            ("mileage", rule.mileage_from, rule.mileage_defore),
+            ("price_rub", rule.price_from, rule.price_defore),
+            ("date_release", rule.date_release_from, rule.date_release_defore),
+        ):
+            if low is None and high is None:
+                continue
+            values = self.column(name)
+            # NULL не проходит заданную границу, как и в SQL
+            mask &= values != NULL_VALUE
+            if name in DATETIME_COLUMNS:
+                low, high = (to_us(low) if low else None), (to_us(high) if high else None)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        create = self.column("create_dttm")
+        if rule.create_dttm is not None:
+            mask &= create > to_us(rule.create_dttm)
+        if cursor is not None:
+            cursor_us, cursor_id = to_us(cursor[0]), cursor[1]
+            mask &= (create < cursor_us) | ((create == cursor_us) & (self.column("id") < cursor_id))
+        return mask
+
+    def count(self, rule: FilterRule, cursor: Cursor = None, exclude_ids: List[int] = ()) -> int:
+        """Число машин снимка под фильтром, кроме exclude_ids."""
+        mask = self.mask(rule, cursor)
+        if len(exclude_ids):
+            mask &= ~np.isin(self.column("id"), exclude_ids)
+        return int(np.count_nonzero(mask))
+
+    def iter_matches(self, rule: FilterRule, cursor: Cursor = None, chunk_size: int = 50) -> Iterator[List[int]]:
+        """id подходящих машин от новых к старым, пачками по chunk_size."""
+        ids = self.column("id")[np.flatnonzero(self.mask(rule, cursor))]
+        for start in range(0, len(ids), chunk_size):
+            yield ids[start:start + chunk_size].tolist()
+
+
+def write_snapshot(path: str, columns: np.ndarray, built_at: datetime):
+    """Сортирует строки от новых к старым и атомарно подменяет файл снимка."""
+    # lexsort сортирует по последнему ключу, затем по предыдущим; разворот даёт убывание
+    order = np.lexsort((columns[COLUMNS.index("id")], columns[COLUMNS.index("create_dttm")]))[::-1]
+    columns = np.ascontiguousarray(columns[:, order], dtype="<i8")
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(COLUMNS), columns.shape[1], to_us(built_at)).ljust(HEADER_SIZE, b"\0"))
+        file.write(columns.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+async def _read_rows(db: DBApi, updated_since: datetime = None) -> np.ndarray:
+    chunks = []
+    after_id = 0
+    while True:
+        rows = await db.get_car_rows(COLUMNS, after_id, PAGE_SIZE, updated_since)
+        if rows:
+            chunks.append(rows_to_columns(rows))
+            after_id = rows[-1][0]
+        if len(rows) < PAGE_SIZE:
+            break
+    return np.concatenate(chunks, axis=1) if chunks else np.empty((len(COLUMNS), 0), dtype=np.int64)
+
+
+async def refresh_car_snapshot(path: str = CAR_SNAPSHOT_PATH, full: bool = False):
+    """Дописывает в снимок изменения car с прошлой сборки или собирает его заново."""
+    started = time.perf_counter()
+    snapshot = CarSnapshot.open(path)
+    if snapshot is not None and datetime.now() - snapshot.built_at > timedelta(hours=CAR_SNAPSHOT_FULL_REBUILD_HOURS):
+        full = True
+    # Машины, закоммиченные с опозданием, попадут в следующую сборку за счёт перекрытия
+    built_at = datetime.now() - timedelta(seconds=MATCH_OVERLAP_SECONDS)
+    # Основная база: на реплике последних изменений может ещё не быть
+    async with DBApi() as db:
+        if snapshot is None or full:
+            columns = await _read_rows(db)
+            changed, removed = columns.shape[1], 0
+        else:
+            changed_columns = await _read_rows(db, snapshot.built_at)
+            archived_ids = await db.get_archived_car_ids_since(snapshot.built_at)
+            stale_ids = np.concatenate([changed_columns[COLUMNS.index("id")], np.array(archived_ids, dtype=np.int64)])
+            keep = ~np.isin(snapshot.column("id"), stale_ids)
+            columns = np.concatenate([snapshot.columns[:, keep], changed_columns], axis=1)
+            changed, removed = changed_columns.shape[1], int(len(snapshot) - np.count_nonzero(keep))
+    write_snapshot(path, columns, built_at)
+    print(
+        f"Снимок каталога {'собран' if snapshot is None or full else 'обновлён'}: {columns.shape[1]} машин, "
+        f"изменено {changed}, удалено {removed}, за {time.perf_counter() - started:.2f} с"
+    )
+
+
+class SnapshotReader:
+    """Текущий снимок процесса; переоткрывает файл, когда его подменили."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[CarSnapshot] = None
+        self._stat_key = None
+
+    def current(self) -> Optional[CarSnapshot]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._snapshot, self._stat_key = None, None
+            return None
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._stat_key:
+            self._snapshot, self._stat_key = CarSnapshot.open(self.path), stat_key
+        return self._snapshot
+
+
+# Один читатель на процесс
+car_snapshot = SnapshotReader(CAR_SNAPSHOT_PATH)
+
+
+async def get_next_cars(db: DBApi, filter_obj, limit: int) -> List[Car]:
+    """
+    То же, что DBApi.get_next_cars_by_filter, но кандидаты берутся из снимка.
+
+    Без снимка или когда машин новее снимка больше CAR_SNAPSHOT_DELTA_LIMIT, запрос уходит в SQL.
+    """
+    snapshot = car_snapshot.current()
+    if snapshot is None or not limit:
+        return await db.get_next_cars_by_filter(filter_obj.id, filter_obj.user_id, limit=limit)
+    fresh = await db.get_cars_created_after(*snapshot.high_water, CAR_SNAPSHOT_DELTA_LIMIT)
+    if len(fresh) >= CAR_SNAPSHOT_DELTA_LIMIT:
+        return await db.get_next_cars_by_filter(filter_obj.id, filter_obj.user_id, limit=limit)
+
+    # «Ещё» показывает и старые машины, поэтому новизна относительно фильтра не проверяется
+    rule = FilterRule.from_filter(filter_obj, await db.get_equipment_ids_by_filter(filter_obj.id))._replace(create_dttm=None)
+    cursor = (filter_obj.cursor_dttm, filter_obj.cursor_car_id) if filter_obj.cursor_dttm and filter_obj.cursor_car_id else None
+    fresh_ids = [car.id for car in reversed(fresh) if rule.matches(car) and after_cursor(car, cursor)]
+    chunks = snapshot.iter_matches(rule, cursor, chunk_size=max(limit * 4, 50))
+
+    cars = []
+    for car_ids in chain([fresh_ids] if fresh_ids else [], chunks):
+        viewed = await db.get_viewed_car_ids(filter_obj.id, car_ids)
+        car_ids = [car_id for car_id in car_ids if car_id not in viewed]
+        if not car_ids:
+            continue
+        # Снимок мог устареть: машина ушла в архив или изменилась
+        by_id = {car.id: car for car in await db.get_cars_by_ids(car_ids)}
+        for car_id in car_ids:
+            car = by_id.get(car_id)
+            if car is not None and rule.matches(car) and after_cursor(car, cursor):
+                cars.append(car)
+                if len(cars) == limit:
+                    return cars
+    return cars
+
+
+async def count_matches(db: DBApi, filter_obj) -> int:
+    """
+    Сколько машин каталога подходит под фильтр; без снимка считает SQL.
+
+    Правки машин после сборки снимка учитываются только со следующим обновлением снимка.
+    """
+    snapshot = car_snapshot.current()
+    if snapshot is None:
+        return await db.count_cars_by_filter(filter_obj.id)
+    rule = FilterRule.from_filter(filter_obj, await db.get_equipment_ids_by_filter(filter_obj.id))._replace(create_dttm=None)
+    fresh = await db.get_cars_created_after(*snapshot.high_water, CAR_SNAPSHOT_DELTA_LIMIT)
+    if len(fresh) >= CAR_SNAPSHOT_DELTA_LIMIT:
+        return await db.count_cars_by_filter(filter_obj.id)
+    # Ушедшие в архив после сборки ещё лежат в снимке
+    archived_ids = await db.get_archived_car_ids_since(snapshot.built_at)
+    return snapshot.count(rule, exclude_ids=archived_ids) + sum(1 for car in fresh if rule.matches(car))
+
+
+async def main(full: bool):
+    await global_init(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME
+    )
+    await refresh_car_snapshot(full=full)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сборка колоночного снимка каталога машин")
+    parser.add_argument("--full", action="store_true", help="Собрать снимок заново, а не дописать изменения")
+    args = parser.parse_args()
+    asyncio.run(main(args.full))
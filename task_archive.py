@@ -0,0 +1,41 @@
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import asyncio
+import logging
+from tasks.archive import archive_old_cars
+from database.db_session import global_init
+from database.instrumentation import track_job
+from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+
+
+@track_job
+async def run_archive():
+    """Переносит старые объявления в архив."""
+    try:
+        await archive_old_cars()
+    except Exception as e:
+        print(f"Ошибка архивации машин: {e}")
+
+async def run_scheduler():
+    await global_init(
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        delete_db=False
+    )
+    await run_archive()
+    scheduler = AsyncIOScheduler()
+    # Раз в сутки, ночью меньше всего конкурирует с парсером и рассылкой
+    scheduler.add_job(run_archive, 'cron', hour=4)
+    scheduler.start()
+
+    try:
+        await asyncio.Event().wait()
+    except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown()
+        print("Планировщик остановлен")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_scheduler())
@@ -1,12 +1,19 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import asyncio
 import logging
+from datetime import timedelta
 from aiogram import Bot
-import aiogram.utils.markdown as fmt
 from database import DBApi
+from database.db_api import NEW_CARS_CHANNEL
 from database.db_session import global_init
-from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
-from tgbot.keyboards.inline import get_more_cars_keyboard
+from database.instrumentation import track_job
+from database.notify import listener
+from config import (
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME,
+    MATCH_OVERLAP_SECONDS, MATCH_BATCH_SIZE, MATCH_NOTIFY_DEBOUNCE
+)
+from matching.index import filter_index
+from tgbot.messages import send_cards
 
 async def get_bot():
     async with DBApi() as db:
@@ -15,90 +22,144 @@ async def get_bot():
             raise ValueError("Токен Telegram бота не найден")
         return Bot(token=setting.value)
 
+# Проход сверки и подбор по уведомлениям не должны отправлять одни и те же машины одновременно
+_match_lock = asyncio.Lock()
+# id машин из уведомлений new_cars, ещё не разобранные по фильтрам
+_pending_car_ids = set()
+_pending_event = asyncio.Event()
+
+
+async def deliver(db: DBApi, routed: dict, scan_end: tuple = None) -> set:
+    """
+    Отправляет каждому фильтру до sent_cars_count ещё не показанных машин из {id фильтра: [машины]}.
+
+    С scan_end (create_dttm, id последней разобранной машины) вместе с отметкой о просмотре
+    в той же транзакции сдвигается водяной знак фильтра: до scan_end, если отправлено всё,
+    иначе до последней отправленной машины, чтобы остаток ушёл в следующий проход.
+
+    Returns:
+        id фильтров, чей знак остался позади scan_end.
+    """
+    held = set()
+    if not routed:
+        return held
+    count_db = await db.get_setting_by_key("sent_cars_count")
+    limit = int(count_db.value) if count_db else 0
+    bot = await get_bot()
+    try:
+        for filter_id, matched_cars in routed.items():
+            rule = filter_index.get(filter_id)
+            if rule is None:
+                continue
+            user_id = rule.user_id
+            viewed = await db.get_viewed_car_ids(filter_id, [car.id for car in matched_cars])
+            unviewed = [car for car in matched_cars if car.id not in viewed]
+            new_cars = unviewed[:limit]
+            if new_cars:
+                # Подписи справочников для всех машин пачки — одним запросом
+                cards = await db.get_car_cards([car.id for car in new_cars])
+                sent_car_ids = await send_cards(bot, user_id, filter_id, cards)
+                # Отправленные машины отмечаются одним запросом, даже если отправка прервалась
+                async with db.unit_of_work():
+                    await db.create_viewed_cars(user_id, filter_id, sent_car_ids)
+                    if scan_end is not None:
+                        if len(sent_car_ids) == len(unviewed):
+                            await db.set_filter_watermark(filter_id, *scan_end)
+                        else:
+                            held.add(filter_id)
+                            if sent_car_ids:
+                                last_sent = cards[len(sent_car_ids) - 1].car
+                                await db.set_filter_watermark(filter_id, last_sent.create_dttm, last_sent.id)
+    finally:
+        await bot.session.close()
+    return held
+
+
+@track_job
 async def check_new_cars():
+    """
+    Сверка: раскладывает по фильтрам через индекс фильтров машины, добавленные после водяных
+    знаков фильтров, и сдвигает знаки. Подбирает то, что не дошло через уведомления new_cars
+    (слушатель был отключён, не PostgreSQL, процесс только запустился).
+    """
     print("Проверка новых автомобилей...")
-    async with DBApi() as db:
-        filters = await db.get_all_filters()
-        bot = await get_bot()
-        try:
-            for filter_obj in filters:
-                user_id = filter_obj.user_id
-                filter_id = filter_obj.id
-                count_db = await db.get_setting_by_key("sent_cars_count")
-                count = int(count_db.value) if count_db else 0
-                new_cars = await db.get_new_cars_by_filter(filter_id, user_id, limit=count)
-                if count > len(new_cars):
-                    count = len(new_cars)
-                if new_cars:
-                    for car in new_cars:
-                        if count <= 0:
-                            break
-                        model = await db.get_model_by_id(car.model_id)
-                        engine = await db.get_engine_type_by_id(car.engine_type_id)
-                        manufacture = await db.get_manufacture_by_id(car.manufacture_id)
-                        series = await db.get_series_by_id(car.series_id)
-                        update_date = car.update_dttm.strftime("%Y-%m-%d %H:%M")
-                        date_release = car.date_release.strftime("%Y-%m")
-
-                        car_data = {
-                            "id": car.id,
-                            "manufacture": manufacture.translated,
-                            "model": model.translated,
-                            "series": series.translated,
-                            "mileage": car.mileage,
-                            "year": date_release,
-                            "engine": engine.translated,
-                            "price_won": car.price_won,
-                            "price_rub": car.price_rub,
-                            "update_date": update_date,
-                            "check_date": car.check_dttm,
-                            "owner_changes": car.change_ownership,
-                            "total_accidents": car.all_traffic_accident,
-                            "owner_fault_accidents": car.traffic_accident_owner,
-                            "other_fault_accidents": car.traffic_accident_other,
-                            "owner_repair_cost": car.repair_cost_owner,
-                            "other_repair_cost": car.repair_cost_other,
-                            "theft": car.theft,
-                            "flood": car.flood,
-                            "total_loss": car.death,
-                            "link": car.url
-                        }
-                        message_text = (
-                            f"🆔: {car_data.get('id', 'N/A')}\n"
-                            f"🚗 {car_data.get('manufacture', '')} {car_data.get('model', '')} {car_data.get('series', '')}\n"
-                            f"📆 Дата обновления: {car_data.get('update_date', 'N/A')}\n"
-                            f"📈 Пробег: {car_data.get('mileage', 'N/A')} км\n"
-                            f"🗓 Год: {car_data.get('year', 'N/A')}\n"
-                            f"🔥 Тип двигателя: {car_data.get('engine', 'N/A')}\n"
-                            f"💵 Цена (won): {car_data.get('price_won', 'N/A'):,}\n"
-                            f"💵 Цена (руб): ~{car_data.get('price_rub', 'N/A'):,}\n"
-                            "---\n"
-                            f"📝 Страховая история:\n"
-                            f"📆 Дата проверки: {car_data.get('check_date', 'N/A')}\n"
-                            f"🙎‍ Смена владельцев: {car_data.get('owner_changes', 0)}\n"
-                            f"🚨 Общее кол-во ДТП: {car_data.get('total_accidents', 0)}\n"
-                            f"🚨 ДТП по вине владельца: {car_data.get('owner_fault_accidents', 0)}\n"
-                            f"🚨 ДТП по вине других: {car_data.get('other_fault_accidents', 0)}\n"
-                            f"💵 Расходы на ремонт (виновник - владелец): {car_data.get('owner_repair_cost', 0)} won\n"
-                            f"💵 Расходы на ремонт (виновник - другое авто): {car_data.get('other_repair_cost', 0)} won\n"
-                            f"🥷🏻 Угон: {car_data.get('theft', 0)}\n"
-                            f"🌊 Наводнения: {car_data.get('flood', 0)}\n"
-                            f"🧨 Кол-во (полная гибель): {car_data.get('total_loss', 0)}\n"
-                            "🌐 Страница на " + fmt.hlink("Encar.com", car_data.get('link', 'https://encar.com/'))
-                        )
-
-                        keyboard = get_more_cars_keyboard(filter_id)
-                        if count == 1:
-                            await bot.send_message(user_id, message_text, reply_markup=keyboard, parse_mode="HTML")
-                        else:
-                            await bot.send_message(user_id, message_text, parse_mode="HTML")
-                        await db.create_viewed_car(user_id, filter_id, car.id)
-                        count -= 1
-                        await asyncio.sleep(0.5)
-        finally:
-            await bot.session.close()
+    async with _match_lock:
+        # Основная база: водяные знаки сдвигаются там же до конца прохода, и машины, ещё не дошедшие
+        # до отстающей реплики, оказались бы позади знака и не были бы отправлены никогда
+        async with DBApi() as db:
+            await filter_index.refresh(db)
+            start = await db.get_match_start()
+            if start is None:
+                print("Фильтров нет")
+                return
+            # Машина могла закоммититься позже соседей с бОльшим create_dttm — перечитываем хвост прошлого прохода
+            overlap = timedelta(seconds=MATCH_OVERLAP_SECONDS)
+            after_dttm, after_id = start - overlap, 0
+            routed = {}
+            scanned = 0
+            while True:
+                cars = await db.get_cars_created_after(after_dttm, after_id, MATCH_BATCH_SIZE)
+                for filter_id, filter_cars in filter_index.route(cars).items():
+                    routed.setdefault(filter_id, []).extend(filter_cars)
+                scanned += len(cars)
+                if cars:
+                    after_dttm, after_id = cars[-1].create_dttm, cars[-1].id
+                if len(cars) < MATCH_BATCH_SIZE:
+                    break
+            if not scanned:
+                print("Новых машин нет")
+                return
+            scan_end = (after_dttm, after_id)
+
+            # Каждому фильтру — только машины после его собственного знака
+            watermarks = await db.get_filter_watermarks(list(routed))
+            for filter_id, (match_dttm, _) in watermarks.items():
+                routed[filter_id] = [car for car in routed[filter_id] if car.create_dttm > match_dttm - overlap]
+            print(
+                f"Разобрано машин: {scanned}, фильтров с совпадениями: {len(routed)} из {len(filter_index)} "
+                f"(различных условий {filter_index.group_count}, x{filter_index.dedup_ratio():.2f})"
+            )
+            held = await deliver(db, routed, scan_end)
+            advanced = await db.advance_filter_watermarks(*scan_end, exclude_ids=held)
+            print(f"Водяные знаки сдвинуты у {advanced} фильтров, отстают с неотправленными машинами: {len(held)}")
     print("Проверка завершена.")
 
+
+@track_job
+async def match_notified_cars():
+    """Разбирает по фильтрам машины из накопившихся уведомлений new_cars."""
+    car_ids = list(_pending_car_ids)
+    _pending_car_ids.clear()
+    async with _match_lock:
+        # Основная база: только что закоммиченной машины на реплике может ещё не быть
+        async with DBApi() as db:
+            await filter_index.refresh(db)
+            routed = filter_index.route(await db.get_cars_by_ids(car_ids))
+            print(f"По уведомлениям: машин {len(car_ids)}, фильтров с совпадениями: {len(routed)}")
+            await deliver(db, routed)
+
+
+def on_new_car(payload):
+    """Обработчик NOTIFY new_cars; None — переподключение, уведомления могли потеряться."""
+    if payload is None:
+        asyncio.get_running_loop().create_task(check_new_cars())
+    elif payload.isdigit():
+        _pending_car_ids.add(int(payload))
+        _pending_event.set()
+
+
+async def consume_new_cars():
+    """Подбирает машины из уведомлений, собирая их в пачки по MATCH_NOTIFY_DEBOUNCE секунд."""
+    while True:
+        await _pending_event.wait()
+        # Парсер коммитит страницу машин разом — ждём, пока придут уведомления всей страницы
+        await asyncio.sleep(MATCH_NOTIFY_DEBOUNCE)
+        _pending_event.clear()
+        try:
+            await match_notified_cars()
+        except Exception as e:
+            print(f"Ошибка подбора машин по уведомлениям: {e}")
+
 async def run_scheduler():
     await global_init(
         user=DB_USER,
@@ -109,6 +170,9 @@ async def run_scheduler():
         delete_db=False
     )
     await check_new_cars()
+    if listener.listen(NEW_CARS_CHANNEL, on_new_car):
+        asyncio.get_running_loop().create_task(consume_new_cars())
+        print("Подбор новых машин по уведомлениям включён, сверка раз в 10 минут")
     scheduler = AsyncIOScheduler()
     scheduler.add_job(check_new_cars, 'interval', minutes=10)
     scheduler.start()
@@ -121,4 +185,4 @@ async def run_scheduler():
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    asyncio.run(run_scheduler())
\ No newline at end of file
+    asyncio.run(run_scheduler())
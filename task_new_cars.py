@@ -4,8 +4,10 @@ import logging
 from functions.full import parse_full_car_info  # Импортируем основную функцию
 # from tasks import run_translation
 from database.db_session import global_init
+from database.instrumentation import track_job
 from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 
+@track_job
 async def run_parser_periodically():
     """Запускает парсинг автомобилей с заданными параметрами."""
     print("Запуск периодического парсинга...")
@@ -21,10 +23,10 @@ async def run_scheduler():
         dbname=DB_NAME,
         delete_db=False  # Установите True, если нужно пересоздать таблицы
     )
-    await run_parser_periodically()  # Вызовите функцию для проверки парсера
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(run_parser_periodically, 'interval', minutes=1)
     scheduler.start()
+    await run_parser_periodically()  # Вызовите функцию для проверки парсера
+    scheduler.add_job(run_parser_periodically, 'interval', minutes=1)
 
     # Держим событийный цикл активным
     try:
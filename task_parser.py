@@ -3,13 +3,21 @@ import asyncio
 import logging
 from functions.full import parse_full_car_info  # Импортируем основную функцию
 # from tasks import run_translation
+from tasks.translate import translate_pending
 from database.db_session import global_init
+from database.instrumentation import track_job
+from matching.snapshot import refresh_car_snapshot
 from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 
+@track_job
 async def run_parser_periodically():
     """Запускает парсинг автомобилей с заданными параметрами."""
     print("Запуск периодического парсинга...")
     await parse_full_car_info()  # Можно настроить max_pages
+    try:
+        await refresh_car_snapshot()
+    except Exception as e:
+        print(f"Ошибка обновления снимка машин: {e}")
 
 async def run_scheduler():
     # Инициализация базы данных
@@ -21,10 +29,13 @@ async def run_scheduler():
         dbname=DB_NAME,
         delete_db=False  # Установите True, если нужно пересоздать таблицы
     )
-    await run_parser_periodically()  # Вызовите функцию для проверки парсера
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(run_parser_periodically, 'interval', minutes=5)
+    # Переводы справочников дозаполняются в фоне, не задерживая запись машин; задача запускается только здесь,
+    # чтобы процессы не переводили одну очередь параллельно
+    scheduler.add_job(translate_pending, 'interval', seconds=30)
     scheduler.start()
+    await run_parser_periodically()  # Вызовите функцию для проверки парсера
+    scheduler.add_job(run_parser_periodically, 'interval', minutes=5)
 
     # Держим событийный цикл активным
     try:
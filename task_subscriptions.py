@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from aiogram import Bot
 from database import DBApi
 from database.db_session import global_init
+from database.instrumentation import track_job
 from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 from tgbot.keyboards.inline import get_web_app_keyboard
 
@@ -17,6 +18,7 @@ async def get_bot():
             raise ValueError("Токен Telegram бота не найден в настройках базы данных")
         return Bot(token=setting.value)
 
+@track_job
 async def check_subscriptions():
     """Проверяет подписки и отправляет уведомления об истечении."""
     print("Проверка подписок на истечение...")
@@ -56,6 +58,7 @@ async def check_subscriptions():
     
     print("Проверка подписок завершена.")
 
+@track_job
 async def check_and_remove_filters():
     """Проверяет подписки и удаляет лишние фильтры пользователей."""
     print("Проверка фильтров пользователей...")
@@ -1,5 +1,16 @@
-from .parser import run_parser_periodically
-from .subscriptions import check_subscriptions
-# from .translate import run_translation
+import importlib
 
-__all__ = ['run_parser_periodically', 'check_subscriptions']
\ No newline at end of file
+# Задачи импортируются при первом обращении, чтобы процесс не грузил зависимости чужих задач
+_LAZY = {
+    "run_parser_periodically": ".parser",
+    "check_subscriptions": ".subscriptions",
+    # "run_translation": ".translate",
+}
+
+__all__ = ['run_parser_periodically', 'check_subscriptions']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from database import DBApi
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_BATCH_PAUSE
+
+
+async def archive_old_cars(days: int = None, batch_size: int = None) -> int:
+    """
+    Переносит машины, которых парсер не встречал в выдаче дольше days дней, из car в car_archive.
+
+    Работает пачками по batch_size машин, каждая пачка — отдельная короткая транзакция,
+    между пачками пауза, чтобы не держать блокировки и не мешать парсеру и рассылке.
+    Отметки просмотра уходят в viewed_cars_archive: если машина снова появится в выдаче,
+    парсер вернёт её вместе с ними, и пользователи не получат её повторно.
+
+    Returns:
+        Количество перенесённых машин.
+    """
+    days = days or ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    seen_before = datetime.now() - timedelta(days=days)
+    print(f"Архивация машин, не встречавшихся в выдаче с {seen_before:%Y-%m-%d %H:%M}...")
+
+    started = time.perf_counter()
+    archived = viewed = 0
+    while True:
+        async with DBApi() as db:
+            batch, batch_viewed = await db.archive_cars(seen_before, batch_size)
+        archived += batch
+        viewed += batch_viewed
+        if batch < batch_size:
+            break
+        await asyncio.sleep(ARCHIVE_BATCH_PAUSE)
+
+    print(
+        f"Архивация завершена: перенесено {archived} машин и {viewed} отметок просмотра "
+        f"за {time.perf_counter() - started:.1f} с"
+    )
+    return archived
+
+
+if __name__ == "__main__":
+    import sys
+    from database.db_session import global_init
+    from config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+
+    async def main():
+        await global_init(
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            port=DB_PORT,
+            dbname=DB_NAME
+        )
+        await archive_old_cars(days=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+
+    asyncio.run(main())
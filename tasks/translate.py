@@ -1,132 +1,156 @@
 import asyncio
-from os import getenv
-from openai import AsyncOpenAI
-import openai
+import time
 from database import DBApi
-from database.manufacture import Manufacture
-from database.models import Models
-from database.series import Series
-from database.equipment import Equipment
-from database.engine_type import EngineType
-from database.drive_type import DriveType
-from database.car_color import CarColor
-from sqlalchemy import select
-from dotenv import load_dotenv
-import json
-import re
-from openai import AsyncOpenAI
-
-load_dotenv()
-
-# Initialize OpenAI client for DeepSeek API
-deepseek_api_key = getenv("DEEPSEEK_API_KEY")
-if not deepseek_api_key:
-    raise ValueError("DeepSeek API key not found. Set the DEEPSEEK_API_KEY environment variable.")
-
-client = AsyncOpenAI(
-    api_key=deepseek_api_key,
-    base_url="https://api.deepseek.com/v1"
+from database.instrumentation import track_job
+from config import (
+    TRANSLATION_PAGE_SIZE, TRANSLATION_CONCURRENCY, TRANSLATION_PENDING_LIMIT, TRANSLATION_RETRY_DELAY,
+    TRANSLATION_MAX_ATTEMPTS
 )
+from translation.cache import DIMENSION_CONTEXTS, cached_translate_many, normalize, save_translations
+from translation.deepseek import split_batches, translate_batch
+from translation.glossary import glossary_translate
 
-async def translate_text(text: str, context: str) -> str:
+
+async def translate_table(model, context: str, restart: bool = False, page_size: int = None):
     """
-    Переводит текст с корейского на английский через DeepSeek API, возвращая только переведённый текст.
-    
+    Переводит одну таблицу справочника страницами по id с сохранением прогресса.
+
+    Страницы выбираются по ключу id > last_id, так что таблица не грузится в память целиком.
+    Пачки одной страницы переводятся параллельно (не больше TRANSLATION_CONCURRENCY запросов),
+    переводы и контрольная точка пишутся одной транзакцией — после сбоя проход
+    продолжается со следующей страницы.
+
     Args:
-        text: Текст для перевода (на корейском).
-        context: Контекст перевода (не используется, оставлен для совместимости).
-    
-    Returns:
-        Переведённый текст на английском или исходный текст при ошибке.
+        restart: Начать проход заново, даже если предыдущий завершён.
+        page_size: Строк за одну выборку.
     """
-    try:
-        # Нормализация входного текста
-        normalized_text = ' '.join(text.strip().split())
-        if not normalized_text:
-            return text.capitalize()
-        
-        # Запрос перевода через DeepSeek API
-        response = await client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "Вы переводчик. Переведите данный корейский текст на английский и верните только переведённый текст в формате JSON с ключом 'translated_text'. Не добавляйте пояснений или лишнего текста."},
-                {"role": "user", "content": normalized_text}
-            ],
-            max_tokens=100,
-            temperature=0.7,
+    table_name = model.__tablename__
+    page_size = page_size or TRANSLATION_PAGE_SIZE
+
+    async with DBApi() as db:
+        progress = await db.get_translation_progress(table_name)
+        if not progress or restart or progress.finish_dttm is not None:
+            if progress and progress.finish_dttm is not None and not restart:
+                print(f"Таблица {table_name} уже переведена ({progress.finish_dttm}), пропуск")
+                return
+            progress = await db.reset_translation_progress(table_name)
+        last_id = progress.last_id or 0
+        rows_done = progress.rows_done or 0
+
+    if last_id:
+        print(f"Перевод таблицы {table_name}: продолжение после id={last_id} ({rows_done} строк уже обработано)")
+    else:
+        print(f"Перевод таблицы: {table_name}")
+
+    semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+
+    async def translate_chunk(chunk):
+        async with semaphore:
+            return await translate_batch(chunk, context)
+
+    started = time.perf_counter()
+    processed = 0
+    while True:
+        async with DBApi() as db:
+            rows = await db.get_dimension_page(model, last_id, page_size)
+        if not rows:
+            break
+
+        # Проверяем, что name не пустое и требует перевода
+        sources = list(dict.fromkeys(normalize(name) for _, name in rows if name and not name.isascii()))
+        translations = {source: glossary_translate(source) for source in sources}
+        # В LLM уходят только строки, которые словарь покрыл недостаточно
+        misses = [source for source in sources if not translations[source]]
+        for result in await asyncio.gather(*(translate_chunk(chunk) for chunk in split_batches(misses))):
+            translations.update(result)
+
+        updates = []
+        for record_id, name in rows:
+            if not name or name.isascii():
+                continue
+            translated = translations.get(normalize(name))
+            if not translated:
+                print(f"Ошибка перевода для {name} в таблице {table_name}")
+                continue
+            updates.append({"id": record_id, "translated": translated})
+
+        last_id = rows[-1][0]
+        rows_done += len(rows)
+        processed += len(rows)
+        async with DBApi() as db:
+            await db.update_dimension_translations(model, updates, last_id, rows_done)
+        await save_translations(context, {source: translated for source, translated in translations.items() if translated})
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"{table_name}: обработано {rows_done} строк (id <= {last_id}), "
+            f"переведено на странице {len(updates)}, {processed / elapsed:.1f} строк/с"
         )
-        
-        # Извлечение содержимого ответа
-        response_text = response.choices[0].message.content.strip()
-        
-        # Извлечение JSON из блоков кода, если они есть
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-        if json_match:
-            json_content = json_match.group(1)
-        else:
-            json_content = response_text
-        
-        # Парсинг JSON и извлечение перевода
-        try:
-            translation_data = json.loads(json_content)
-            translated_text = translation_data.get('translated_text', text)
-        except json.JSONDecodeError:
-            print(f"Ошибка парсинга JSON из ответа: {response_text}")
-            translated_text = text
-        
-        # Нормализация и приведение к правильному регистру
-        normalized_translated = ' '.join(translated_text.strip().split())
-        return normalized_translated.capitalize() if normalized_translated else text.capitalize()
-    except Exception as e:
-        print(f"Ошибка перевода текста '{text}' (контекст: {context}): {e}")
-        return text.capitalize()
-
-async def translate_table_data():
-    """Переводит данные в таблицах с корейского на английский с помощью GPT-4o-mini."""
-    tables = [
-        # (Manufacture, "manufacture"),
-        # (Models, "models"),
-        (Series, "series"),
-        # (Equipment, "equipment"),
-        # (EngineType, "engine_type"),
-        # (DriveType, "drive_type"),
-        # (CarColor, "car_color")
-    ]
-    
-    BATCH_SIZE = 50  # Размер пачки для обновления
-    
+
     async with DBApi() as db:
-        for model, table_name in tables:
-            print(f"Перевод таблицы: {table_name}")
-            result = await db._sess.execute(select(model))
-            records = result.scalars().all()
-            
-            for i in range(0, len(records), BATCH_SIZE):
-                batch = records[i:i + BATCH_SIZE]
-                print(f"Обработка пачки {i // BATCH_SIZE + 1} из {(len(records) + BATCH_SIZE - 1) // BATCH_SIZE}")
-                
-                for record in batch:
-                    # Проверяем, что name не пустое и требует перевода
-                    if record.name and not record.name.isascii():
-                        try:
-                            translated_name = await translate_text(record.name, table_name)
-                            print(f"Переведено: {translated_name} (было: {record.name})")
-                            record.translated = translated_name  # Записываем перевод в поле translated
-                        except Exception as e:
-                            print(f"Ошибка перевода для {record.name} в таблице {table_name}: {e}")
-                            continue
-                
-                await db._sess.commit()
-                print(f"Пачка {i // BATCH_SIZE + 1} сохранена")
-            
-            print(f"Таблица {table_name} полностью переведена и сохранена")
-
-async def run_translation():
+        await db.finish_translation_progress(table_name)
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0
+    print(f"Таблица {table_name} полностью переведена и сохранена: {processed} строк за {elapsed:.1f} с ({rate:.1f} строк/с)")
+
+
+async def translate_table_data(restart: bool = False):
+    """Переводит данные во всех таблицах справочников с корейского на английский через DeepSeek."""
+    for model, context in DIMENSION_CONTEXTS:
+        await translate_table(model, context, restart=restart)
+
+@track_job
+async def translate_pending():
+    """
+    Дозаполняет переводы записей справочников из очереди перевода (translation_queue),
+    куда парсер ставит записи, сохранённые без перевода, и сливает записи, совпавшие
+    по переводу с уже существующими. Неудавшиеся переводы откладываются с растущей паузой.
+    """
+    for model, context in DIMENSION_CONTEXTS:
+        async with DBApi() as db:
+            pending = await db.get_pending_translations(model, TRANSLATION_PENDING_LIMIT)
+        if not pending:
+            continue
+
+        print(f"Ожидают перевода в таблице {model.__tablename__}: {len(pending)}")
+        translations = await cached_translate_many([record.name for record in pending], context, translate_batch)
+        merged = 0
+        failed = []
+        unchanged = []
+        # Одна транзакция на таблицу; ошибка записи откатывает только её SAVEPOINT
+        async with DBApi() as db:
+            async with db.unit_of_work():
+                for record in pending:
+                    translated = translations.get(normalize(record.name))
+                    if not translated:
+                        failed.append(record.id)
+                        continue
+                    if translated == record.name:
+                        unchanged.append(record.id)
+                        continue
+                    try:
+                        async with db._savepoint():
+                            kept_id = await db.set_dimension_translation(model, record.id, translated)
+                    except Exception as e:
+                        print(f"Ошибка сохранения перевода {record.name} в таблице {model.__tablename__}: {e}")
+                        failed.append(record.id)
+                        continue
+                    if kept_id is not None and kept_id != record.id:
+                        merged += 1
+                await db.dequeue_translations(model, unchanged)
+                await db.postpone_translations(model, failed, TRANSLATION_RETRY_DELAY, TRANSLATION_MAX_ATTEMPTS)
+        if failed:
+            print(f"Таблица {model.__tablename__}: перевод отложен для {len(failed)} записей")
+        if merged:
+            print(f"Таблица {model.__tablename__}: слито {merged} дубликатов")
+
+async def run_translation(restart: bool = False):
     """Запускает перевод данных."""
     try:
-        await translate_table_data()
+        await translate_table_data(restart=restart)
     except Exception as e:
         print(f"Ошибка при запуске перевода: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(run_translation())
\ No newline at end of file
+    import sys
+    asyncio.run(run_translation(restart="--restart" in sys.argv))
@@ -0,0 +1,95 @@
+import asyncio
+from typing import List
+
+import aiogram.utils.markdown as fmt
+
+from tgbot.keyboards.inline import get_more_cars_keyboard
+
+
+def get_label(obj) -> str:
+    """Название записи справочника: перевод, а пока его нет — оригинальное name."""
+    if obj is None:
+        return ''
+    if isinstance(obj, str):
+        return obj  # Подпись уже посчитана запросом (DBApi.get_car_cards)
+    return obj.translated or obj.name
+
+
+def get_car_message(car, manufacture, model, series, engine) -> str:
+    """Формирует текст сообщения об автомобиле."""
+    update_date = car.update_dttm.strftime("%Y-%m-%d %H:%M")
+    date_release = car.date_release.strftime("%Y-%m") if car.date_release else 'N/A'
+
+    car_data = {
+        "id": car.id,
+        "manufacture": get_label(manufacture),
+        "model": get_label(model),
+        "series": get_label(series),
+        "mileage": car.mileage,
+        "year": date_release,
+        "engine": get_label(engine) or 'N/A',
+        "price_won": car.price_won,
+        "price_rub": car.price_rub,
+        "update_date": update_date,
+        "check_date": car.check_dttm,
+        "owner_changes": car.change_ownership,
+        "total_accidents": car.all_traffic_accident,
+        "owner_fault_accidents": car.traffic_accident_owner,
+        "other_fault_accidents": car.traffic_accident_other,
+        "owner_repair_cost": car.repair_cost_owner,
+        "other_repair_cost": car.repair_cost_other,
+        "theft": car.theft,
+        "flood": car.flood,
+        "total_loss": car.death,
+        "link": car.url
+    }
+    return (
+        f"🆔: {car_data.get('id', 'N/A')}\n"
+        f"🚗 {car_data.get('manufacture', '')} {car_data.get('model', '')} {car_data.get('series', '')}\n"
+        f"📆 Дата обновления: {car_data.get('update_date', 'N/A')}\n"
+        f"📈 Пробег: {car_data.get('mileage', 'N/A')} км\n"
+        f"🗓 Год: {car_data.get('year', 'N/A')}\n"
+        f"🔥 Тип двигателя: {car_data.get('engine', 'N/A')}\n"
+        f"💵 Цена (won): {car_data.get('price_won', 'N/A'):,}\n"
+        f"💵 Цена (руб): ~{car_data.get('price_rub', 'N/A'):,}\n"
+        "---\n"
+        f"📝 Страховая история:\n"
+        f"📆 Дата проверки: {car_data.get('check_date', 'N/A')}\n"
+        f"🙎‍ Смена владельцев: {car_data.get('owner_changes', 0)}\n"
+        f"🚨 Общее кол-во ДТП: {car_data.get('total_accidents', 0)}\n"
+        f"🚨 ДТП по вине владельца: {car_data.get('owner_fault_accidents', 0)}\n"
+        f"🚨 ДТП по вине других: {car_data.get('other_fault_accidents', 0)}\n"
+        f"💵 Расходы на ремонт (виновник - владелец): {car_data.get('owner_repair_cost', 0)} won\n"
+        f"💵 Расходы на ремонт (виновник - другое авто): {car_data.get('other_repair_cost', 0)} won\n"
+        f"🥷🏻 Угон: {car_data.get('theft', 0)}\n"
+        f"🌊 Наводнения: {car_data.get('flood', 0)}\n"
+        f"🧨 Кол-во (полная гибель): {car_data.get('total_loss', 0)}\n"
+        "🌐 Страница на " + fmt.hlink("Encar.com", car_data.get('link', 'https://encar.com/'))
+    )
+
+
+def get_card_message(card) -> str:
+    """Формирует текст сообщения по карточке из DBApi.get_car_cards."""
+    return get_car_message(card.car, card.manufacture, card.model, card.series, card.engine_type)
+
+
+async def send_cards(bot, user_id: int, filter_id: int, cards: list) -> List[int]:
+    """
+    Отправляет карточки машин по фильтру по одной; кнопка «Ещё» — под последней.
+
+    Ошибка отправки (например, пользователь заблокировал бота) прерывает отправку, но не пробрасывается:
+    вызывающий код отмечает просмотренными ровно те машины, что дошли.
+
+    Returns:
+        id отправленных машин в порядке cards.
+    """
+    sent_car_ids = []
+    try:
+        for index, card in enumerate(cards):
+            keyboard = get_more_cars_keyboard(filter_id) if index == len(cards) - 1 else None
+            await bot.send_message(user_id, get_card_message(card), reply_markup=keyboard, parse_mode="HTML")
+            sent_car_ids.append(card.car.id)
+            await asyncio.sleep(0.5)
+    except Exception as e:
+        print(f"Ошибка отправки машин пользователю {user_id} по фильтру {filter_id}: {e}")
+    return sent_car_ids
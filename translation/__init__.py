@@ -0,0 +1,5 @@
+from .cache import cached_translate, cached_translate_many, lookup_translation, seed_from_dimensions, stats as cache_stats
+from .glossary import glossary_translate
+from .provider import CircuitBreaker, GoogleProvider, TranslationProvider
+
+__all__ = ['cached_translate', 'cached_translate_many', 'lookup_translation', 'seed_from_dimensions', 'cache_stats', 'glossary_translate', 'CircuitBreaker', 'GoogleProvider', 'TranslationProvider']
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+from database import DBApi
+from database.manufacture import Manufacture
+from database.models import Models
+from database.series import Series
+from database.equipment import Equipment
+from database.engine_type import EngineType
+from database.drive_type import DriveType
+from database.car_color import CarColor
+from config import TRANSLATION_CACHE_SIZE
+from translation.glossary import glossary_translate
+
+# Справочники, переводы из которых можно сразу положить в кэш
+DIMENSION_CONTEXTS = [
+    (Manufacture, "manufacture"),
+    (Models, "model"),
+    (Series, "series"),
+    (Equipment, "equipment"),
+    (EngineType, "engine_type"),
+    (DriveType, "drive_type"),
+    (CarColor, "car_color"),
+]
+
+
+class LRUCache:
+    """Простой LRU-кэш на OrderedDict."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TranslationCacheStats:
+    """Счётчики попаданий в кэш переводов за запуск: строки (попадания и промахи) и вызовы API."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.glossary_hits = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.db_hits + self.glossary_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "glossary_hits": self.glossary_hits,
+            "misses": self.misses,
+            "api_calls": self.api_calls,
+            "api_calls_saved": self.hits,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+# Ограничение длины translation_cache.source
+MAX_SOURCE_LENGTH = 512
+
+_memory = LRUCache(TRANSLATION_CACHE_SIZE)
+stats = TranslationCacheStats()
+_seeded = False
+
+
+def normalize(text: str) -> str:
+    """Схлопывает пробелы, чтобы одинаковые строки давали один ключ."""
+    return ' '.join((text or '').strip().split())
+
+
+async def seed_from_dimensions():
+    """Один раз за процесс переносит переводы из справочников в translation_cache."""
+    global _seeded
+    if _seeded:
+        return
+    try:
+        async with DBApi() as db:
+            added = await db.seed_translation_cache(DIMENSION_CONTEXTS)
+    except Exception as e:
+        # Флаг не ставится — попробуем снова при следующем запуске парсинга
+        print(f"Ошибка заполнения кэша переводов: {e}")
+        return
+    _seeded = True
+    if added:
+        print(f"В кэш переводов добавлено {added} записей из справочников")
+
+
+async def get_cached_translation(source: str, context: str) -> Optional[str]:
+    """Ищет перевод в памяти, затем в таблице translation_cache и в локальном словаре."""
+    key = (source, context)
+    translated = _memory.get(key)
+    if translated is not None:
+        stats.memory_hits += 1
+        return translated
+
+    # Сохранённый перевод (от LLM или исправленный вручную) точнее словарного
+    if len(source) <= MAX_SOURCE_LENGTH:
+        async with DBApi() as db:
+            row = await db.get_translation(source, context)
+        if row:
+            _memory.put(key, row.translated)
+            stats.db_hits += 1
+            return row.translated
+
+    translated = glossary_translate(source)
+    if translated is not None:
+        _memory.put(key, translated)
+        stats.glossary_hits += 1
+        return translated
+    return None
+
+
+async def lookup_translation(text: str, context: str) -> Optional[str]:
+    """Ищет перевод только в кэше и словаре, без обращения к API."""
+    source = normalize(text)
+    if not source:
+        return None
+    return await get_cached_translation(source, context)
+
+
+async def save_translation(source: str, context: str, translated: str, overwrite: bool = False):
+    """Сохраняет перевод в память и в таблицу translation_cache."""
+    _memory.put((source, context), translated)
+    if len(source) > MAX_SOURCE_LENGTH:
+        return
+    async with DBApi() as db:
+        if overwrite:
+            await db.set_translation(source, context, translated)
+        else:
+            await db.create_translation(source, context, translated)
+
+
+async def save_translations(context: str, translations: Dict[str, str]):
+    """Перезаписывает пачку переводов одного контекста в памяти и в translation_cache."""
+    for source, translated in translations.items():
+        _memory.put((source, context), translated)
+    stored = {source: translated for source, translated in translations.items() if len(source) <= MAX_SOURCE_LENGTH}
+    if not stored:
+        return
+    async with DBApi() as db:
+        await db.set_translations(context, stored)
+
+
+async def cached_translate(
+    text: str,
+    context: str,
+    translate: Callable[[str, str], Awaitable[Optional[str]]]
+) -> Optional[str]:
+    """
+    Возвращает перевод text из кэша, а при промахе вызывает translate.
+
+    translate должен вернуть None при ошибке — такие результаты не кэшируются.
+    """
+    source = normalize(text)
+    if not source:
+        return None
+
+    translated = await get_cached_translation(source, context)
+    if translated is not None:
+        return translated
+
+    stats.misses += 1
+    stats.api_calls += 1
+    translated = await translate(source, context)
+    if translated:
+        await save_translation(source, context, translated)
+    return translated
+
+
+async def cached_translate_many(
+    texts: List[str],
+    context: str,
+    translate_many: Callable[[List[str], str], Awaitable[Dict[str, Optional[str]]]]
+) -> Dict[str, Optional[str]]:
+    """
+    Пакетный вариант cached_translate: промахи кэша уходят в translate_many одним вызовом.
+
+    Returns:
+        Словарь {нормализованная строка: перевод или None}.
+    """
+    result = {}
+    misses = []
+    for source in dict.fromkeys(normalize(t) for t in texts):
+        if not source:
+            continue
+        translated = await get_cached_translation(source, context)
+        if translated is not None:
+            result[source] = translated
+        else:
+            misses.append(source)
+
+    if misses:
+        stats.misses += len(misses)
+        # Все промахи уходят одним пакетным вызовом
+        stats.api_calls += 1
+        translated_misses = await translate_many(misses, context)
+        for source in misses:
+            translated = translated_misses.get(source)
+            if translated:
+                await save_translation(source, context, translated)
+            result[source] = translated
+    return result
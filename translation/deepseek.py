@@ -0,0 +1,188 @@
+import json
+import re
+from os import getenv
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from config import TRANSLATION_BATCH_SIZE, TRANSLATION_TOKEN_BUDGET
+from translation.provider import TranslationProvider
+
+load_dotenv()
+
+SINGLE_PROMPT = "Вы переводчик. Переведите данный корейский текст на английский и верните только переведённый текст в формате JSON с ключом 'translated_text'. Не добавляйте пояснений или лишнего текста."
+BATCH_PROMPT = (
+    "Вы переводчик автомобильных названий. Вам передан JSON-массив строк на корейском (контекст: {context}). "
+    "Переведите каждую строку на английский и верните только JSON-массив той же длины, "
+    "где i-й элемент — перевод i-й строки. Не добавляйте пояснений или лишнего текста."
+)
+
+
+def _extract_json(response_text: str) -> str:
+    """Достаёт JSON из блока кода, если модель его туда обернула."""
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
+    return json_match.group(1) if json_match else response_text
+
+
+def _clean(translated: str) -> Optional[str]:
+    normalized = ' '.join((translated or '').strip().split())
+    return normalized.capitalize() if normalized else None
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов: хангыль и латиница занимают около токена на символ."""
+    return len(text) + 4
+
+
+def split_batches(texts: List[str], batch_size: int = None, token_budget: int = None) -> List[List[str]]:
+    """Режет строки на пачки не длиннее batch_size и не дороже token_budget токенов."""
+    batch_size = batch_size or TRANSLATION_BATCH_SIZE
+    token_budget = token_budget or TRANSLATION_TOKEN_BUDGET
+    batches = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class DeepSeekProvider(TranslationProvider):
+    """
+    Перевод через DeepSeek API пачками строк.
+
+    Клиент создаётся при первом запросе: без DEEPSEEK_API_KEY модуль импортируется,
+    а запросы завершаются ошибкой и размыкают размыкатель.
+    """
+
+    name = "deepseek"
+
+    def __init__(self, batch_size: int = None, token_budget: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            # openai нужен только процессам, которые действительно переводят
+            from openai import AsyncOpenAI
+            deepseek_api_key = getenv("DEEPSEEK_API_KEY")
+            if not deepseek_api_key:
+                raise ValueError("DeepSeek API key not found. Set the DEEPSEEK_API_KEY environment variable.")
+            self._client = AsyncOpenAI(
+                api_key=deepseek_api_key,
+                base_url="https://api.deepseek.com/v1"
+            )
+        return self._client
+
+    async def _complete(self, system_prompt: str, content: str, max_tokens: int, temperature: float) -> Optional[str]:
+        """Отправляет один запрос к модели. Возвращает текст ответа или None."""
+        async def request():
+            response = await self._get_client().chat.completions.create(
+                model="deepseek-chat",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            return response.choices[0].message.content.strip()
+
+        return await self.call(request)
+
+    async def _translate(self, text: str, context: str) -> Optional[str]:
+        """Запрашивает перевод одной строки. Возвращает None при ошибке."""
+        response_text = await self._complete(SINGLE_PROMPT, text, max_tokens=100, temperature=0.7)
+        if response_text is None:
+            return None
+        try:
+            translation_data = json.loads(_extract_json(response_text))
+        except json.JSONDecodeError:
+            print(f"Ошибка парсинга JSON из ответа: {response_text}")
+            return None
+        if not isinstance(translation_data, dict):
+            return None
+        return _clean(translation_data.get('translated_text'))
+
+    async def _request_batch(self, texts: List[str], context: str) -> Optional[List[str]]:
+        """
+        Переводит список строк одним запросом.
+
+        Returns:
+            Переводы в порядке texts или None, если ответ не прошёл проверку.
+        """
+        response_text = await self._complete(
+            BATCH_PROMPT.format(context=context),
+            json.dumps(texts, ensure_ascii=False),
+            max_tokens=min(8192, sum(estimate_tokens(t) for t in texts) * 3),
+            temperature=0.3,
+        )
+        if response_text is None:
+            return None
+        try:
+            data = json.loads(_extract_json(response_text))
+        except json.JSONDecodeError:
+            print(f"Ошибка парсинга JSON-массива из ответа на пачку из {len(texts)} строк")
+            return None
+
+        if not isinstance(data, list) or len(data) != len(texts):
+            print(f"Ответ на пачку из {len(texts)} строк не совпадает по длине")
+            return None
+        translated = [_clean(item) if isinstance(item, str) else None for item in data]
+        if any(item is None for item in translated):
+            print(f"Ответ на пачку из {len(texts)} строк содержит пустые переводы")
+            return None
+        return translated
+
+    async def _translate_chunk(self, texts: List[str], context: str, result: Dict[str, Optional[str]]):
+        """Переводит пачку, а при невалидном ответе делит её пополам и повторяет."""
+        if len(texts) == 1:
+            result[texts[0]] = await self._translate(texts[0], context)
+            return
+        translated = await self._request_batch(texts, context)
+        if translated is not None:
+            result.update(zip(texts, translated))
+            return
+        if self.breaker.state == "open":
+            # Сервис отключён — не дробим пачку на заведомо неудачные запросы
+            result.update(dict.fromkeys(texts))
+            return
+        middle = len(texts) // 2
+        await self._translate_chunk(texts[:middle], context, result)
+        await self._translate_chunk(texts[middle:], context, result)
+
+    async def _translate_many(self, texts: List[str], context: str) -> Dict[str, Optional[str]]:
+        result = {}
+        for batch in split_batches(texts, self.batch_size, self.token_budget):
+            await self._translate_chunk(batch, context, result)
+        return result
+
+
+# Общий экземпляр: single-flight и размыкатель работают на весь процесс
+deepseek = DeepSeekProvider()
+
+
+async def request_translation(text: str, context: str) -> Optional[str]:
+    """Запрашивает перевод одной строки у DeepSeek API. Возвращает None при ошибке."""
+    return await deepseek.translate(text, context)
+
+
+async def translate_batch(texts: List[str], context: str) -> Dict[str, Optional[str]]:
+    """
+    Переводит набор строк минимальным числом запросов.
+
+    Args:
+        texts: Строки для перевода, дубликаты отбрасываются.
+        context: Контекст перевода (manufacture, model, series и т.д.).
+
+    Returns:
+        Словарь {исходная строка: перевод или None при ошибке}.
+    """
+    return await deepseek.translate_many(texts, context)
@@ -0,0 +1,359 @@
+from typing import List, Optional, Tuple
+from config import GLOSSARY_MIN_COVERAGE
+
+# Закрытый словарь автомобильных терминов: топливо, цвета, коробки, комплектации, кузова, марки и модели.
+# Ключи сопоставляются только целыми словами хангыля: слово переводится, если его целиком можно
+# составить из терминов ("가솔린터보"), иначе латинизируется ("뉴욕" не превращается в "New yok").
+# Фразы с пробелом ("더 뉴") задаются целиком.
+GLOSSARY = {
+    # Топливо
+    "가솔린": "Gasoline",
+    "휘발유": "Gasoline",
+    "디젤": "Diesel",
+    "경유": "Diesel",
+    "전기": "Electric",
+    "하이브리드": "Hybrid",
+    "플러그인": "Plug-in",
+    "엘피지": "LPG",
+    "수소": "Hydrogen",
+    "겸용": "Bi-fuel",
+    "일반인 구입": "Public purchase",
+    # Цвета
+    "흰색": "White",
+    "검정색": "Black",
+    "검정": "Black",
+    "은색": "Silver",
+    "명은색": "Bright silver",
+    "은회색": "Silver gray",
+    "회색": "Gray",
+    "쥐색": "Dark gray",
+    "진회색": "Dark gray",
+    "진주색": "Pearl",
+    "청색": "Blue",
+    "파란색": "Blue",
+    "하늘색": "Sky blue",
+    "청옥색": "Sapphire",
+    "빨간색": "Red",
+    "적색": "Red",
+    "노란색": "Yellow",
+    "주황색": "Orange",
+    "녹색": "Green",
+    "담녹색": "Light green",
+    "연두색": "Light green",
+    "갈색": "Brown",
+    "갈대색": "Reed",
+    "베이지": "Beige",
+    "금색": "Gold",
+    "연금색": "Light gold",
+    "자주색": "Purple",
+    "보라색": "Purple",
+    "분홍색": "Pink",
+    "은하색": "Galaxy",
+    "투톤": "Two-tone",
+    "기타": "Other",
+    # Коробка передач и привод
+    "오토": "Automatic",
+    "자동": "Automatic",
+    "수동": "Manual",
+    "세미오토": "Semi-automatic",
+    "전륜": "FWD",
+    "후륜": "RWD",
+    "사륜": "4WD",
+    # Комплектации и обозначения
+    "디 올 뉴": "The all new",
+    "올 뉴": "All new",
+    "더 뉴": "The new",
+    "뉴": "New",
+    "신형": "New",
+    "디럭스": "Deluxe",
+    "프리미엄": "Premium",
+    "익스클루시브": "Exclusive",
+    "럭셔리": "Luxury",
+    "모던": "Modern",
+    "스마트": "Smart",
+    "스페셜": "Special",
+    "스탠다드": "Standard",
+    "베이직": "Basic",
+    "인스퍼레이션": "Inspiration",
+    "노블레스": "Noblesse",
+    "시그니처": "Signature",
+    "프레스티지": "Prestige",
+    "캘리그래피": "Calligraphy",
+    "트렌디": "Trendy",
+    "스타일": "Style",
+    "플러스": "Plus",
+    "에디션": "Edition",
+    "리미티드": "Limited",
+    "플래티넘": "Platinum",
+    "그래비티": "Gravity",
+    "터보": "Turbo",
+    "스포츠": "Sport",
+    "인승": "seater",
+    "롱바디": "Long body",
+    "더블캡": "Double cab",
+    "슈퍼캡": "Super cab",
+    "클래스": "Class",
+    # Кузов
+    "세단": "Sedan",
+    "쿠페": "Coupe",
+    "컨버터블": "Convertible",
+    "해치백": "Hatchback",
+    "왜건": "Wagon",
+    "밴": "Van",
+    "카고": "Cargo",
+    "트럭": "Truck",
+    "픽업": "Pickup",
+    # Марки
+    "현대": "Hyundai",
+    "기아": "Kia",
+    "제네시스": "Genesis",
+    "쉐보레": "Chevrolet",
+    "대우": "Daewoo",
+    "르노삼성": "Renault Samsung",
+    "르노코리아": "Renault Korea",
+    "르노": "Renault",
+    "쌍용": "SsangYong",
+    "모빌리티": "Mobility",
+    "벤츠": "Mercedes-Benz",
+    "아우디": "Audi",
+    "폭스바겐": "Volkswagen",
+    "볼보": "Volvo",
+    "포르쉐": "Porsche",
+    "렉서스": "Lexus",
+    "토요타": "Toyota",
+    "도요타": "Toyota",
+    "혼다": "Honda",
+    "닛산": "Nissan",
+    "인피니티": "Infiniti",
+    "포드": "Ford",
+    "링컨": "Lincoln",
+    "지프": "Jeep",
+    "캐딜락": "Cadillac",
+    "테슬라": "Tesla",
+    "미니": "Mini",
+    "랜드로버": "Land Rover",
+    "재규어": "Jaguar",
+    "마세라티": "Maserati",
+    "페라리": "Ferrari",
+    "람보르기니": "Lamborghini",
+    "벤틀리": "Bentley",
+    "롤스로이스": "Rolls-Royce",
+    "푸조": "Peugeot",
+    "시트로엥": "Citroen",
+    "크라이슬러": "Chrysler",
+    "닷지": "Dodge",
+    "마쯔다": "Mazda",
+    "미쯔비시": "Mitsubishi",
+    "스바루": "Subaru",
+    "폴스타": "Polestar",
+    # Модели
+    "쏘나타": "Sonata",
+    "그랜저": "Grandeur",
+    "아반떼": "Avante",
+    "싼타페": "Santa Fe",
+    "투싼": "Tucson",
+    "팰리세이드": "Palisade",
+    "코나": "Kona",
+    "캐스퍼": "Casper",
+    "스타리아": "Staria",
+    "스타렉스": "Starex",
+    "포터": "Porter",
+    "아이오닉": "Ioniq",
+    "벨로스터": "Veloster",
+    "베뉴": "Venue",
+    "에쿠스": "Equus",
+    "쏘렌토": "Sorento",
+    "카니발": "Carnival",
+    "스포티지": "Sportage",
+    "셀토스": "Seltos",
+    "모닝": "Morning",
+    "레이": "Ray",
+    "니로": "Niro",
+    "봉고": "Bongo",
+    "스팅어": "Stinger",
+    "모하비": "Mohave",
+    "말리부": "Malibu",
+    "스파크": "Spark",
+    "트랙스": "Trax",
+    "트레일블레이저": "Trailblazer",
+    "티볼리": "Tivoli",
+    "렉스턴": "Rexton",
+    "코란도": "Korando",
+    "토레스": "Torres",
+}
+
+# Revised Romanization: начальные, средние и конечные буквы слога
+_INITIALS = ["g", "kk", "n", "d", "tt", "r", "m", "b", "pp", "s", "ss", "", "j", "jj", "ch", "k", "t", "p", "h"]
+_MEDIALS = [
+    "a", "ae", "ya", "yae", "eo", "e", "yeo", "ye", "o", "wa", "wae", "oe",
+    "yo", "u", "wo", "we", "wi", "yu", "eu", "ui", "i",
+]
+_FINALS = [
+    "", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l",
+    "p", "l", "m", "p", "p", "t", "t", "ng", "t", "t", "k", "t", "p", "t",
+]
+_HANGUL_FIRST = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+
+def is_hangul(char: str) -> bool:
+    return _HANGUL_FIRST <= ord(char) <= _HANGUL_LAST
+
+
+def romanize(text: str) -> str:
+    """
+    Латинизирует слоги хангыля по Revised Romanization, раскладывая слог на буквы.
+
+    Правила ассимиляции на стыке слогов не применяются — это запасной вариант
+    для неизвестных кусков, а не полноценная транслитерация.
+    """
+    result = []
+    for char in text:
+        if not is_hangul(char):
+            result.append(char)
+            continue
+        index = ord(char) - _HANGUL_FIRST
+        initial, rest = divmod(index, 21 * 28)
+        medial, final = divmod(rest, 28)
+        result.append(_INITIALS[initial] + _MEDIALS[medial] + _FINALS[final])
+    return ''.join(result)
+
+
+class Trie:
+    """Префиксное дерево для поиска терминов словаря, начинающихся с заданной позиции."""
+
+    def __init__(self):
+        self._root = {}
+
+    def insert(self, key: str, value: str):
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node[None] = value
+
+    def matches(self, text: str, start: int) -> List[Tuple[int, str]]:
+        """Возвращает (конец совпадения, перевод) для всех терминов с позиции start, от коротких к длинным."""
+        node = self._root
+        found = []
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                break
+            if None in node:
+                found.append((position + 1, node[None]))
+        return found
+
+
+_trie = None
+
+
+def get_trie() -> Trie:
+    global _trie
+    if _trie is None:
+        _trie = Trie()
+        for key, value in GLOSSARY.items():
+            _trie.insert(key, value)
+    return _trie
+
+
+def _append(tokens: list, token: str):
+    # Слова, стоявшие в оригинале вплотную ("그랜저IG", "7인승"), разделяем пробелом
+    if tokens and tokens[-1][-1:].isalnum() and token[:1].isalnum():
+        tokens.append(' ')
+    tokens.append(token)
+
+
+def _word_boundary(text: str, position: int) -> bool:
+    """Позиция не разрезает слово хангыля."""
+    if position == 0 or position == len(text):
+        return True
+    return not (is_hangul(text[position - 1]) and is_hangul(text[position]))
+
+
+def _segment(trie: Trie, text: str, start: int) -> Optional[Tuple[int, List[str]]]:
+    """
+    Составляет текст с позиции start из терминов словаря так, чтобы он кончался на границе слова.
+
+    Returns:
+        (конец, переводы терминов) для самого длинного такого разбиения или None.
+    """
+    paths = {start: []}
+    best = None
+    for position in range(start, len(text) + 1):
+        path = paths.get(position)
+        if path is None:
+            if position > max(paths):
+                break
+            continue
+        if position > start and _word_boundary(text, position):
+            best = (position, path)
+        for end, translated in trie.matches(text, position):
+            paths.setdefault(end, path + [translated])
+    return best
+
+
+def _capitalize(text: str) -> str:
+    # str.capitalize() опустил бы остальные буквы: "BMW" стал бы "Bmw"
+    return text[:1].upper() + text[1:]
+
+
+def translate_with_glossary(text: str) -> Tuple[str, float]:
+    """
+    Переводит строку по словарю, латинизируя неизвестный хангыль.
+
+    Returns:
+        (перевод, доля символов хангыля, покрытых словарём целыми словами).
+        Строка без хангыля покрыта полностью.
+    """
+    trie = get_trie()
+    text = ' '.join(text.split())
+    tokens = []
+    hangul_total = sum(1 for char in text if is_hangul(char))
+    hangul_covered = 0
+    # Текущий кусок без совпадения: неизвестный хангыль или символы, не требующие перевода
+    run = []
+
+    def flush():
+        if run:
+            chunk = ''.join(run)
+            _append(tokens, romanize(chunk) if is_hangul(chunk[0]) else chunk)
+            run.clear()
+
+    position = 0
+    while position < len(text):
+        segment = _segment(trie, text, position) if _word_boundary(text, position) else None
+        if segment:
+            flush()
+            end, translations = segment
+            hangul_covered += sum(1 for char in text[position:end] if is_hangul(char))
+            for translated in translations:
+                _append(tokens, translated)
+            position = end
+            continue
+
+        char = text[position]
+        if run and is_hangul(run[0]) != is_hangul(char):
+            flush()
+        run.append(char)
+        position += 1
+    flush()
+
+    translated = _capitalize(' '.join(''.join(tokens).split()))
+    coverage = hangul_covered / hangul_total if hangul_total else 1.0
+    return translated, coverage
+
+
+def glossary_translate(text: str, min_coverage: float = None) -> Optional[str]:
+    """
+    Переводит строку локально, если словарь покрывает не меньше min_coverage её хангыля.
+
+    Returns:
+        Перевод или None — тогда строку нужно отправить в LLM.
+    """
+    if not text:
+        return None
+    min_coverage = GLOSSARY_MIN_COVERAGE if min_coverage is None else min_coverage
+    translated, coverage = translate_with_glossary(text)
+    if coverage < min_coverage or not translated:
+        return None
+    return translated
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+from config import TRANSLATION_TIMEOUT, TRANSLATION_BREAKER_FAILURES, TRANSLATION_BREAKER_RESET
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """
+    Размыкатель: после failure_threshold ошибок подряд перестаёт пускать запросы
+    на reset_timeout секунд, затем пропускает один пробный запрос.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or TRANSLATION_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or TRANSLATION_BREAKER_RESET
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        if self._opened_at is not None:
+            print(f"Переводчик {self.name} снова доступен")
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                print(f"Переводчик {self.name} отключён на {self.reset_timeout} с после {self._failures} ошибок подряд")
+            self._opened_at = time.monotonic()
+
+
+class TranslationProvider(ABC):
+    """
+    Базовый асинхронный переводчик; наследник реализует _translate.
+
+    Одинаковые строки, запрошенные одновременно, переводятся одним вызовом (single-flight),
+    каждый запрос к сервису ограничен таймаутом, а при серии ошибок размыкатель
+    временно отключает сервис. Ошибка перевода возвращается как None —
+    вызывающий код оставляет исходный текст.
+    """
+
+    name = "base"
+
+    def __init__(self, timeout: float = None, failure_threshold: int = None, reset_timeout: float = None):
+        self.timeout = timeout or TRANSLATION_TIMEOUT
+        self.breaker = CircuitBreaker(self.name, failure_threshold, reset_timeout)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    @abstractmethod
+    async def _translate(self, text: str, context: str) -> Optional[str]:
+        """Переводит одну строку. Возвращает None при ошибке."""
+
+    async def _translate_many(self, texts: List[str], context: str) -> Dict[str, Optional[str]]:
+        """Переводит набор строк. По умолчанию — параллельными одиночными запросами."""
+        translated = await asyncio.gather(*(self._translate(text, context) for text in texts))
+        return dict(zip(texts, translated))
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> Optional[T]:
+        """
+        Выполняет один запрос к сервису с таймаутом и учётом в размыкателе.
+
+        Returns:
+            Результат запроса или None, если сервис отключён, не ответил вовремя или упал.
+        """
+        if not self.breaker.allow():
+            return None
+        try:
+            result = await asyncio.wait_for(factory(), self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Переводчик {self.name} не ответил за {self.timeout} с")
+            self.breaker.record_failure()
+            return None
+        except Exception as e:
+            print(f"Ошибка запроса к переводчику {self.name}: {e}")
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return result
+
+    async def translate_many(self, texts: List[str], context: str = "") -> Dict[str, Optional[str]]:
+        """
+        Переводит набор строк; строки, которые уже переводятся в другой задаче, не запрашиваются повторно.
+
+        Returns:
+            Словарь {исходная строка: перевод или None при ошибке}.
+        """
+        loop = asyncio.get_running_loop()
+        result = {}
+        waiting = {}
+        own = []
+        for text in dict.fromkeys(t for t in texts if t):
+            key = (text, context)
+            if key in self._inflight:
+                waiting[text] = self._inflight[key]
+            else:
+                self._inflight[key] = loop.create_future()
+                own.append(text)
+
+        try:
+            if own:
+                result.update(await self._translate_many(own, context))
+        except Exception as e:
+            print(f"Ошибка перевода {len(own)} строк переводчиком {self.name}: {e}")
+        finally:
+            for text in own:
+                future = self._inflight.pop((text, context))
+                if not future.done():
+                    future.set_result(result.get(text))
+
+        for text, future in waiting.items():
+            result[text] = await asyncio.shield(future)
+        return result
+
+    async def translate(self, text: str, context: str = "") -> Optional[str]:
+        """Переводит одну строку. Возвращает None при ошибке."""
+        if not text:
+            return None
+        return (await self.translate_many([text], context)).get(text)
+
+
+class GoogleProvider(TranslationProvider):
+    """Google Translate через deep_translator; синхронный клиент вынесен в поток, чтобы не блокировать цикл."""
+
+    name = "google"
+
+    def __init__(self, source: str = "ko", target: str = "en", **kwargs):
+        super().__init__(**kwargs)
+        from deep_translator import GoogleTranslator
+        self._translator = GoogleTranslator(source=source, target=target)
+
+    async def _translate(self, text: str, context: str) -> Optional[str]:
+        return await self.call(lambda: asyncio.to_thread(self._translator.translate, text))